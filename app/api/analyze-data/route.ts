@@ -62,6 +62,10 @@ export async function POST(request: Request) {
     // Créer une copie de la requête avec exactement le format attendu
     const sanitizedRequest = {
       ...requestData,
+      // Les résultats affichent les trois métriques, quel que soit le KPI analysé
+      metrics: requestData.metrics ?? ['conversion', 'aov', 'revenue'],
+      // Les graphiques n'ont besoin que d'un échantillon des valeurs : la réponse reste de taille bornée
+      raw_data_mode: requestData.raw_data_mode ?? 'sample',
       users_per_variation: {
         control: requestData.users_per_variation.control,
         variation: requestData.users_per_variation.variation
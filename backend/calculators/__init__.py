@@ -1,14 +1,26 @@
-from .frequentist import calculate_frequentist
+from .frequentist import calculate_frequentist, calculate_frequentist_grid
 from .bayesian import calculate_bayesian
-from .confidence_evolution import calculate_confidence_evolution
-from .data_analysis import analyze_ab_test_data, analyze_data
+from .confidence_evolution import calculate_confidence_evolution, calculate_confidence_evolution_batch, iter_confidence_evolution
+from .trajectory_simulation import simulate_confidence_trajectories
+from .data_analysis import analyze_ab_test_data, analyze_aggregated_data, analyze_data, analyze_conversion_counts, analyze_multi_arm_data, summarize_ab_test_data
 from .visualization_preprocessor import prepare_visualization_data
+from .random_streams import create_rng, seed_from_parameters
 
 __all__ = [
     'calculate_frequentist',
+    'calculate_frequentist_grid',
     'calculate_bayesian',
     'calculate_confidence_evolution',
+    'calculate_confidence_evolution_batch',
+    'iter_confidence_evolution',
+    'simulate_confidence_trajectories',
     'analyze_ab_test_data',
+    'analyze_aggregated_data',
     'analyze_data',
-    'prepare_visualization_data'
+    'analyze_conversion_counts',
+    'analyze_multi_arm_data',
+    'summarize_ab_test_data',
+    'prepare_visualization_data',
+    'create_rng',
+    'seed_from_parameters'
 ] 
\ No newline at end of file
@@ -1,10 +1,256 @@
 import math
 import numpy as np
+from scipy.stats import beta as beta_dist, norm, qmc
 
-def calculate_bayesian(visits, conversions, traffic, variations, improvement, confidence):
+from .bayesian_multiarm import (
+    prob_best_against_identical,
+    probability_to_be_best_quadrature,
+    probability_to_be_best_sampling,
+)
+from .bayesian_probability import prob_b_beats_a
+from .random_streams import create_rng
+
+BAYESIAN_ENGINES = ("exact", "normal", "simulation")
+
+# Posterior draws shared by every candidate sample size in the simulation engine
+# (a power of two, as required by the scrambled Sobol sequence)
+SIMULATION_DRAWS = 2 ** 13
+
+# Seed used when no generator is given, so that identical requests give
+# identical simulated results
+SIMULATION_SEED = 42
+
+# Candidate sample sizes evaluated together in one vectorized pass
+SEARCH_BRACKET_SIZE = 16
+
+# Below this many pseudo-successes or failures the posterior is drawn by
+# inverse-Beta transform instead of the normal approximation
+NORMAL_APPROXIMATION_MIN_COUNT = 30
+
+# Normal scores at which the inverse-Beta transform is tabulated
+_INVERSE_BETA_SCORES = np.linspace(-8.5, 8.5, 513)
+_INVERSE_BETA_LEVELS = norm.cdf(_INVERSE_BETA_SCORES)
+
+
+def _posterior_parameters(sample_sizes, rate, alpha_prior, beta_prior):
+    """Beta posterior parameters after observing the expected conversions."""
+    conversions = sample_sizes * rate
+    return alpha_prior + conversions, beta_prior + sample_sizes - conversions
+
+
+def _posterior_draws(alpha, beta, normals):
+    """
+    Transform shared standard normal draws into posterior samples.
+
+    Returns a (candidates x draws) matrix. Rows with enough pseudo-counts use
+    the normal approximation of the Beta posterior; the others apply the
+    inverse-Beta transform, tabulated on a grid of normal scores and
+    interpolated so that the same draws are reused.
+    """
+    alpha = alpha[:, np.newaxis]
+    beta = beta[:, np.newaxis]
+    total = alpha + beta
+    mean = alpha / total
+    std = np.sqrt(alpha * beta / (total ** 2 * (total + 1)))
+    draws = mean + std * normals
+
+    small = np.flatnonzero(np.minimum(alpha, beta).ravel() < NORMAL_APPROXIMATION_MIN_COUNT)
+    if len(small):
+        quantiles = beta_dist.ppf(_INVERSE_BETA_LEVELS, alpha[small], beta[small])
+        for row, row_quantiles in zip(small, quantiles):
+            draws[row] = np.interp(normals, _INVERSE_BETA_SCORES, row_quantiles)
+    return draws
+
+
+def search_sample_size_crn(p, target_rate, required_prob, min_sample, max_sample,
+                           alpha_prior=0.5, beta_prior=0.5, draws=SIMULATION_DRAWS,
+                           bracket_size=SEARCH_BRACKET_SIZE, tolerance=100,
+                           rng=None, competitors=1):
+    """
+    Find the smallest sample size per variation reaching the required probability.
+
+    Every candidate size is evaluated against the same set of uniform draws
+    (common random numbers), which keeps the estimated probability monotone in
+    the sample size. The draws come from a scrambled Sobol sequence, so a few
+    thousand points estimate the probability more precisely than 50,000
+    independent draws. Each round evaluates a whole bracket of candidates in
+    one NumPy pass and then narrows the search to the interval where the
+    probability crosses the threshold.
+
+    With several competitors sharing the control rate, only their maximum
+    matters: it is drawn from the same uniforms as U ** (1 / competitors),
+    so the cost does not grow with the number of arms.
+
+    Parameters:
+    -----------
+    p : float
+        Baseline conversion rate
+    target_rate : float
+        Conversion rate of the variation
+    required_prob : float
+        Required probability that the variation beats the control
+    min_sample : int
+        Lower bound of the search
+    max_sample : int
+        Upper bound of the search, returned if no candidate qualifies
+    alpha_prior, beta_prior : float
+        Beta prior parameters
+    draws : int
+        Number of posterior draws per arm (rounded up to a power of two)
+    bracket_size : int
+        Number of candidates evaluated per round
+    tolerance : int
+        Width of the final interval
+    rng : np.random.Generator, optional
+        Generator scrambling the shared draws (seeded with SIMULATION_SEED if omitted)
+    competitors : int
+        Number of arms at the control rate the variation has to beat
+
+    Returns:
+    --------
+    tuple
+        Sample size per variation and number of candidate sizes evaluated
+    """
+    if rng is None:
+        rng = create_rng(SIMULATION_SEED)
+    sobol = qmc.Sobol(d=2, scramble=True, seed=rng)
+    uniforms = sobol.random_base2(math.ceil(math.log2(draws))).T
+    normals = norm.ppf([uniforms[0] ** (1 / competitors), uniforms[1]])
+
+    low, high = min_sample, max_sample
+    evaluations = 0
+
+    while high - low > tolerance:
+        candidates = np.unique(np.linspace(low, high, bracket_size).astype(np.int64))
+        sizes = candidates.astype(float)
+
+        control = _posterior_draws(
+            *_posterior_parameters(sizes, p, alpha_prior, beta_prior),
+            normals[0]
+        )
+        treatment = _posterior_draws(
+            *_posterior_parameters(sizes, target_rate, alpha_prior, beta_prior),
+            normals[1]
+        )
+        prob_improvement = np.mean(treatment > control, axis=1)
+        evaluations += len(candidates)
+
+        passing = np.flatnonzero(prob_improvement >= required_prob)
+        if len(passing) == 0:
+            return int(max_sample), evaluations
+        first = passing[0]
+        if first == 0:
+            return int(candidates[0]), evaluations
+        low, high = int(candidates[first - 1]), int(candidates[first])
+
+    return int(high), evaluations
+
+
+# Jeffrey's prior for better small sample behavior
+ALPHA_PRIOR = 0.5
+BETA_PRIOR = 0.5
+
+# Evaluation of the sizing posteriors per engine: with the Jeffreys prior and
+# expected (fractional) conversions their shape parameters are never integers,
+# so the closed-form sum cannot apply and 'exact' integrates them directly
+SIZING_METHODS = {"exact": "quadrature", "normal": "normal"}
+
+# Bounds of the search for the sample size per variation
+MIN_SAMPLE = 100
+MAX_SAMPLE = int(1e6)
+
+
+def required_sample_size(p, improvement_decimal, required_prob, engine="exact", variations=2, rng=None):
+    """
+    Search the minimum sample size per variation.
+
+    With more than two arms, one variation is assumed to carry the improvement
+    and the others to convert like the control; the variation must then be
+    the best of all arms with the required probability.
+
+    Parameters:
+    -----------
+    p : float
+        Baseline conversion rate
+    improvement_decimal : float
+        Expected relative improvement (0.05 for 5%)
+    required_prob : float
+        Required probability that the variation beats the control
+    engine : str
+        'exact' (quadrature, see SIZING_METHODS), 'normal' or 'simulation'
+    variations : int
+        Number of arms (including control)
+    rng : np.random.Generator, optional
+        Random generator of the simulation engine
+
+    Returns:
+    --------
+    tuple
+        Sample size per variation and number of candidate sizes evaluated
+    """
+    if engine not in BAYESIAN_ENGINES:
+        raise ValueError(f"Unknown Bayesian engine: {engine}")
+
+    # Set target improvement based on relative lift
+    target_rate = p * (1 + improvement_decimal)
+
+    # Arms the improved variation has to beat
+    competitors = variations - 1
+
+    # Evaluate A/B test with different sample sizes
+    def evaluate_bayesian_test(sample_size_per_variation):
+        alpha_control, beta_control = _posterior_parameters(
+            sample_size_per_variation, p, ALPHA_PRIOR, BETA_PRIOR
+        )
+        alpha_treatment, beta_treatment = _posterior_parameters(
+            sample_size_per_variation, target_rate, ALPHA_PRIOR, BETA_PRIOR
+        )
+        if competitors == 1:
+            prob_improvement = prob_b_beats_a(
+                alpha_control, beta_control, alpha_treatment, beta_treatment,
+                method=SIZING_METHODS[engine]
+            )
+        else:
+            prob_improvement = prob_best_against_identical(
+                alpha_treatment, beta_treatment, alpha_control, beta_control,
+                competitors, method=SIZING_METHODS[engine]
+            )
+
+        # Check if the probability meets our threshold
+        return prob_improvement >= required_prob
+
+    min_sample = MIN_SAMPLE  # Start with a reasonable minimum
+    max_sample = MAX_SAMPLE  # Cap at a reasonable maximum
+
+    # Edge case: for very small improvements, we need larger samples
+    if improvement_decimal < 0.005:
+        min_sample = 10000
+
+    if engine == "simulation":
+        return search_sample_size_crn(
+            p, target_rate, required_prob, min_sample, max_sample,
+            ALPHA_PRIOR, BETA_PRIOR, rng=rng, competitors=competitors
+        )
+
+    # Binary search to efficiently find the minimum sample size
+    evaluations = 0
+    while max_sample - min_sample > 100:
+        mid_sample = (min_sample + max_sample) // 2
+        evaluations += 1
+        if evaluate_bayesian_test(mid_sample):
+            max_sample = mid_sample
+        else:
+            min_sample = mid_sample
+
+    # Use max_sample for safety (ensures we meet the probability threshold)
+    return max_sample, evaluations
+
+
+def calculate_bayesian(visits, conversions, traffic, variations, improvement, confidence,
+                       engine="exact", precise=False, rng=None):
     """
     Calculate the sample size and test duration using the Bayesian approach.
-    
+
     Parameters:
     -----------
     visits : float
@@ -19,91 +265,85 @@ def calculate_bayesian(visits, conversions, traffic, variations, improvement, co
         Expected improvement in conversion rate (percentage)
     confidence : float
         Statistical confidence level (percentage)
-        
+    engine : str
+        How P(variation > control) is evaluated: 'exact' (quadrature of the
+        Beta posteriors, see SIZING_METHODS), 'normal' (normal approximation)
+        or 'simulation' (Monte Carlo draws from the posteriors)
+    precise : bool
+        Skip the precomputed sample-size table and always run the search
+    rng : np.random.Generator, optional
+        Random generator of the request, used by the simulation engine
+        (seeded with SIMULATION_SEED if omitted)
+
     Returns:
     --------
     dict
-        Dictionary containing days needed and minimum sample size
+        Dictionary containing days needed, minimum sample size, the number of
+        candidate sample sizes evaluated, whether the sample size came from
+        the precomputed table or the live search, and the probability to be
+        best and expected loss of the improved variation
     """
-    # Bayesian calculation using Beta distribution
-    alpha_prior = 0.5  # Jeffrey's prior for better small sample behavior
-    beta_prior = 0.5   # Jeffrey's prior
-    
+    if engine not in BAYESIAN_ENGINES:
+        raise ValueError(f"Unknown Bayesian engine: {engine}")
+
+    if rng is None:
+        rng = create_rng(SIMULATION_SEED)
+
     # Convert to decimals
     p = conversions / visits  # baseline conversion rate
     traffic_decimal = traffic / 100
     improvement_decimal = improvement / 100
-    
-    # Set target improvement based on relative lift
-    target_rate = p * (1 + improvement_decimal)
-    
+
     # Required probability of being better
     required_prob = confidence / 100
-    
-    # Simulate A/B test with different sample sizes
-    def simulate_bayesian_test(sample_size_per_variation):
-        # Scale based on daily metrics to test-specific metrics
-        control_size = sample_size_per_variation
-        treatment_size = sample_size_per_variation
-        
-        # Expected conversions based on current rate
-        control_conversions = control_size * p
-        # Expected conversions with improvement
-        treatment_conversions = treatment_size * target_rate
-        
-        # Generate posterior distributions
-        control_posterior = np.random.beta(
-            alpha_prior + control_conversions,
-            beta_prior + control_size - control_conversions,
-            50000  # Simulations for reasonable accuracy
-        )
-        
-        treatment_posterior = np.random.beta(
-            alpha_prior + treatment_conversions,
-            beta_prior + treatment_size - treatment_conversions,
-            50000  # Simulations for reasonable accuracy
-        )
-        
-        # Calculate probability that treatment is better
-        prob_improvement = np.mean(treatment_posterior > control_posterior)
-        
-        # Check if the probability meets our threshold
-        return prob_improvement >= required_prob
-    
+
     # Handle edge cases
     if p <= 0 or improvement_decimal <= 0 or traffic_decimal <= 0:
         return {
             "days": 9999,
             "minSample": 9999999
         }
-    
-    # Binary search to find minimum sample size
-    min_sample = 100  # Start with a reasonable minimum
-    max_sample = int(1e6)  # Cap at a reasonable maximum
-    
-    # Edge case: for very small improvements, we need larger samples
-    if improvement_decimal < 0.005:
-        min_sample = 10000
-    
-    # Binary search to efficiently find the minimum sample size
-    while max_sample - min_sample > 100:
-        mid_sample = (min_sample + max_sample) // 2
-        if simulate_bayesian_test(mid_sample):
-            max_sample = mid_sample
-        else:
-            min_sample = mid_sample
-    
-    # Use max_sample for safety (ensures we meet the probability threshold)
-    sample_size_per_variation = max_sample
-    
+
+    sample_size_per_variation = None
+    if not precise and variations == 2:
+        from .bayesian_table import lookup_sample_size
+        sample_size_per_variation = lookup_sample_size(p, improvement_decimal, confidence, engine)
+
+    if sample_size_per_variation is not None:
+        evaluations = 0
+        source = "table"
+    else:
+        sample_size_per_variation, evaluations = required_sample_size(
+            p, improvement_decimal, required_prob, engine, variations, rng
+        )
+        source = "search"
+
+    # Probability to be best and expected loss of the improved variation
+    # at the recommended sample size, next to the control and other arms
+    size = float(sample_size_per_variation)
+    alpha_control, beta_control = _posterior_parameters(size, p, ALPHA_PRIOR, BETA_PRIOR)
+    alpha_treatment, beta_treatment = _posterior_parameters(
+        size, p * (1 + improvement_decimal), ALPHA_PRIOR, BETA_PRIOR
+    )
+    alphas = [alpha_treatment] + [alpha_control] * (variations - 1)
+    betas = [beta_treatment] + [beta_control] * (variations - 1)
+    if engine == "simulation":
+        arms = probability_to_be_best_sampling(alphas, betas, rng=rng)
+    else:
+        arms = probability_to_be_best_quadrature(alphas, betas, method=SIZING_METHODS[engine])
+
     # Adjust for number of variations
     total_sample_size = sample_size_per_variation * variations
-    
+
     # Calculate days needed
     daily_test_visitors = visits * traffic_decimal
     days_needed = math.ceil(total_sample_size / daily_test_visitors)
-    
+
     return {
         "days": days_needed,
-        "minSample": total_sample_size
-    } 
\ No newline at end of file
+        "minSample": total_sample_size,
+        "evaluations": evaluations,
+        "source": source,
+        "probabilityToBeBest": arms["probability_to_be_best"][0],
+        "expectedLoss": arms["expected_loss"][0]
+    }
@@ -0,0 +1,145 @@
+"""
+Probability to be best and expected loss for K Beta posteriors.
+
+Two evaluations are provided: one vectorized sampling pass over a
+(K x draws) matrix, and numerical integration on a shared grid. Both cost
+O(K) per point, and the sizing helper collapses the arms that share the
+control rate into a single maximum so that its cost does not grow with K.
+"""
+
+import numpy as np
+from scipy.special import log_ndtr
+from scipy.stats import beta as beta_dist, norm
+
+# Gauss-Legendre nodes used over the bulk of the posteriors
+QUADRATURE_NODES = 400
+
+# Tail probability left outside the integration window
+QUADRATURE_TAIL = 1e-12
+
+_LEGENDRE_NODES, _LEGENDRE_WEIGHTS = np.polynomial.legendre.leggauss(QUADRATURE_NODES)
+
+
+def _integration_grid(alphas, betas):
+    """Gauss-Legendre nodes and weights over the window holding every posterior."""
+    lower = float(np.min(beta_dist.ppf(QUADRATURE_TAIL, alphas, betas)))
+    upper = float(np.max(beta_dist.isf(QUADRATURE_TAIL, alphas, betas)))
+    half_width = 0.5 * (upper - lower)
+    x = half_width * _LEGENDRE_NODES + 0.5 * (upper + lower)
+    return x, half_width * _LEGENDRE_WEIGHTS, lower
+
+
+def _log_density_and_cdf(x, alphas, betas, method):
+    """(K x nodes) log-densities and log-CDFs of the posteriors on the grid."""
+    alphas = alphas[:, np.newaxis]
+    betas = betas[:, np.newaxis]
+    if method == "normal":
+        total = alphas + betas
+        mean = alphas / total
+        std = np.sqrt(alphas * betas / (total ** 2 * (total + 1)))
+        scores = (x - mean) / std
+        return norm.logpdf(scores) - np.log(std), log_ndtr(scores)
+    return beta_dist.logpdf(x, alphas, betas), beta_dist.logcdf(x, alphas, betas)
+
+
+def probability_to_be_best_sampling(alphas, betas, draws=50000, rng=None):
+    """
+    Probability to be best and expected loss from one sampling pass.
+
+    Parameters:
+    -----------
+    alphas, betas : array-like
+        Beta posterior parameters of the K arms
+    draws : int
+        Number of draws per arm
+    rng : np.random.Generator, optional
+        Random generator used for the draws
+
+    Returns:
+    --------
+    dict
+        'probability_to_be_best' and 'expected_loss' lists, one value per arm
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    betas = np.asarray(betas, dtype=float)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    samples = rng.beta(alphas[:, np.newaxis], betas[:, np.newaxis], (len(alphas), draws))
+    winners = np.argmax(samples, axis=0)
+    best = samples[winners, np.arange(draws)]
+
+    return {
+        "probability_to_be_best": (np.bincount(winners, minlength=len(alphas)) / draws).tolist(),
+        "expected_loss": np.mean(best - samples, axis=1).tolist()
+    }
+
+
+def probability_to_be_best_quadrature(alphas, betas, method="exact"):
+    """
+    Probability to be best and expected loss by numerical integration.
+
+    P(k is best) is the integral of f_k(x) times the product of the other
+    CDFs, and E[max] is lower + the integral of (1 - prod F_j(x)), both
+    evaluated on one Gauss-Legendre grid shared by all arms.
+
+    Parameters:
+    -----------
+    alphas, betas : array-like
+        Beta posterior parameters of the K arms
+    method : str
+        'exact' integrates the Beta posteriors, 'normal' their normal
+        approximation
+
+    Returns:
+    --------
+    dict
+        'probability_to_be_best' and 'expected_loss' lists, one value per arm
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    betas = np.asarray(betas, dtype=float)
+    x, weights, lower = _integration_grid(alphas, betas)
+    log_density, log_cdf = _log_density_and_cdf(x, alphas, betas, method)
+
+    log_all_below = log_cdf.sum(axis=0)
+    prob_best = np.exp(log_density + log_all_below - log_cdf) @ weights
+    prob_best = np.clip(prob_best, 0.0, 1.0)
+
+    expected_max = lower + float(weights @ (1.0 - np.exp(log_all_below)))
+    means = alphas / (alphas + betas)
+
+    return {
+        "probability_to_be_best": prob_best.tolist(),
+        "expected_loss": np.maximum(expected_max - means, 0.0).tolist()
+    }
+
+
+def prob_best_against_identical(alpha_b, beta_b, alpha_a, beta_a, competitors, method="exact"):
+    """
+    P(B beats every one of `competitors` arms sharing the posterior of A).
+
+    The competitors are exchangeable, so the product of their CDFs is
+    F_A(x) ** competitors and the cost does not depend on their number.
+
+    Parameters:
+    -----------
+    alpha_b, beta_b : float
+        Posterior parameters of the winning variation
+    alpha_a, beta_a : float
+        Posterior parameters shared by the control and the other variations
+    competitors : int
+        Number of arms B has to beat
+    method : str
+        'exact' or 'normal'
+
+    Returns:
+    --------
+    float
+        Probability that B is the best arm
+    """
+    alphas = np.array([alpha_b, alpha_a], dtype=float)
+    betas = np.array([beta_b, beta_a], dtype=float)
+    x, weights, _ = _integration_grid(alphas, betas)
+    log_density, log_cdf = _log_density_and_cdf(x, alphas, betas, method)
+    value = float(np.exp(log_density[0] + competitors * log_cdf[1]) @ weights)
+    return min(max(value, 0.0), 1.0)
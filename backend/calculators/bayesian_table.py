@@ -0,0 +1,298 @@
+"""
+Precomputed Bayesian sample-size table
+
+Stores the sample size per variation required by the Bayesian search over a
+grid of baseline rate x relative improvement x confidence, so that requests
+inside the grid are answered by interpolation instead of a live search.
+
+The table is built offline and shipped with the code under data/; when it is
+missing, lookups return None and the live search runs. Rebuild it after any
+change to the Bayesian search, and check it against the live engine, with:
+
+    python -m calculators.bayesian_table build
+    python -m calculators.bayesian_table report
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import norm
+
+from .bayesian import MAX_SAMPLE, MIN_SAMPLE, required_sample_size
+
+logger = logging.getLogger("abtest_api.bayesian_table")
+
+DEFAULT_TABLE_PATH = Path(
+    os.environ.get(
+        "BAYESIAN_TABLE_PATH",
+        Path(__file__).resolve().parent.parent / "data" / "bayesian_sample_sizes.npy"
+    )
+)
+
+# Engine used to build the table; requests for other engines run live
+TABLE_ENGINE = "exact"
+
+# Default grid: log-spaced rates and improvements, confidences of the UI
+DEFAULT_BASELINE_RATES = np.geomspace(0.001, 0.5, 32)
+DEFAULT_IMPROVEMENTS = np.geomspace(0.005, 1.0, 32)
+DEFAULT_CONFIDENCES = np.array([80, 85, 90, 92.5, 95, 97.5, 99, 99.5, 99.9])
+
+_table = None
+_table_missing = False
+_table_lock = threading.Lock()
+
+
+def _metadata_path(table_path):
+    return Path(table_path).with_suffix(".json")
+
+
+def _cell_sample_size(args):
+    """Live search for one grid cell; NaN where the search hits its bounds."""
+    p, improvement_decimal, confidence, engine = args
+    if p * (1 + improvement_decimal) >= 1:
+        return float("nan")
+    sample_size, _ = required_sample_size(p, improvement_decimal, confidence / 100, engine)
+    if sample_size >= MAX_SAMPLE or sample_size <= MIN_SAMPLE:
+        return float("nan")
+    return float(sample_size)
+
+
+def build_table(table_path=DEFAULT_TABLE_PATH, baseline_rates=DEFAULT_BASELINE_RATES,
+                improvements=DEFAULT_IMPROVEMENTS, confidences=DEFAULT_CONFIDENCES,
+                engine=TABLE_ENGINE, workers=None):
+    """
+    Run the live search over the whole grid and write the table to disk.
+
+    Parameters:
+    -----------
+    table_path : str or Path
+        Destination of the .npy table; axes are written next to it as .json
+    baseline_rates, improvements, confidences : array-like
+        Grid axes (rates and improvements as decimals, confidence in percent)
+    engine : str
+        Bayesian engine used for every cell
+    workers : int, optional
+        Number of worker processes (defaults to the CPU count)
+
+    Returns:
+    --------
+    np.ndarray
+        Table of sample sizes per variation, NaN where the live search should
+        be used instead
+    """
+    table_path = Path(table_path)
+    axes = [np.asarray(axis, dtype=float) for axis in (baseline_rates, improvements, confidences)]
+    cells = [
+        (p, improvement, confidence, engine)
+        for p in axes[0] for improvement in axes[1] for confidence in axes[2]
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        values = list(executor.map(_cell_sample_size, cells, chunksize=64))
+    table = np.array(values).reshape([len(axis) for axis in axes])
+
+    table_path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(table_path, table)
+    with open(_metadata_path(table_path), "w") as f:
+        json.dump({
+            "engine": engine,
+            "baseline_rates": axes[0].tolist(),
+            "improvements": axes[1].tolist(),
+            "confidences": axes[2].tolist(),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, f, indent=2)
+
+    reset_table()
+    return table
+
+
+class SampleSizeTable:
+    """Memory-mapped sample-size table with trilinear interpolation."""
+
+    def __init__(self, table_path):
+        with open(_metadata_path(table_path)) as f:
+            metadata = json.load(f)
+        self.engine = metadata["engine"]
+        self.values = np.load(table_path, mmap_mode="r")
+        # Interpolate in the coordinates where the sample size is closest to linear
+        self.axes = (
+            np.log(metadata["baseline_rates"]),
+            np.log(metadata["improvements"]),
+            norm.ppf(np.asarray(metadata["confidences"]) / 100),
+        )
+
+    def lookup(self, p, improvement_decimal, confidence):
+        """
+        Interpolated sample size per variation, or None outside the grid.
+
+        Only the eight surrounding cells are read from the memory-mapped table.
+        """
+        point = (math.log(p), math.log(improvement_decimal), norm.ppf(confidence / 100))
+
+        lower = []
+        weights = []
+        for axis, value in zip(self.axes, point):
+            if value < axis[0] or value > axis[-1]:
+                return None
+            index = min(int(np.searchsorted(axis, value, side="right")) - 1, len(axis) - 2)
+            lower.append(index)
+            weights.append((value - axis[index]) / (axis[index + 1] - axis[index]))
+
+        i, j, k = lower
+        corners = np.asarray(self.values[i:i + 2, j:j + 2, k:k + 2], dtype=float)
+        if np.isnan(corners).any():
+            return None
+
+        log_corners = np.log(corners)
+        for weight in weights:
+            log_corners = log_corners[0] * (1 - weight) + log_corners[1] * weight
+        return int(math.ceil(math.exp(float(log_corners))))
+
+
+def get_table(table_path=None):
+    """Load the table lazily; returns None when it has not been built."""
+    global _table, _table_missing
+    if table_path is not None:
+        return SampleSizeTable(table_path)
+    # A missing or unreadable table is remembered, as a loaded one, until reset_table
+    if _table is None and not _table_missing:
+        with _table_lock:
+            if _table is None and not _table_missing:
+                if not DEFAULT_TABLE_PATH.exists():
+                    _table_missing = True
+                    return None
+                try:
+                    _table = SampleSizeTable(DEFAULT_TABLE_PATH)
+                except Exception as e:
+                    logger.error(f"Error loading Bayesian sample-size table: {str(e)}")
+                    _table_missing = True
+    return _table
+
+
+def reset_table():
+    """Forget the loaded (or missing) table so the next lookup reads it from disk again."""
+    global _table, _table_missing
+    with _table_lock:
+        _table = None
+        _table_missing = False
+
+
+def lookup_sample_size(p, improvement_decimal, confidence, engine=TABLE_ENGINE):
+    """
+    Sample size per variation from the precomputed table.
+
+    Parameters:
+    -----------
+    p : float
+        Baseline conversion rate
+    improvement_decimal : float
+        Expected relative improvement (0.05 for 5%)
+    confidence : float
+        Statistical confidence level (percentage)
+    engine : str
+        Requested Bayesian engine
+
+    Returns:
+    --------
+    int or None
+        Interpolated sample size per variation, or None when the table is
+        missing, was built with another engine or does not cover the point
+    """
+    table = get_table()
+    if table is None or table.engine != engine:
+        return None
+    return table.lookup(p, improvement_decimal, confidence)
+
+
+def tolerance_report(samples=200, seed=0, table_path=None):
+    """
+    Compare interpolated sample sizes with the live search at random grid points.
+
+    Parameters:
+    -----------
+    samples : int
+        Number of random points drawn inside the grid
+    seed : int
+        Seed of the random points
+    table_path : str or Path, optional
+        Table to check (defaults to the served table)
+
+    Returns:
+    --------
+    dict
+        Relative error statistics and the worst point
+    """
+    table = get_table(table_path)
+    if table is None:
+        raise ValueError("The Bayesian sample-size table has not been built")
+
+    rng = np.random.default_rng(seed)
+    errors = []
+    worst = None
+    for _ in range(samples):
+        p = math.exp(rng.uniform(table.axes[0][0], table.axes[0][-1]))
+        improvement_decimal = math.exp(rng.uniform(table.axes[1][0], table.axes[1][-1]))
+        confidence = float(norm.cdf(rng.uniform(table.axes[2][0], table.axes[2][-1])) * 100)
+
+        interpolated = table.lookup(p, improvement_decimal, confidence)
+        if interpolated is None:
+            continue
+        live, _ = required_sample_size(p, improvement_decimal, confidence / 100, table.engine)
+        error = abs(interpolated - live) / live
+        errors.append(error)
+        if worst is None or error > worst["relative_error"]:
+            worst = {
+                "baseline_rate": p,
+                "improvement": improvement_decimal,
+                "confidence": confidence,
+                "interpolated": interpolated,
+                "live": int(live),
+                "relative_error": error,
+            }
+
+    errors = np.array(errors)
+    return {
+        "points": len(errors),
+        "outside_grid": samples - len(errors),
+        "median_relative_error": float(np.median(errors)) if len(errors) else None,
+        "p95_relative_error": float(np.percentile(errors, 95)) if len(errors) else None,
+        "max_relative_error": float(errors.max()) if len(errors) else None,
+        "worst": worst,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bayesian sample-size table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Rebuild the table with the live engine")
+    build_parser.add_argument("--output", default=str(DEFAULT_TABLE_PATH))
+    build_parser.add_argument("--workers", type=int, default=None)
+
+    report_parser = subparsers.add_parser("report", help="Compare the table with the live engine")
+    report_parser.add_argument("--table", default=str(DEFAULT_TABLE_PATH))
+    report_parser.add_argument("--samples", type=int, default=200)
+    report_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        start_time = time.time()
+        table = build_table(args.output, workers=args.workers)
+        print(
+            f"Built {table.size} cells ({int(np.isnan(table).sum())} left to the live search) "
+            f"in {time.time() - start_time:.1f}s -> {args.output}"
+        )
+    else:
+        print(json.dumps(tolerance_report(args.samples, args.seed, args.table), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Block bootstrap of sums
+
+Draws bootstrap resamples of an array in blocks instead of one resample at a
+time. Groups with many repeated values (prices, rounded amounts) are resampled
+as multinomial counts of their distinct values, which costs one draw per
+distinct value instead of one per observation; other groups are resampled with
+blocks of index matrices sized to stay in the CPU cache. Resamples are split
+into fixed-size shards, each seeded from the request generator, so results
+only depend on the seed and the number of resamples (and on the memory
+ceiling when a single resample exceeds it), not on the worker count.
+
+The sums are not draw-for-draw equal to those of the per-resample loop this
+replaces: that loop drew from the global np.random state, one choice call per
+resample and group, a stream no block layout can reproduce. They follow the
+same distribution, which test_bootstrap checks on the mean and standard
+deviation at a fixed seed.
+"""
+
+import os
+
+import numpy as np
+
+from .process_pool import map_in_pool
+from .random_streams import create_rng
+
+# Resamples drawn when none are requested
+DEFAULT_RESAMPLES = 10000
+
+# Memory ceiling of the blocks drawn at once, per process
+DEFAULT_MEMORY_BYTES = int(float(os.environ.get("BOOTSTRAP_MEMORY_MB", 64)) * 1024 * 1024)
+
+# Resamples per shard; fixed so that results do not depend on the worker count
+SHARD_RESAMPLES = 500
+
+# Draws per block when the ceiling allows it: larger blocks fall out of the CPU cache
+BLOCK_DRAWS = 1 << 14
+
+# Bytes held per drawn index: the index and the gathered value
+BYTES_PER_DRAW = 16
+
+# Counts are drawn per distinct value when there are this many times fewer of them than values
+MULTINOMIAL_MIN_TIES = 8
+
+# Below this many drawn indices the shards run in-process
+PARALLEL_MIN_DRAWS = 50_000_000
+
+
+def _shard_sums(data, seed, resamples, memory_bytes):
+    """
+    Sums of one shard of bootstrap resamples.
+
+    Parameters:
+    -----------
+    data : tuple
+        Values to resample, and their distinct values and frequencies when
+        they are resampled as multinomial counts (None otherwise)
+    seed : int
+        Seed of the shard
+    resamples : int
+        Number of resamples in the shard
+    memory_bytes : int
+        Memory ceiling of a block
+
+    Returns:
+    --------
+    np.ndarray
+        Sum of each resample
+    """
+    values, distinct = data
+    rng = create_rng(seed)
+    n = len(values)
+    max_draws = max(1, memory_bytes // BYTES_PER_DRAW)
+    sums = np.zeros(resamples)
+
+    if distinct is not None:
+        # Multinomial counts of the distinct values: (rows, k) counts per block
+        unique_values, frequencies = distinct
+        rows = max(1, min(BLOCK_DRAWS, max_draws) // len(unique_values))
+        for start in range(0, resamples, rows):
+            stop = min(start + rows, resamples)
+            sums[start:stop] = rng.multinomial(n, frequencies, size=stop - start) @ unique_values
+    elif n <= max_draws:
+        # Whole resamples per block: a (rows, n) index matrix
+        rows = max(1, min(BLOCK_DRAWS, max_draws) // n)
+        for start in range(0, resamples, rows):
+            stop = min(start + rows, resamples)
+            sums[start:stop] = values[rng.integers(0, n, (stop - start, n))].sum(axis=1)
+    else:
+        # Resamples larger than the ceiling are drawn in column blocks
+        for row in range(resamples):
+            total = 0.0
+            for start in range(0, n, max_draws):
+                total += values[rng.integers(0, n, min(max_draws, n - start))].sum()
+            sums[row] = total
+    return sums
+
+
+def _worker_shard_sums(args):
+    return _shard_sums(*args)
+
+
+def bootstrap_sums(data, resamples=DEFAULT_RESAMPLES, rng=None, memory_bytes=None, workers=None):
+    """
+    Bootstrap distribution of the sum of an array.
+
+    Parameters:
+    -----------
+    data : np.ndarray
+        Values to resample with replacement
+    resamples : int
+        Number of bootstrap resamples
+    rng : np.random.Generator, optional
+        Random generator of the request, used to seed the shards
+    memory_bytes : int, optional
+        Memory ceiling of the blocks drawn at once by each process (defaults
+        to DEFAULT_MEMORY_BYTES)
+    workers : int, optional
+        Worker processes for the shards (defaults to the CPU count; 1 runs
+        everything in-process)
+
+    Returns:
+    --------
+    np.ndarray
+        Sum of each resample, shape (resamples,)
+    """
+    values = np.asarray(data, dtype=float)
+    if len(values) == 0:
+        raise ValueError("Cannot bootstrap an empty group")
+    if resamples < 1:
+        raise ValueError("The number of bootstrap resamples must be positive")
+    if rng is None:
+        rng = create_rng(0)
+    if memory_bytes is None:
+        memory_bytes = DEFAULT_MEMORY_BYTES
+
+    unique_values, counts = np.unique(values, return_counts=True)
+    distinct = None
+    if len(unique_values) * MULTINOMIAL_MIN_TIES <= len(values):
+        distinct = (unique_values, counts / len(values))
+    data = (values, distinct)
+
+    shard_sizes = [min(SHARD_RESAMPLES, resamples - start) for start in range(0, resamples, SHARD_RESAMPLES)]
+    shard_seeds = rng.integers(0, 2**63, len(shard_sizes))
+    shards = [(int(seed), size) for seed, size in zip(shard_seeds, shard_sizes)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(shards) > 1 and resamples * len(values) >= PARALLEL_MIN_DRAWS:
+        tasks = [(data, seed, size, memory_bytes) for seed, size in shards]
+        results = map_in_pool(_worker_shard_sums, tasks, workers)
+    else:
+        results = [_shard_sums(data, seed, size, memory_bytes) for seed, size in shards]
+
+    return np.concatenate(results)
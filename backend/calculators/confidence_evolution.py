@@ -1,275 +1,483 @@
 import numpy as np
 import math
-import hashlib
 from scipy.stats import norm
 
-def calculate_confidence_evolution(visits, conversions, traffic, variations, improvement, confidence, sample_points=20):
+from .random_streams import create_rng, seed_from_parameters
+
+# Scalar results of a curve returned next to its data points
+CURVE_SUMMARY_KEYS = (
+    "targetSampleSize", "targetDay", "target99SampleSize", "target99Day", "totalSampleSize", "totalDays"
+)
+
+def _sample_schedule(min_sample, max_sample, sample_points, daily_test_visitors, days_needed):
     """
-    Calculate the evolution of statistical confidence and confidence interval width
-    with a more realistic model of early test behavior.
-    
+    Sample sizes at which the curve is evaluated, at most one per test day.
+
     Parameters:
     -----------
-    visits : float
-        Daily visits to the website
-    conversions : float
-        Daily conversions
-    traffic : float
-        Percentage of traffic to include in the test
-    variations : int
-        Number of test variations (including control)
-    improvement : float
-        Expected improvement in conversion rate (percentage)
-    confidence : float
-        Statistical confidence level (percentage)
+    min_sample : float
+        Smallest sample size of the curve
+    max_sample : float
+        Largest sample size of the curve
     sample_points : int
-        Number of data points to generate for the chart
-        
+        Number of data points requested
+    daily_test_visitors : float
+        Visitors included in the test per day
+    days_needed : int
+        Days needed to reach the target confidence
+
+    Returns:
+    --------
+    np.ndarray
+        Sorted sample sizes, each falling on a distinct day
+    """
+    # Points plus espacés pour éviter les jours répétés, avec une distribution plus linéaire
+    # Mélange d'échelle logarithmique au début et linéaire vers la fin
+    alpha = 0.7  # Facteur de mélange (0 = purement logarithmique, 1 = purement linéaire)
+
+    # Combiner échelle logarithmique et linéaire pour une meilleure distribution
+    progress = np.arange(sample_points) / (sample_points - 1)
+    log_value = min_sample * np.exp(np.log(max_sample / min_sample) * progress)
+    linear_value = min_sample + (max_sample - min_sample) * progress
+
+    # Mélange progressif: plus logarithmique au début, plus linéaire vers la fin
+    weight = alpha * progress + (1 - alpha) * (1 - progress)
+    sample_sizes = np.ceil((1 - weight) * log_value + weight * linear_value)
+
+    # Éliminer les doublons de jours (on garde la première taille de chaque jour)
+    days = np.ceil(sample_sizes / daily_test_visitors)
+    unique_days, first_index = np.unique(days, return_index=True)
+    sample_sizes_filtered = sample_sizes[first_index[unique_days > 0]]
+
+    # Si nous avons trop peu de points, ajouter des points intermédiaires avec une distribution plus uniforme
+    if len(sample_sizes_filtered) < sample_points * 0.7:  # Si nous avons perdu plus de 30% des points
+        # Générer directement des jours uniformes puis les convertir en tailles d'échantillon
+        uniform_days = np.linspace(1, days_needed, sample_points)
+        sample_sizes = np.unique(np.ceil(uniform_days * daily_test_visitors))
+    else:
+        # Sinon utiliser les échantillons filtrés
+        sample_sizes = np.sort(sample_sizes_filtered)[:sample_points]
+
+    # Un seul point par jour
+    days = np.ceil(sample_sizes / daily_test_visitors)
+    _, first_index = np.unique(days, return_index=True)
+    sample_sizes = sample_sizes[first_index]
+
+    # Si nous avons encore trop peu de points, compléter avec des jours intermédiaires
+    # répartis uniformément parmi les jours non couverts
+    target_points = min(sample_points, days_needed)
+    if len(sample_sizes) < target_points:
+        covered_days = np.ceil(sample_sizes / daily_test_visitors)
+        free_days = np.setdiff1d(np.arange(1, days_needed + 1), covered_days)
+        missing = int(min(target_points - len(sample_sizes), len(free_days)))
+        if missing > 0:
+            picks = np.unique(np.round(np.linspace(0, len(free_days) - 1, missing)).astype(int))
+            sample_sizes = np.sort(np.concatenate([sample_sizes, free_days[picks] * daily_test_visitors]))
+
+    return sample_sizes
+
+def _curve_setup(visits, conversions, traffic, variations, improvement, confidence, sample_points=20):
+    """
+    Scalar parameters and sample-size schedule of one confidence curve.
+
     Returns:
     --------
     dict
-        Dictionary containing arrays of sample sizes, confidence values, and CI widths
+        Baseline rate, target sizes and phase parameters of the noise model,
+        plus the 'sample_sizes' at which the curve is evaluated
     """
     # Convert percentage values to decimals
     p = conversions / visits  # baseline conversion rate
+    if p <= 0:
+        raise ValueError("The baseline conversion rate must be positive")
+    if p >= 1:
+        raise ValueError("The baseline conversion rate must be below 100%")
     traffic_decimal = traffic / 100
     improvement_decimal = improvement / 100
-    
+
     # Calculate z-scores
     alpha = 1 - (confidence / 100)
     z_alpha = norm.ppf(1 - alpha/2)
     z_beta = norm.ppf(0.8)  # power = 80%
-    
+
     # Calculate minimum detectable effect and required sample size
     mde = p * improvement_decimal
     numerator = (z_alpha + z_beta)**2 * 2 * p * (1 - p)
     denominator = mde**2
-    
+
     if denominator == 0:
         sample_size = float('inf')
     else:
         sample_size = math.ceil(numerator / denominator)
-    
+
     total_sample_size = sample_size * variations
-    
+
     # Calculate days needed
     daily_test_visitors = visits * traffic_decimal
     if daily_test_visitors == 0:
         days_needed = float('inf')
     else:
         days_needed = math.ceil(total_sample_size / daily_test_visitors)
-    
+
     # Calculate sample size needed for 99% confidence
     alpha_99 = 1 - (99 / 100)
     z_alpha_99 = norm.ppf(1 - alpha_99/2)
     numerator_99 = (z_alpha_99 + z_beta)**2 * 2 * p * (1 - p)
     sample_size_99 = math.ceil(numerator_99 / denominator)
     total_sample_size_99 = sample_size_99 * variations
-    
-    # Créer une graine pseudo-aléatoire basée sur les paramètres d'entrée
-    seed_str = f"{visits}_{conversions}_{traffic}_{variations}_{improvement}_{confidence}"
-    seed = int(hashlib.md5(seed_str.encode()).hexdigest(), 16) % (2**32)
-    np.random.seed(seed)
-    
+
     # Generate sample sizes from small to 99% confidence size
     max_sample = total_sample_size_99
     min_sample = max(50, math.ceil(max_sample * 0.01))
-    
+
     # Zone d'incertitude réduite, limitée aux tout premiers jours du test
     uncertainty_duration_days = max(2, min(5, days_needed * 0.15))
-    
+
     # Convertir cette durée en jours en progression relative par rapport à la taille d'échantillon totale
     uncertainty_endpoint_sample = min(total_sample_size, uncertainty_duration_days * daily_test_visitors)
     uncertainty_duration = uncertainty_endpoint_sample / total_sample_size
     uncertainty_duration = min(0.15, uncertainty_duration)  # Maximum 15% de la période du test
-    
+
     # Réduire la durée d'incertitude si l'amélioration attendue est élevée
     if improvement_decimal > 0.15:
         uncertainty_duration *= 0.6
-        
-    # Générer des points d'échantillonnage avec une distribution plus uniforme
-    # Pour éviter des écarts trop importants entre les jours à la fin du test
-    sample_points_uniform = min(sample_points, days_needed)
-    
-    # Points plus espacés pour éviter les jours répétés, avec une distribution plus linéaire
-    # Mélange d'échelle logarithmique au début et linéaire vers la fin
-    alpha = 0.7  # Facteur de mélange (0 = purement logarithmique, 1 = purement linéaire)
-    
-    # Assurer une distribution plus uniforme des tailles d'échantillon
-    sample_sizes = []
-    for i in range(1, sample_points + 1):
-        # Combiner échelle logarithmique et linéaire pour une meilleure distribution
-        log_value = min_sample * np.exp(np.log(max_sample / min_sample) * (i - 1) / (sample_points - 1))
-        linear_value = min_sample + (max_sample - min_sample) * (i - 1) / (sample_points - 1)
-        
-        # Mélange progressif: plus logarithmique au début, plus linéaire vers la fin
-        progress = (i - 1) / (sample_points - 1)
-        weight = alpha * progress + (1 - alpha) * (1 - progress)
-        
-        sample = (1 - weight) * log_value + weight * linear_value
-        sample_sizes.append(math.ceil(sample))
-    
-    # Éliminer les doublons de jours
-    days_set = set()
-    sample_sizes_filtered = []
-    
-    for size in sample_sizes:
-        day = math.ceil(size / daily_test_visitors)
-        if day not in days_set and day > 0:
-            days_set.add(day)
-            sample_sizes_filtered.append(size)
-            
-    # Si nous avons trop peu de points, ajouter des points intermédiaires avec une distribution plus uniforme
-    if len(sample_sizes_filtered) < sample_points * 0.7:  # Si nous avons perdu plus de 30% des points
-        # Générer directement des jours uniformes puis les convertir en tailles d'échantillon
-        uniform_days = np.linspace(1, days_needed, sample_points)
-        sample_sizes = [math.ceil(day * daily_test_visitors) for day in uniform_days]
-        sample_sizes = sorted(list(set(sample_sizes)))  # Éliminer les doublons
-    else:
-        # Sinon utiliser les échantillons filtrés
-        sample_sizes = sorted(sample_sizes_filtered)[:sample_points]
-        
-    # Si nous avons encore trop peu de points, compléter avec des points intermédiaires
-    while len(sample_sizes) < min(sample_points, days_needed):
-        # Trouver les plus grands écarts entre jours consécutifs
-        days = [math.ceil(size / daily_test_visitors) for size in sample_sizes]
-        gaps = [(days[i+1] - days[i], i) for i in range(len(days)-1)]
-        gaps.sort(reverse=True)  # Trier par taille d'écart décroissante
-        
-        # Ajouter des points dans les plus grands écarts
-        for gap, index in gaps:
-            if gap <= 1:  # Si l'écart est de 1 jour ou moins, ne pas ajouter de point
-                continue
-            
-            # Calculer un jour intermédiaire
-            mid_day = (days[index] + days[index+1]) // 2
-            mid_size = mid_day * daily_test_visitors
-            
-            if mid_day not in days:
-                sample_sizes.append(mid_size)
-                if len(sample_sizes) >= min(sample_points, days_needed):
-                    break
-        
-        # Si nous n'avons pas ajouté de nouveaux points, sortir de la boucle
-        if len(sample_sizes) == len(days):
-            break
-            
-        # Trier les tailles d'échantillon
-        sample_sizes = sorted(sample_sizes)
-    
+
+    return {
+        "p": p,
+        "variations": variations,
+        "confidence": confidence,
+        "z_alpha": z_alpha,
+        "mde": mde,
+        "daily_test_visitors": daily_test_visitors,
+        "total_sample_size": total_sample_size,
+        "total_sample_size_99": total_sample_size_99,
+        "days_needed": days_needed,
+        # Plus l'amélioration attendue est élevée, plus la confiance initiale est élevée
+        "initial_confidence_factor": 1.2 + (improvement_decimal * 0.5),
+        # Plus le taux de conversion est faible, plus la volatilité est élevée
+        "volatility_factor": max(0.8, 1.2 - p),
+        # Définir les phases basées sur les paramètres d'entrée
+        "phase1_end": uncertainty_duration * 0.4,  # Première phase plus courte
+        "phase2_end": uncertainty_duration,
+        "drop_rate": min(0.8, 0.6 + (0.1 * (variations - 2))),
+        # Récupération plus rapide pour les améliorations importantes
+        "recovery_rate": min(0.7, 0.3 + (0.1 * improvement_decimal * 10)),
+        "sample_sizes": _sample_schedule(min_sample, max_sample, sample_points, daily_test_visitors, days_needed),
+    }
+
+def _evaluate_curves(setups, standard_normals):
+    """
+    Evaluate several confidence curves in one (scenarios x points) pass.
+
+    Parameters:
+    -----------
+    setups : list of dict
+        Curve parameters from _curve_setup
+    standard_normals : list of np.ndarray
+        One standard normal draw per point of each curve (its noise)
+
+    Returns:
+    --------
+    list of dict
+        Arrays and summary values of each curve, as returned by _confidence_curve
+    """
+    lengths = np.array([len(setup["sample_sizes"]) for setup in setups])
+    width = int(lengths.max())
+    columns = np.arange(width)
+    valid = columns < lengths[:, np.newaxis]
+
+    # Courbes de longueurs différentes complétées par des NaN
+    sample_sizes = np.full((len(setups), width), np.nan)
+    noise = np.zeros((len(setups), width))
+    for row, (setup, normals) in enumerate(zip(setups, standard_normals)):
+        sample_sizes[row, :lengths[row]] = setup["sample_sizes"]
+        noise[row, :lengths[row]] = normals
+
+    def column(key):
+        return np.array([float(setup[key]) for setup in setups])[:, np.newaxis]
+
+    p = column("p")
+    variations = column("variations")
+    confidence = column("confidence")
+    z_alpha = column("z_alpha")
+    total_sample_size = column("total_sample_size")
+    phase1_end = column("phase1_end")
+    phase2_end = column("phase2_end")
+    recovery_rate = column("recovery_rate")
+
     # Generate corresponding days
-    days = []
-    for size in sample_sizes:
-        days.append(math.ceil(size / daily_test_visitors))
-    
+    days = np.ceil(sample_sizes / column("daily_test_visitors"))
+
     # Calculate confidence interval width at each sample size
-    ci_widths = []
-    for n in sample_sizes:
-        std_error = math.sqrt(p * (1 - p) / (n / variations))
-        margin_of_error = z_alpha * std_error
-        ci_widths.append(float(margin_of_error))
-    
-    # Paramètres de variabilité basés sur les données utilisateur
-    # Plus l'amélioration attendue est élevée, plus la confiance initiale est élevée
-    initial_confidence_factor = 1.2 + (improvement_decimal * 0.5)
-    
-    # Plus le taux de conversion est faible, plus la volatilité est élevée
-    volatility_factor = max(0.8, 1.2 - p)
-    
-    # Définir les phases basées sur les paramètres d'entrée
-    phase1_end = uncertainty_duration * 0.4  # Première phase plus courte
-    phase2_end = uncertainty_duration
-    
-    # Calculate statistical confidence with early test behavior simulation
-    confidence_values = []
-    for i, n in enumerate(sample_sizes):
-        # Base confidence calculation
-        std_error = math.sqrt(2 * p * (1 - p) / (n / variations))
-        non_centrality = mde / std_error
-        base_power = norm.cdf(non_centrality - z_alpha) + norm.cdf(-non_centrality - z_alpha)
-        base_confidence = float(base_power * 100)
-        
-        # Early test behavior simulation
-        progress = n / total_sample_size
-        
-        if progress < phase1_end:  # First phase
-            # Confiance initiale beaucoup plus élevée pendant la période d'incertitude
-            # Valeurs artificiellement hautes au début du test (effet de petits échantillons)
-            confidence_val = min(98, max(70, base_confidence * 2.0 * initial_confidence_factor))
-            # Volatilité importante en début de test
-            volatility = max(0, 20 * volatility_factor * (1 - progress/phase1_end))
-            noise = float(np.random.normal(0, volatility))
-            confidence_val = max(min(confidence_val + noise, 100), 60)
-            
-        elif progress < phase2_end:  # Second phase
-            # Chute rapide de confiance influencée par les variations
-            drop_rate = 0.6 + (0.1 * (variations - 2))
-            drop_rate = min(0.8, drop_rate)
-            drop_factor = 1 - ((progress - phase1_end) / (phase2_end - phase1_end)) * drop_rate
-            confidence_val = base_confidence * drop_factor
-            # Add decreasing volatility
-            volatility = max(0, 8 * volatility_factor * (1 - (progress-phase1_end)/(phase2_end-phase1_end)))
-            noise = float(np.random.normal(0, volatility))
-            confidence_val = max(min(confidence_val + noise, 95), 30)
-            
-        else:  # Beyond uncertainty phase
-            # Gradual increase towards true confidence level
-            progress_to_final = (progress - phase2_end) / (1 - phase2_end)
-            recovery_rate = 0.3 + (0.1 * improvement_decimal * 10)  # Récupération plus rapide pour les améliorations importantes
-            recovery_rate = min(0.7, recovery_rate)
-            confidence_val = base_confidence * ((1 - recovery_rate) + recovery_rate * progress_to_final)
-            # Add small volatility
-            volatility = max(0, 3 * volatility_factor * (1 - progress_to_final))
-            noise = float(np.random.normal(0, volatility))
-            confidence_val = max(min(confidence_val + noise, 100), base_confidence * (1 - recovery_rate))
-        
-        confidence_values.append(confidence_val)
-    
-    # Smooth the confidence values using a moving average
-    window_size = min(3, len(confidence_values))
-    if window_size > 1:
-        smoothed_confidence = np.convolve(confidence_values, np.ones(window_size)/window_size, mode='valid')
-        padding = np.array([confidence_values[0]] * (window_size - 1))
-        confidence_values = np.concatenate([padding, smoothed_confidence])
-    
+    ci_widths = z_alpha * np.sqrt(p * (1 - p) / (sample_sizes / variations))
+
+    # Base confidence calculation
+    std_error = np.sqrt(2 * p * (1 - p) / (sample_sizes / variations))
+    non_centrality = column("mde") / std_error
+    base_power = norm.cdf(non_centrality - z_alpha) + norm.cdf(-non_centrality - z_alpha)
+    base_confidence = base_power * 100
+
+    # Early test behavior simulation
+    progress = sample_sizes / total_sample_size
+    phase1 = progress < phase1_end
+    phase2 = ~phase1 & (progress < phase2_end)
+    volatility_factor = column("volatility_factor")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # First phase: valeurs artificiellement hautes au début du test (effet de petits échantillons)
+        phase1_value = np.clip(base_confidence * 2.0 * column("initial_confidence_factor"), 70, 98)
+        phase1_volatility = 20 * volatility_factor * (1 - progress / phase1_end)
+
+        # Second phase: chute rapide de confiance influencée par les variations
+        phase2_progress = (progress - phase1_end) / (phase2_end - phase1_end)
+        phase2_value = base_confidence * (1 - phase2_progress * column("drop_rate"))
+        phase2_volatility = 8 * volatility_factor * (1 - phase2_progress)
+
+        # Beyond uncertainty phase: gradual increase towards true confidence level
+        progress_to_final = (progress - phase2_end) / (1 - phase2_end)
+        phase3_value = base_confidence * ((1 - recovery_rate) + recovery_rate * progress_to_final)
+        phase3_volatility = 3 * volatility_factor * (1 - progress_to_final)
+
+    confidence_values = np.select([phase1, phase2], [phase1_value, phase2_value], phase3_value)
+    volatility = np.maximum(0, np.select([phase1, phase2], [phase1_volatility, phase2_volatility], phase3_volatility))
+
+    # One draw per point, in order, as with the sequential model
+    noisy = confidence_values + volatility * noise
+    confidence_values = np.select(
+        [phase1, phase2],
+        [np.clip(noisy, 60, 100), np.clip(noisy, 30, 95)],
+        np.maximum(np.minimum(noisy, 100), base_confidence * (1 - recovery_rate))
+    )
+
+    # Smooth the confidence values using a moving average (window of 3, or of the curve length)
+    smoothed = confidence_values.copy()
+    smoothed[:, 1:] = np.where(
+        lengths[:, np.newaxis] == 2,
+        confidence_values[:, :-1] * 0.5 + confidence_values[:, 1:] * 0.5,
+        confidence_values[:, :1]
+    )
+    if width > 2:
+        # Même ordre d'opérations que np.convolve, pour des valeurs identiques au calcul d'une seule courbe
+        weight = 1 / 3
+        moving_average = confidence_values[:, :-2] * weight + confidence_values[:, 1:-1] * weight + confidence_values[:, 2:] * weight
+        smoothed[:, 2:] = np.where(lengths[:, np.newaxis] >= 3, moving_average, smoothed[:, 2:])
+    confidence_values = np.where(valid, smoothed, np.nan)
+
+    def first_index(mask):
+        mask = mask & valid
+        return np.where(mask.any(axis=1), np.argmax(mask, axis=1), lengths - 1)
+
     # Ensure the confidence reaches exactly the target value at the calculated sample size
-    target_index = next((i for i, n in enumerate(sample_sizes) if n >= total_sample_size), len(sample_sizes) - 1)
-    if target_index > 0 and target_index < len(confidence_values):
-        confidence_values[target_index] = float(confidence)
-    
+    rows = np.arange(len(setups))
+    target_index = first_index(sample_sizes >= total_sample_size)
+    reached = target_index > 0
+    confidence_values[rows[reached], target_index[reached]] = confidence[reached, 0]
+
     # Identify key points
-    target_index = next((i for i, c in enumerate(confidence_values) if c >= confidence), len(confidence_values) - 1)
-    target_99_index = next((i for i, c in enumerate(confidence_values) if c >= 99), len(confidence_values) - 1)
-    
-    # Format data for frontend display - by sample size
-    data_points_by_sample = []
-    for i in range(len(sample_sizes)):
-        is_uncertainty = bool(i < target_index and confidence_values[i] < confidence)
-        data_points_by_sample.append({
-            "sampleSize": int(sample_sizes[i]),
-            "confidence": float(confidence_values[i]),
-            "ciWidth": float(ci_widths[i]),
-            "isUncertainty": is_uncertainty
+    target_index = first_index(confidence_values >= confidence)
+    target_99_index = first_index(confidence_values >= 99)
+
+    is_uncertainty = (columns < target_index[:, np.newaxis]) & (confidence_values < confidence)
+
+    curves = []
+    for row, setup in enumerate(setups):
+        n = lengths[row]
+        target, target_99 = target_index[row], target_99_index[row]
+        curves.append({
+            "sample_sizes": sample_sizes[row, :n],
+            "days": days[row, :n],
+            "confidence": confidence_values[row, :n],
+            "ci_widths": ci_widths[row, :n],
+            "is_uncertainty": is_uncertainty[row, :n],
+            "targetSampleSize": int(sample_sizes[row, target]) if target < n else int(setup["total_sample_size"]),
+            "targetDay": int(days[row, target]) if target < n else int(setup["days_needed"]),
+            "target99SampleSize": int(sample_sizes[row, target_99]) if target_99 < n else int(setup["total_sample_size_99"]),
+            "target99Day": int(days[row, target_99]) if target_99 < n else int(days[row, n - 1]),
+            "totalSampleSize": int(setup["total_sample_size"]),
+            "totalDays": int(setup["days_needed"])
         })
-    
+    return curves
+
+def _confidence_curve(visits, conversions, traffic, variations, improvement, confidence, sample_points=20, rng=None):
+    """
+    Compute the confidence evolution curve as arrays.
+
+    Returns:
+    --------
+    dict
+        Arrays of sample sizes, days, confidence values, CI widths and
+        uncertainty flags, plus the target indices and summary sizes
+    """
+    setup = _curve_setup(visits, conversions, traffic, variations, improvement, confidence, sample_points)
+
+    # Sans générateur fourni, utiliser une graine pseudo-aléatoire basée sur les paramètres d'entrée
+    if rng is None:
+        rng = create_rng(seed_from_parameters(visits, conversions, traffic, variations, improvement, confidence))
+
+    return _evaluate_curves([setup], [rng.standard_normal(len(setup["sample_sizes"]))])[0]
+
+def _format_curve(curve):
+    """Data points by sample size and by day, plus the summary values of a curve"""
+    sample_sizes = curve["sample_sizes"].astype(np.int64).tolist()
+    days = curve["days"].astype(np.int64).tolist()
+    confidence_values = curve["confidence"].tolist()
+    ci_widths = curve["ci_widths"].tolist()
+    is_uncertainty = curve["is_uncertainty"].tolist()
+
+    # Format data for frontend display - by sample size
+    data_points_by_sample = [
+        {
+            "sampleSize": size,
+            "confidence": value,
+            "ciWidth": width,
+            "isUncertainty": uncertain
+        }
+        for size, value, width, uncertain in zip(sample_sizes, confidence_values, ci_widths, is_uncertainty)
+    ]
+
     # Format data for frontend display - by days
-    data_points_by_day = []
-    for i in range(len(days)):
-        is_uncertainty = bool(i < target_index and confidence_values[i] < confidence)
-        data_points_by_day.append({
-            "day": int(days[i]),
-            "confidence": float(confidence_values[i]),
-            "ciWidth": float(ci_widths[i]),
-            "isUncertainty": is_uncertainty
-        })
-    
+    data_points_by_day = [
+        {
+            "day": day,
+            "confidence": value,
+            "ciWidth": width,
+            "isUncertainty": uncertain
+        }
+        for day, value, width, uncertain in zip(days, confidence_values, ci_widths, is_uncertainty)
+    ]
+
     return {
         "dataPointsBySample": data_points_by_sample,
         "dataPointsByDay": data_points_by_day,
-        "targetSampleSize": int(sample_sizes[target_index]) if target_index < len(sample_sizes) else int(total_sample_size),
-        "targetDay": int(days[target_index]) if target_index < len(days) else int(days_needed),
-        "target99SampleSize": int(sample_sizes[target_99_index]) if target_99_index < len(sample_sizes) else int(total_sample_size_99),
-        "target99Day": int(days[target_99_index]) if target_99_index < len(days) else int(days[-1]),
-        "totalSampleSize": int(total_sample_size),
-        "totalDays": int(days_needed)
-    } 
\ No newline at end of file
+        **{key: curve[key] for key in CURVE_SUMMARY_KEYS}
+    }
+
+def calculate_confidence_evolution(visits, conversions, traffic, variations, improvement, confidence, sample_points=20, rng=None):
+    """
+    Calculate the evolution of statistical confidence and confidence interval width
+    with a more realistic model of early test behavior.
+
+    Parameters:
+    -----------
+    visits : float
+        Daily visits to the website
+    conversions : float
+        Daily conversions
+    traffic : float
+        Percentage of traffic to include in the test
+    variations : int
+        Number of test variations (including control)
+    improvement : float
+        Expected improvement in conversion rate (percentage)
+    confidence : float
+        Statistical confidence level (percentage)
+    sample_points : int
+        Number of data points to generate for the chart
+    rng : np.random.Generator, optional
+        Random generator of the request (derived from the input parameters if omitted)
+
+    Returns:
+    --------
+    dict
+        Dictionary containing arrays of sample sizes, confidence values, and CI widths
+    """
+    curve = _confidence_curve(visits, conversions, traffic, variations, improvement, confidence, sample_points, rng)
+    return _format_curve(curve)
+
+def iter_confidence_evolution(visits, conversions, traffic, variations, improvement, confidence, sample_points=20, rng=None):
+    """
+    Yield the confidence evolution as a stream of events instead of one response.
+
+    The first event ('summary') carries the target and total sizes so that a
+    chart can set its axes, then one 'point' event follows per data point
+    (with both its sample size and its day), and an 'end' event closes the
+    stream. Points are formatted one at a time, so the full list of points is
+    never held in memory.
+
+    Parameters:
+    -----------
+    Same as calculate_confidence_evolution
+
+    Yields:
+    -------
+    dict
+        Events with a 'type' key ('summary', 'point' or 'end')
+    """
+    curve = _confidence_curve(visits, conversions, traffic, variations, improvement, confidence, sample_points, rng)
+    points = len(curve["sample_sizes"])
+
+    yield {"type": "summary", "points": points, **{key: curve[key] for key in CURVE_SUMMARY_KEYS}}
+
+    for i in range(points):
+        yield {
+            "type": "point",
+            "index": i,
+            "sampleSize": int(curve["sample_sizes"][i]),
+            "day": int(curve["days"][i]),
+            "confidence": float(curve["confidence"][i]),
+            "ciWidth": float(curve["ci_widths"][i]),
+            "isUncertainty": bool(curve["is_uncertainty"][i])
+        }
+
+    yield {"type": "end", "points": points}
+
+def calculate_confidence_evolution_batch(scenarios):
+    """
+    Calculate the confidence evolution of many scenarios in one vectorized pass.
+
+    Parameters:
+    -----------
+    scenarios : list of dict
+        Scenarios with an 'id', the parameters of calculate_confidence_evolution
+        (visits, conversions, traffic, variations, improvement, confidence,
+        sample_points) and an optional 'rng'
+
+    Returns:
+    --------
+    tuple
+        (results, errors): the curve of each scenario keyed by id, formatted as
+        by calculate_confidence_evolution, and the error message of each
+        scenario that could not be computed
+    """
+    ids = []
+    setups = []
+    standard_normals = []
+    errors = {}
+
+    for scenario in scenarios:
+        params = [scenario[key] for key in ("visits", "conversions", "traffic", "variations", "improvement", "confidence")]
+        try:
+            setup = _curve_setup(*params, scenario.get("sample_points", 20))
+            rng = scenario.get("rng")
+            if rng is None:
+                rng = create_rng(seed_from_parameters(*params))
+            normals = rng.standard_normal(len(setup["sample_sizes"]))
+        except Exception as e:
+            errors[scenario["id"]] = str(e)
+            continue
+        ids.append(scenario["id"])
+        setups.append(setup)
+        standard_normals.append(normals)
+
+    results = {}
+    if not setups:
+        return results, errors
+
+    try:
+        curves = _evaluate_curves(setups, standard_normals)
+    except Exception:
+        # Évaluer les scénarios un par un pour isoler celui qui échoue
+        curves = []
+        for setup, normals in zip(setups, standard_normals):
+            try:
+                curves.append(_evaluate_curves([setup], [normals])[0])
+            except Exception as e:
+                curves.append(e)
+
+    for scenario_id, curve in zip(ids, curves):
+        if isinstance(curve, Exception):
+            errors[scenario_id] = str(curve)
+        else:
+            results[scenario_id] = _format_curve(curve)
+
+    return results, errors
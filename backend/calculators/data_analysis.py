@@ -8,12 +8,46 @@ import numpy as np
 import base64
 import io
 import logging
-from typing import Dict, List, Tuple, Optional, Any
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 import scipy.stats as stats
-from statsmodels.stats.power import TTestIndPower, tt_ind_solve_power
+from statsmodels.stats.multitest import multipletests
+from statsmodels.stats.power import TTestIndPower
+
+from .bootstrap import DEFAULT_RESAMPLES, bootstrap_sums
+from .dataset_cache import CachedDataset, dataset_cache, dataset_key
+from .group_stats import GroupStats, as_group_stats, shape_moments
+from .random_streams import DEFAULT_ANALYSIS_SEED, create_rng
+from .rank_tests import mann_whitney_sorted
+from .segment_stats import SegmentedGroup, conversion_z_tests, revenue_per_user_tests, welch_t_tests
+from .streaming_stats import DEFAULT_CHUNK_SIZE, RunningStats, iter_csv_column_chunks
+from .visualization_preprocessor import DEFAULT_RAW_DATA_POINTS, histogram_from_counts
 
 logger = logging.getLogger("abtest_api.data_analysis")
 
+# Tests available for the total revenue: CLT test on revenue per user, or bootstrap of the sums
+REVENUE_TESTS = ('clt', 'bootstrap')
+
+# Multiple-comparison corrections of the multi-arm analysis, with their statsmodels names
+MULTIPLE_COMPARISON_CORRECTIONS = {
+    'holm': 'holm',
+    'bonferroni': 'bonferroni',
+    'benjamini-hochberg': 'fdr_bh',
+    'none': None
+}
+
+# Metrics computed by every comparison
+METRIC_NAMES = ('conversion', 'aov', 'revenue')
+
+# Smallest group tested with D'Agostino-Pearson; smaller groups use Shapiro-Wilk
+NORMALITY_MIN_SIZE = 8
+
+# Group size at which the normality test is evaluated: with more values, negligible
+# departures from normality become significant
+NORMALITY_MAX_SIZE = 5000
+
 def detect_outliers(data: np.ndarray, method: str = 'iqr', threshold: float = 1.5) -> np.ndarray:
     """
     Detect outliers in a data array
@@ -44,16 +78,17 @@ def detect_outliers(data: np.ndarray, method: str = 'iqr', threshold: float = 1.
     else:
         raise ValueError(f"Unknown outlier detection method: {method}")
 
-def load_data_from_base64(file_content: str, file_type: str) -> pd.DataFrame:
+def load_data(source: Union[bytes, BinaryIO], file_type: str) -> pd.DataFrame:
     """
-    Load data from a base64 encoded file
+    Load data from raw file content
     
     Parameters:
     -----------
-    file_content : str
-        Base64 encoded file content
+    source : bytes or binary file object
+        File content, or an open file (e.g. an upload spooled to disk) read
+        directly by the parser
     file_type : str
-        Type of file ('csv', 'json', 'xlsx')
+        Type of file ('csv', 'json', 'xlsx', 'parquet', 'arrow')
         
     Returns:
     --------
@@ -61,11 +96,8 @@ def load_data_from_base64(file_content: str, file_type: str) -> pd.DataFrame:
         Loaded data
     """
     try:
-        # Decode base64 content
-        decoded_content = base64.b64decode(file_content)
-        
         # Create a file-like object
-        file_obj = io.BytesIO(decoded_content)
+        file_obj = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
         
         # Load based on file type
         if file_type.lower() == 'csv':
@@ -74,12 +106,43 @@ def load_data_from_base64(file_content: str, file_type: str) -> pd.DataFrame:
             return pd.read_json(file_obj)
         elif file_type.lower() in ['xlsx', 'xls']:
             return pd.read_excel(file_obj)
+        elif file_type.lower() in ARROW_FILE_TYPES:
+            pa = _import_pyarrow()
+            source = pa.BufferReader(source) if isinstance(source, (bytes, bytearray)) else source
+            if file_type.lower() == 'parquet':
+                return pa.parquet.read_table(source).to_pandas()
+            return pa.ipc.open_file(source).read_pandas()
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}")
         raise ValueError(f"Error loading data: {str(e)}")
 
+def load_data_from_base64(file_content: str, file_type: str) -> pd.DataFrame:
+    """
+    Load data from a base64 encoded file
+    
+    Parameters:
+    -----------
+    file_content : str
+        Base64 encoded file content
+    file_type : str
+        Type of file ('csv', 'json', 'xlsx')
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Loaded data
+    """
+    try:
+        # Decode base64 content
+        decoded_content = base64.b64decode(file_content)
+    except Exception as e:
+        logger.error(f"Error loading data: {str(e)}")
+        raise ValueError(f"Error loading data: {str(e)}")
+    
+    return load_data(decoded_content, file_type)
+
 def extract_column_data(
     df: pd.DataFrame, 
     column_spec: Dict[str, Any]
@@ -121,33 +184,205 @@ def extract_column_data(
         logger.error(f"Error extracting column data: {str(e)}")
         raise ValueError(f"Error extracting column data: {str(e)}")
 
-def calculate_summary_statistics(data: np.ndarray) -> Dict[str, float]:
+# File types read with pyarrow, column by column
+ARROW_FILE_TYPES = ('parquet', 'arrow')
+
+def _import_pyarrow():
+    """Import pyarrow lazily, as it is only needed for Parquet and Arrow files"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet and Arrow files require the pyarrow package")
+    return pyarrow
+
+def _decode_source(file_content: Union[str, bytes, BinaryIO]) -> Union[bytes, BinaryIO]:
+    """Raw content of a base64 string; bytes and open files are returned as is"""
+    if isinstance(file_content, str):
+        try:
+            return base64.b64decode(file_content)
+        except Exception as e:
+            logger.error(f"Error loading data: {str(e)}")
+            raise ValueError(f"Error loading data: {str(e)}")
+    return file_content
+
+def resolve_column_name(columns: List[str], column_spec: Dict[str, Any]) -> str:
+    """
+    Name of the column matching a specification, following extract_column_data
+    
+    Parameters:
+    -----------
+    columns : List[str]
+        Column names of the file, in order
+    column_spec : Dict[str, Any]
+        Column specification (name and/or index)
+        
+    Returns:
+    --------
+    str
+        Name of the column to read
+    """
+    columns = list(columns)
+    if 'index' in column_spec and column_spec['index'] is not None:
+        col_idx = column_spec['index']
+        if col_idx >= len(columns):
+            raise ValueError(f"Error extracting column data: Column index {col_idx} is out of range")
+        return columns[col_idx]
+    
+    col_name = column_spec['name']
+    if col_name in columns:
+        return col_name
+    # Try to find by index if numeric or position
+    try:
+        return columns[int(col_name)]
+    except (ValueError, IndexError):
+        raise ValueError(f"Error extracting column data: Column '{col_name}' not found in data")
+
+def _open_arrow_batches(source: Union[bytes, BinaryIO], file_type: str, column_specs: List[Dict[str, Any]], batch_size: Optional[int] = None):
+    """
+    Record batches of a Parquet or Arrow IPC file, restricted to the requested columns
+    
+    Returns:
+    --------
+    Tuple[List[str], Iterator]
+        Resolved column names (one per specification) and an iterator of
+        record batches holding only those columns (Parquet row groups are
+        read one at a time)
+    """
+    pa = _import_pyarrow()
+    # Lire les octets sans copie
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    
+    if file_type == 'parquet':
+        parquet_file = pa.parquet.ParquetFile(source)
+        names = [resolve_column_name(parquet_file.schema_arrow.names, spec) for spec in column_specs]
+        kwargs = {"batch_size": batch_size} if batch_size else {}
+        return names, parquet_file.iter_batches(columns=list(dict.fromkeys(names)), **kwargs)
+    
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        # Arrow IPC stream format instead of the file format
+        source.seek(0)
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+    names = [resolve_column_name(reader.schema.names, spec) for spec in column_specs]
+    
+    def project(batch_iter):
+        for batch in batch_iter:
+            batch = batch.select(list(dict.fromkeys(names)))
+            if batch_size and batch.num_rows > batch_size:
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield batch.slice(offset, batch_size)
+            else:
+                yield batch
+    
+    return names, project(batches)
+
+def _arrow_to_numpy(array) -> np.ndarray:
+    """Float values of an Arrow array (zero-copy for float64 columns without nulls)"""
+    return np.asarray(array.to_numpy(zero_copy_only=False), dtype=float)
+
+def load_columns(
+    source: Union[bytes, BinaryIO],
+    file_type: str,
+    column_specs: List[Dict[str, Any]],
+    label_columns: Tuple[int, ...] = ()
+) -> List[np.ndarray]:
+    """
+    Load only the requested columns of a file
+    
+    Parquet and Arrow files read just these columns (column projection); CSV
+    files parse only these columns; other types are loaded fully.
+    
+    Parameters:
+    -----------
+    source : bytes or binary file object
+        Raw file content or open file
+    file_type : str
+        Type of file ('csv', 'json', 'xlsx', 'parquet', 'arrow')
+    column_specs : List[Dict[str, Any]]
+        Column specifications (name and/or index)
+    label_columns : Tuple[int, ...]
+        Positions in column_specs of the columns holding labels (e.g. segments):
+        their values are kept as read (strings for CSV files) instead of
+        being converted to numbers
+        
+    Returns:
+    --------
+    List[np.ndarray]
+        Values of each requested column
+    """
+    file_type = file_type.lower()
+    try:
+        if file_type in ARROW_FILE_TYPES:
+            pa = _import_pyarrow()
+            names, batches = _open_arrow_batches(source, file_type, column_specs)
+            table = pa.Table.from_batches(list(batches))
+            return [
+                table.column(name).to_numpy() if position in label_columns else _arrow_to_numpy(table.column(name))
+                for position, name in enumerate(names)
+            ]
+        
+        if file_type == 'csv':
+            file_obj = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+            start = file_obj.tell()
+            header = pd.read_csv(file_obj, nrows=0).columns
+            names = [resolve_column_name(header, spec) for spec in column_specs]
+            file_obj.seek(start)
+            df = pd.read_csv(
+                file_obj, usecols=list(dict.fromkeys(names)),
+                dtype={names[position]: str for position in label_columns}
+            )
+            return [df[name].values for name in names]
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading data: {str(e)}")
+        raise ValueError(f"Error loading data: {str(e)}")
+    
+    df = load_data(source, file_type)
+    return [extract_column_data(df, spec) for spec in column_specs]
+
+def _iter_column_chunks(
+    source: Union[bytes, BinaryIO],
+    file_type: str,
+    column_specs: List[Dict[str, Any]],
+    chunk_size: int
+):
+    """Values of the requested columns, chunk by chunk, without missing values"""
+    if file_type in ARROW_FILE_TYPES:
+        names, batches = _open_arrow_batches(source, file_type, column_specs, chunk_size)
+        for batch in batches:
+            values = [_arrow_to_numpy(batch.column(name)) for name in names]
+            yield [column[~np.isnan(column)] for column in values]
+    else:
+        file_obj = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        extractors = [lambda chunk, spec=spec: extract_column_data(chunk, spec) for spec in column_specs]
+        yield from iter_csv_column_chunks(file_obj, extractors, chunk_size)
+
+def calculate_summary_statistics(data: Union[np.ndarray, GroupStats]) -> Dict[str, float]:
     """
     Calculate summary statistics for a dataset
     
     Parameters:
     -----------
-    data : np.ndarray
-        Array of data values
+    data : np.ndarray or GroupStats
+        Array of data values, or its already sorted statistics
         
     Returns:
     --------
     Dict[str, float]
         Dictionary of summary statistics
     """
-    return {
-        "count": len(data),
-        "mean": float(np.mean(data)),
-        "median": float(np.median(data)),
-        "std_dev": float(np.std(data, ddof=1)),
-        "min_value": float(np.min(data)),
-        "max_value": float(np.max(data)),
-        "outliers_count": int(np.sum(detect_outliers(data)))
-    }
+    return as_group_stats(data).summary()
 
 def analyze_data(
-    control_data: np.ndarray,
-    variation_data: np.ndarray,
+    control_data: Union[np.ndarray, GroupStats],
+    variation_data: Union[np.ndarray, GroupStats],
     exclude_outliers: bool = False
 ) -> Tuple[Dict[str, Dict[str, float]], str, bool]:
     """
@@ -155,9 +390,9 @@ def analyze_data(
     
     Parameters:
     -----------
-    control_data : np.ndarray
+    control_data : np.ndarray or GroupStats
         Data for control group
-    variation_data : np.ndarray
+    variation_data : np.ndarray or GroupStats
         Data for variation group
     exclude_outliers : bool
         Whether to exclude outliers from the analysis
@@ -167,9 +402,37 @@ def analyze_data(
     Tuple[Dict[str, Dict[str, float]], str, bool]
         Dictionary of summary statistics, message for user, and whether outliers were detected
     """
+    summary, message, has_outliers, _, _ = summarize_groups(
+        as_group_stats(control_data), as_group_stats(variation_data), exclude_outliers
+    )
+    return summary, message, has_outliers
+
+def summarize_groups(
+    control: GroupStats,
+    variation: GroupStats,
+    exclude_outliers: bool = False
+) -> Tuple[Dict[str, Dict[str, float]], str, bool, GroupStats, GroupStats]:
+    """
+    Summary statistics of both groups, as analyze_data, plus the groups kept for the analysis
+    
+    Parameters:
+    -----------
+    control : GroupStats
+        Sorted statistics of the control group
+    variation : GroupStats
+        Sorted statistics of the variation group
+    exclude_outliers : bool
+        Whether to exclude outliers from the analysis
+        
+    Returns:
+    --------
+    Tuple[Dict[str, Dict[str, float]], str, bool, GroupStats, GroupStats]
+        Summary statistics, message for user, whether outliers were detected,
+        and the control and variation groups (without outliers when excluded)
+    """
     # Calculate initial summary statistics
-    control_stats = calculate_summary_statistics(control_data)
-    variation_stats = calculate_summary_statistics(variation_data)
+    control_stats = control.summary()
+    variation_stats = variation.summary()
     
     # Check for outliers
     has_outliers = control_stats["outliers_count"] > 0 or variation_stats["outliers_count"] > 0
@@ -177,25 +440,22 @@ def analyze_data(
     
     # Generate basic message
     message = (
-        f"Analysis summary: Found {len(control_data)} control transactions and "
-        f"{len(variation_data)} variation transactions. "
+        f"Analysis summary: Found {control.count} control transactions and "
+        f"{variation.count} variation transactions. "
     )
     
-    # If excluding outliers, filter them out
+    # If excluding outliers, filter them out (the sorted values are sliced, not sorted again)
     if exclude_outliers and has_outliers:
-        control_mask = ~detect_outliers(control_data)
-        variation_mask = ~detect_outliers(variation_data)
-        
-        filtered_control = control_data[control_mask]
-        filtered_variation = variation_data[variation_mask]
+        control = control.without_outliers()
+        variation = variation.without_outliers()
         
         # Recalculate summary statistics
-        control_stats = calculate_summary_statistics(filtered_control)
-        variation_stats = calculate_summary_statistics(filtered_variation)
+        control_stats = control.summary()
+        variation_stats = variation.summary()
         
         message += (
             f"Excluded {total_outliers} outliers from analysis. "
-            f"Now using {len(filtered_control)} control and {len(filtered_variation)} variation data points."
+            f"Now using {control.count} control and {variation.count} variation data points."
         )
     elif has_outliers:
         message += (
@@ -206,57 +466,140 @@ def analyze_data(
         message += "No outliers detected in the data."
     
     # Return the results
-    return {"control": control_stats, "variation": variation_stats}, message, has_outliers
+    return {"control": control_stats, "variation": variation_stats}, message, has_outliers, control, variation
 
-def is_normally_distributed(data: np.ndarray, alpha: float = 0.05) -> bool:
+def dagostino_pearson_test(skewness: float, kurtosis: float, n: int) -> Tuple[float, float]:
     """
-    Test if data is normally distributed using Shapiro-Wilk test
+    D'Agostino-Pearson K² normality test from the sample moments, as scipy.stats.normaltest
     
     Parameters:
     -----------
-    data : np.ndarray
+    skewness : float
+        Sample skewness (biased estimate)
+    kurtosis : float
+        Sample kurtosis (biased estimate, 3 for a normal distribution)
+    n : int
+        Sample size used for the test (at least 8)
+        
+    Returns:
+    --------
+    Tuple[float, float]
+        K² statistic and p-value
+    """
+    # Skewness test: transformation of the skewness to a standard normal
+    y = skewness * np.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+    beta2 = 3.0 * (n**2 + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    alpha = np.sqrt(2.0 / (w2 - 1))
+    y = 1 if y == 0 else y
+    z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha)**2 + 1))
+    
+    # Kurtosis test: Anscombe-Glynn transformation of the kurtosis to a standard normal
+    expected = 3.0 * (n - 1) / (n + 1)
+    variance = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (kurtosis - expected) / np.sqrt(variance)
+    sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt((6.0 * (n + 3) * (n + 5)) / (n * (n - 2) * (n - 3)))
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1**2))
+    denominator = 1 + x * np.sqrt(2 / (a - 4.0))
+    if denominator == 0:
+        return float('nan'), float('nan')
+    term = np.sign(denominator) * ((1 - 2.0 / a) / abs(denominator))**(1 / 3.0)
+    z_kurtosis = (1 - 2 / (9.0 * a) - term) / np.sqrt(2 / (9.0 * a))
+    
+    statistic = z_skew**2 + z_kurtosis**2
+    return float(statistic), float(stats.chi2.sf(statistic, 2))
+
+def assess_normality(data: Union[np.ndarray, GroupStats], alpha: float = 0.05) -> Dict[str, Any]:
+    """
+    Test if data is normally distributed, from its skewness and kurtosis
+    
+    The D'Agostino-Pearson test only needs the moments of the data (kept by a
+    GroupStats), so no subsample is drawn. With many values the test becomes
+    too sensitive, so the moments of the whole group are tested as if they
+    came from NORMALITY_MAX_SIZE values. Groups too small for the test use
+    Shapiro-Wilk on all their values.
+    
+    Parameters:
+    -----------
+    data : np.ndarray or GroupStats
         Data to test
     alpha : float
         Significance level
         
     Returns:
     --------
-    bool
-        True if data is normally distributed
+    Dict[str, Any]
+        Test used, statistic, p-value, skewness, excess kurtosis and the
+        decision ('normal')
     """
-    if len(data) < 3:
+    values = data.values if isinstance(data, GroupStats) else np.asarray(data, dtype=float)
+    n = len(values)
+    result = {"test_name": None, "statistic": None, "p_value": None, "skewness": None, "kurtosis": None, "normal": False}
+    if n < 3:
         # Not enough data for the test, assume non-normal
-        return False
+        return result
     
-    # If we have too many samples, test can become too sensitive
-    # So we'll use a random subset of 5000 samples max
-    if len(data) > 5000:
-        np.random.seed(42)  # For reproducibility
-        data = np.random.choice(data, size=5000, replace=False)
+    if isinstance(data, GroupStats):
+        skewness, kurtosis = data.shape_moments()
+    else:
+        skewness, kurtosis = shape_moments(values)
+    if not np.isnan(skewness):
+        result.update(skewness=skewness, kurtosis=kurtosis - 3)
     
-    # Run Shapiro-Wilk test
-    stat, p_value = stats.shapiro(data)
+    if n < NORMALITY_MIN_SIZE:
+        statistic, p_value = stats.shapiro(values)
+        result["test_name"] = "shapiro"
+    elif np.isnan(skewness):
+        # Constant values: the moments are undefined, assume non-normal
+        return result
+    else:
+        statistic, p_value = dagostino_pearson_test(skewness, kurtosis, min(n, NORMALITY_MAX_SIZE))
+        result["test_name"] = "dagostino-pearson"
     
     # If p-value > alpha, we fail to reject the null hypothesis
     # that the data is normally distributed
-    return p_value > alpha
+    result.update(statistic=float(statistic), p_value=float(p_value), normal=bool(p_value > alpha))
+    return result
+
+def is_normally_distributed(data: Union[np.ndarray, GroupStats], alpha: float = 0.05) -> bool:
+    """
+    Test if data is normally distributed (see assess_normality)
+    
+    Parameters:
+    -----------
+    data : np.ndarray or GroupStats
+        Data to test
+    alpha : float
+        Significance level
+        
+    Returns:
+    --------
+    bool
+        True if data is normally distributed
+    """
+    return assess_normality(data, alpha)["normal"]
 
 def select_statistical_test(
-    control_data: np.ndarray,
-    variation_data: np.ndarray,
-    metric_type: str
+    control_data: Union[np.ndarray, GroupStats],
+    variation_data: Union[np.ndarray, GroupStats],
+    metric_type: str,
+    normality: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> str:
     """
     Select appropriate statistical test based on data characteristics
     
     Parameters:
     -----------
-    control_data : np.ndarray
+    control_data : np.ndarray or GroupStats
         Data for control group
-    variation_data : np.ndarray
+    variation_data : np.ndarray or GroupStats
         Data for variation group
     metric_type : str
         Type of metric ('conversion', 'revenue', 'aov')
+    normality : Dict[str, Dict[str, Any]], optional
+        Normality assessments of the 'control' and 'variation' groups already
+        computed (see assess_normality)
         
     Returns:
     --------
@@ -268,10 +611,10 @@ def select_statistical_test(
         return 'z-test'
     
     # For revenue and AOV, check normality
-    control_normal = is_normally_distributed(control_data)
-    variation_normal = is_normally_distributed(variation_data)
+    if normality is None:
+        normality = {"control": assess_normality(control_data), "variation": assess_normality(variation_data)}
     
-    if control_normal and variation_normal:
+    if normality["control"]["normal"] and normality["variation"]["normal"]:
         # If both datasets are normal, use t-test
         return 't-test'
     else:
@@ -279,8 +622,8 @@ def select_statistical_test(
         return 'mann-whitney'
 
 def run_statistical_test(
-    control_data: np.ndarray,
-    variation_data: np.ndarray,
+    control_data: Union[np.ndarray, GroupStats],
+    variation_data: Union[np.ndarray, GroupStats],
     test_name: str,
     alpha: float = 0.05
 ) -> Dict[str, Any]:
@@ -289,9 +632,10 @@ def run_statistical_test(
     
     Parameters:
     -----------
-    control_data : np.ndarray
-        Data for control group
-    variation_data : np.ndarray
+    control_data : np.ndarray or GroupStats
+        Data for control group (a GroupStats lets the Mann-Whitney test reuse
+        its sorted values)
+    variation_data : np.ndarray or GroupStats
         Data for variation group
     test_name : str
         Name of the test to run
@@ -303,38 +647,18 @@ def run_statistical_test(
     Dict[str, Any]
         Dictionary of test results
     """
+    extra = {}
+    if test_name != 'mann-whitney':
+        control_data = control_data.values if isinstance(control_data, GroupStats) else control_data
+        variation_data = variation_data.values if isinstance(variation_data, GroupStats) else variation_data
+    
     if test_name == 'z-test':
-        # For proportions (conversion rates)
-        n1 = len(control_data)
-        n2 = len(variation_data)
-        p1 = np.mean(control_data)
-        p2 = np.mean(variation_data)
-        
-        # Pooled proportion
-        p_pooled = (p1 * n1 + p2 * n2) / (n1 + n2)
-        
-        # Standard error
-        se = np.sqrt(p_pooled * (1 - p_pooled) * (1/n1 + 1/n2))
-        
-        # Z statistic
-        if se == 0:  # Handle division by zero
-            z_stat = 0
-            p_value = 1.0
-        else:
-            z_stat = (p2 - p1) / se
-            p_value = 2 * (1 - stats.norm.cdf(abs(z_stat)))
-        
-        # Calculate power
-        effect_size = (p2 - p1) / np.sqrt(p_pooled * (1 - p_pooled))
-        power = TTestIndPower().power(
-            effect_size=effect_size,
-            nobs1=n1,
-            ratio=n2/n1,
-            alpha=alpha,
-            alternative='two-sided'
+        # For proportions (conversion rates): 0/1 values, tested from their counts
+        return conversion_z_test(
+            int(np.sum(control_data)), len(control_data), int(np.sum(variation_data)), len(variation_data), alpha
         )
     
-    elif test_name == 't-test':
+    if test_name == 't-test':
         # For normally distributed data
         t_stat, p_value = stats.ttest_ind(
             control_data, 
@@ -363,17 +687,13 @@ def run_statistical_test(
         )
     
     elif test_name == 'mann-whitney':
-        # For non-normally distributed data
-        u_stat, p_value = stats.mannwhitneyu(
-            control_data, 
-            variation_data,
-            alternative='two-sided'
+        # For non-normally distributed data: U statistic, rank-biserial correlation and
+        # Hodges-Lehmann shift from the sorted groups, without ranking the pooled values
+        rank_test = mann_whitney_sorted(
+            as_group_stats(control_data).sorted, as_group_stats(variation_data).sorted
         )
-        
-        # Mann-Whitney doesn't have a standard effect size measure
-        # We'll calculate an approximate effect size using rank-biserial correlation
-        n1, n2 = len(control_data), len(variation_data)
-        effect_size = 1 - (2 * u_stat) / (n1 * n2)
+        p_value = rank_test["p_value"]
+        extra = {"effect_size": rank_test["effect_size"], "shift_estimate": rank_test["shift_estimate"]}
         
         # Power calculation is complex for Mann-Whitney
         # We'll approximate using a transformation to normal distribution
@@ -389,115 +709,247 @@ def run_statistical_test(
         "p_value": float(p_value),
         "confidence": float((1 - p_value) * 100),
         "significant": p_value < alpha,
-        "power": float(power)
+        "power": float(power),
+        **extra
     }
 
-def calculate_metrics(
-    control_data: np.ndarray,
-    variation_data: np.ndarray,
-    metric_type: str,
-    users_control: int,
-    users_variation: int
+def run_statistical_test_from_stats(
+    control: Dict[str, float],
+    variation: Dict[str, float],
+    test_name: str,
+    alpha: float = 0.05
 ) -> Dict[str, Any]:
     """
-    Calculate key metrics and run statistical tests
+    Run a statistical test from summary statistics instead of raw values
+    
+    Gives the same results as run_statistical_test for the z-test and the
+    t-test, for data that is only available as counts, means and standard
+    deviations (e.g. read in chunks). The 'clt' test is the large-sample
+    normal test of a difference of means (Welch statistic, normal p-value),
+    used for revenue per user.
     
     Parameters:
     -----------
-    control_data : np.ndarray
-        Data for control group
-    variation_data : np.ndarray
-        Data for variation group
-    metric_type : str
-        Type of metric ('conversion', 'revenue', 'aov')
-    users_control : int
-        Number of users in control group
-    users_variation : int
-        Number of users in variation group
+    control : Dict[str, float]
+        'count', 'mean' and 'std_dev' (ddof=1) of the control group; for the
+        z-test, 'count' is the number of users and 'mean' the conversion rate
+    variation : Dict[str, float]
+        Same statistics for the variation group
+    test_name : str
+        Name of the test to run ('z-test', 't-test' or 'clt')
+    alpha : float
+        Significance level
         
     Returns:
     --------
     Dict[str, Any]
-        Dictionary of calculated metrics and test results
+        Dictionary of test results
     """
-    if metric_type == 'conversion':
-        # For conversion rate
-        control_value = len(control_data) / users_control
-        variation_value = len(variation_data) / users_variation
-        
-        # Create binary arrays (1 for conversion, 0 for non-conversion)
-        control_binary = np.ones(len(control_data))
-        control_binary = np.append(control_binary, np.zeros(users_control - len(control_data)))
-        
-        variation_binary = np.ones(len(variation_data))
-        variation_binary = np.append(variation_binary, np.zeros(users_variation - len(variation_data)))
-        
-        # Select and run statistical test
-        test_name = 'z-test'  # Always use z-test for conversion rates
-        test_result = run_statistical_test(control_binary, variation_binary, test_name)
-        
-    elif metric_type == 'aov':
-        # For average order value
-        control_value = np.mean(control_data)
-        variation_value = np.mean(variation_data)
-        
-        # Select and run statistical test
-        test_name = select_statistical_test(control_data, variation_data, metric_type)
-        test_result = run_statistical_test(control_data, variation_data, test_name)
-        
-    elif metric_type == 'revenue':
-        # For total revenue
-        control_value = np.sum(control_data)
-        variation_value = np.sum(variation_data)
-        
-        # For total revenue, we need to bootstrap to create sampling distribution
-        # because we can't directly apply a statistical test to single sums
+    n1, n2 = control["count"], variation["count"]
+    mean1, mean2 = control["mean"], variation["mean"]
+    
+    if test_name == 'z-test':
+        # Conversions out of users, from the conversion rates
+        return conversion_z_test(round(mean1 * n1), n1, round(mean2 * n2), n2, alpha)
+    
+    if test_name == 't-test':
+        std1, std2 = control["std_dev"], variation["std_dev"]
+        t_stat, p_value = stats.ttest_ind_from_stats(
+            mean1, std1, n1,
+            mean2, std2, n2,
+            equal_var=False  # Welch's t-test (doesn't assume equal variances)
+        )
         
-        # Create bootstrapped samples of total revenue
-        n_bootstrap = 10000
-        np.random.seed(42)  # For reproducibility
+        # Cohen's d with the pooled standard deviation
+        s_pooled = np.sqrt(((n1 - 1) * std1**2 + (n2 - 1) * std2**2) / (n1 + n2 - 2))
+        effect_size = abs(mean2 - mean1) / s_pooled
+    
+    elif test_name == 'clt':
+        std1, std2 = control["std_dev"], variation["std_dev"]
         
-        control_bootstrap = np.zeros(n_bootstrap)
-        variation_bootstrap = np.zeros(n_bootstrap)
+        # Standard error of the difference of means
+        se = np.sqrt(std1**2 / n1 + std2**2 / n2)
         
-        for i in range(n_bootstrap):
-            # Sample with replacement
-            control_sample = np.random.choice(control_data, size=len(control_data), replace=True)
-            variation_sample = np.random.choice(variation_data, size=len(variation_data), replace=True)
-            
-            # Calculate total revenue for each bootstrap sample
-            control_bootstrap[i] = np.sum(control_sample)
-            variation_bootstrap[i] = np.sum(variation_sample)
+        if se == 0:  # Handle division by zero
+            p_value = 1.0
+        else:
+            z_stat = (mean2 - mean1) / se
+            p_value = 2 * stats.norm.sf(abs(z_stat))
         
-        # Run test on bootstrapped distributions
-        test_name = select_statistical_test(control_bootstrap, variation_bootstrap, 'aov')
-        test_result = run_statistical_test(control_bootstrap, variation_bootstrap, test_name)
+        # Cohen's d with the pooled standard deviation
+        s_pooled = np.sqrt(((n1 - 1) * std1**2 + (n2 - 1) * std2**2) / (n1 + n2 - 2))
+        effect_size = abs(mean2 - mean1) / s_pooled if s_pooled > 0 else 0.0
     
     else:
-        raise ValueError(f"Unknown metric type: {metric_type}")
+        raise ValueError(f"Test {test_name} needs the raw values")
     
-    # Calculate uplift
-    if control_value == 0:
-        uplift = float('inf') if variation_value > 0 else 0
-    else:
-        uplift = ((variation_value - control_value) / control_value) * 100
+    power = TTestIndPower().power(
+        effect_size=effect_size,
+        nobs1=n1,
+        ratio=n2/n1,
+        alpha=alpha,
+        alternative='two-sided'
+    )
     
-    # Generate interpretation
-    if test_result["significant"]:
-        if uplift > 0:
-            interpretation = (
-                f"The {metric_type} for the variation is {uplift:.2f}% higher than the control, "
-                f"which is statistically significant (confidence: {test_result['confidence']:.2f}%). "
-            )
-        else:
-            interpretation = (
-                f"The {metric_type} for the variation is {abs(uplift):.2f}% lower than the control, "
-                f"which is statistically significant (confidence: {test_result['confidence']:.2f}%). "
-            )
+    return {
+        "test_name": test_name,
+        "p_value": float(p_value),
+        "confidence": float((1 - p_value) * 100),
+        "significant": p_value < alpha,
+        "power": float(power)
+    }
+
+def conversion_z_test(
+    conversions_control: int,
+    users_control: int,
+    conversions_variation: int,
+    users_variation: int,
+    alpha: float = 0.05
+) -> Dict[str, Any]:
+    """
+    Two-proportion z-test computed from conversion counts
+    
+    Needs no per-user arrays: the pooled z statistic, the Wald confidence
+    interval of the difference of rates and the power (normal approximation
+    at the observed difference) only use the counts.
+    
+    Parameters:
+    -----------
+    conversions_control, conversions_variation : int
+        Number of converted users in each group
+    users_control, users_variation : int
+        Number of users in each group
+    alpha : float
+        Significance level
         
-        if test_result["power"] < 0.8:
-            interpretation += (
-                f"However, the statistical power is only {test_result['power']:.2f}, "
+    Returns:
+    --------
+    Dict[str, Any]
+        Dictionary of test results, with the confidence interval of the
+        difference of conversion rates (variation - control)
+    """
+    if users_control <= 0 or users_variation <= 0:
+        raise ValueError("User counts must be positive integers")
+    if not (0 <= conversions_control <= users_control and 0 <= conversions_variation <= users_variation):
+        raise ValueError("Conversions must be between zero and the number of users of their group")
+    
+    n1, n2 = users_control, users_variation
+    p1, p2 = conversions_control / n1, conversions_variation / n2
+    z_crit = stats.norm.ppf(1 - alpha / 2)
+    
+    # Pooled proportion and standard error under the null hypothesis
+    p_pooled = (conversions_control + conversions_variation) / (n1 + n2)
+    se = np.sqrt(p_pooled * (1 - p_pooled) * (1/n1 + 1/n2))
+    
+    if se == 0:  # Handle division by zero
+        z_stat = 0.0
+        p_value = 1.0
+    else:
+        z_stat = (p2 - p1) / se
+        p_value = 2 * stats.norm.sf(abs(z_stat))
+    
+    # Power to detect the observed difference
+    power = stats.norm.sf(z_crit - abs(z_stat)) + stats.norm.cdf(-z_crit - abs(z_stat))
+    
+    # Wald interval of the difference, with the unpooled standard error
+    se_diff = np.sqrt(p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2)
+    
+    return {
+        "test_name": "z-test",
+        "p_value": float(p_value),
+        "confidence": float((1 - p_value) * 100),
+        "significant": p_value < alpha,
+        "power": float(power),
+        "ci_lower": float(p2 - p1 - z_crit * se_diff),
+        "ci_upper": float(p2 - p1 + z_crit * se_diff)
+    }
+
+def revenue_per_user_stats(count: int, mean: float, m2: float, users: int) -> Dict[str, float]:
+    """
+    Moments of the revenue per assigned user, with non-buyers as implied zeros
+    
+    The users without a transaction are merged in as a group of zeros (pairwise
+    update of Chan et al.), so they are never materialized.
+    
+    Parameters:
+    -----------
+    count : int
+        Number of transactions
+    mean : float
+        Mean transaction value
+    m2 : float
+        Sum of squared deviations of the transaction values from their mean
+    users : int
+        Number of users assigned to the group
+        
+    Returns:
+    --------
+    Dict[str, float]
+        'count' (users), 'mean' and 'std_dev' (ddof=1) of the revenue per user
+    """
+    if users < count:
+        raise ValueError(
+            "The revenue test per user needs at least as many users as transactions in each group"
+        )
+    if users < 2:
+        raise ValueError("The revenue test per user needs at least two users in each group")
+    
+    user_mean = mean * count / users
+    zeros = users - count
+    user_m2 = m2 + count * (mean - user_mean) ** 2 + zeros * user_mean ** 2
+    return {
+        "count": users,
+        "mean": float(user_mean),
+        "std_dev": float(np.sqrt(user_m2 / (users - 1)))
+    }
+
+def _metric_result(
+    metric_type: str,
+    control_value: float,
+    variation_value: float,
+    test_result: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Uplift and interpretation of a metric from its values and test result
+    
+    Parameters:
+    -----------
+    metric_type : str
+        Type of metric ('conversion', 'revenue', 'aov')
+    control_value : float
+        Metric value for the control group
+    variation_value : float
+        Metric value for the variation group
+    test_result : Dict[str, Any]
+        Result of the statistical test
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Dictionary of calculated metrics and test results
+    """
+    # Calculate uplift
+    if control_value == 0:
+        uplift = float('inf') if variation_value > 0 else 0
+    else:
+        uplift = ((variation_value - control_value) / control_value) * 100
+    
+    # Generate interpretation
+    if test_result["significant"]:
+        if uplift > 0:
+            interpretation = (
+                f"The {metric_type} for the variation is {uplift:.2f}% higher than the control, "
+                f"which is statistically significant (confidence: {test_result['confidence']:.2f}%). "
+            )
+        else:
+            interpretation = (
+                f"The {metric_type} for the variation is {abs(uplift):.2f}% lower than the control, "
+                f"which is statistically significant (confidence: {test_result['confidence']:.2f}%). "
+            )
+        
+        if test_result["power"] < 0.8:
+            interpretation += (
+                f"However, the statistical power is only {test_result['power']:.2f}, "
                 f"which is below the recommended 0.8. More data may be needed for reliable results."
             )
         else:
@@ -527,6 +979,348 @@ def calculate_metrics(
         "interpretation": interpretation
     }
 
+def calculate_metrics(
+    control_data: Union[np.ndarray, GroupStats],
+    variation_data: Union[np.ndarray, GroupStats],
+    metric_type: str,
+    users_control: int,
+    users_variation: int,
+    rng: Optional[np.random.Generator] = None,
+    bootstrap_resamples: int = DEFAULT_RESAMPLES,
+    bootstrap_memory_bytes: Optional[int] = None,
+    bootstrap_workers: Optional[int] = None,
+    revenue_test: str = 'clt',
+    normality: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Calculate key metrics and run statistical tests
+    
+    Parameters:
+    -----------
+    control_data : np.ndarray or GroupStats
+        Data for control group (the AOV tests reuse the sorted values of a
+        GroupStats)
+    variation_data : np.ndarray or GroupStats
+        Data for variation group
+    metric_type : str
+        Type of metric ('conversion', 'revenue', 'aov')
+    users_control : int
+        Number of users in control group
+    users_variation : int
+        Number of users in variation group
+    rng : np.random.Generator, optional
+        Random generator for the bootstrap
+    bootstrap_resamples : int
+        Number of bootstrap resamples of the total revenue
+    bootstrap_memory_bytes : int, optional
+        Memory ceiling of the bootstrap blocks (see bootstrap.bootstrap_sums)
+    bootstrap_workers : int, optional
+        Worker processes of the bootstrap (defaults to the CPU count)
+    revenue_test : str
+        Test of the total revenue: 'clt' compares the revenue per assigned
+        user with a normal test computed from the sums in O(n), 'bootstrap'
+        tests the bootstrap distributions of the sums
+    normality : Dict[str, Dict[str, Any]], optional
+        Normality assessments of the groups already computed, reused by the
+        AOV test selection (see assess_normality)
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Dictionary of calculated metrics and test results
+    """
+    if rng is None:
+        rng = create_rng(DEFAULT_ANALYSIS_SEED)  # For reproducibility
+    
+    if metric_type == 'conversion':
+        # For conversion rate
+        control_value = len(control_data) / users_control
+        variation_value = len(variation_data) / users_variation
+        
+        # Always use z-test for conversion rates, from the counts of converted users
+        test_result = conversion_z_test(len(control_data), users_control, len(variation_data), users_variation)
+        
+    elif metric_type == 'aov':
+        # For average order value
+        control_group, variation_group = as_group_stats(control_data), as_group_stats(variation_data)
+        control_value = control_group.mean
+        variation_value = variation_group.mean
+        
+        # Select and run statistical test
+        test_name = select_statistical_test(control_group, variation_group, metric_type, normality)
+        test_result = run_statistical_test(control_group, variation_group, test_name)
+        
+    elif metric_type == 'revenue':
+        # For total revenue
+        control_value = np.sum(control_data)
+        variation_value = np.sum(variation_data)
+        
+        if revenue_test == 'clt':
+            # Revenue per assigned user, users without a transaction counting as zeros
+            test_result = run_statistical_test_from_stats(
+                _revenue_per_user_from_values(control_data, users_control),
+                _revenue_per_user_from_values(variation_data, users_variation),
+                'clt'
+            )
+        
+        elif revenue_test == 'bootstrap':
+            # Bootstrap the sums to create their sampling distribution
+            # because we can't directly apply a statistical test to single sums
+            
+            # Create bootstrapped samples of total revenue, drawn in memory-bounded blocks
+            control_bootstrap = bootstrap_sums(
+                control_data, bootstrap_resamples, rng, bootstrap_memory_bytes, bootstrap_workers
+            )
+            variation_bootstrap = bootstrap_sums(
+                variation_data, bootstrap_resamples, rng, bootstrap_memory_bytes, bootstrap_workers
+            )
+            
+            # Run test on bootstrapped distributions
+            test_name = select_statistical_test(control_bootstrap, variation_bootstrap, 'aov')
+            test_result = run_statistical_test(control_bootstrap, variation_bootstrap, test_name)
+        
+        else:
+            raise ValueError(f"Unknown revenue test: {revenue_test}")
+    
+    else:
+        raise ValueError(f"Unknown metric type: {metric_type}")
+    
+    return _metric_result(metric_type, control_value, variation_value, test_result)
+
+def analyze_conversion_counts(
+    conversions_control: int,
+    users_control: int,
+    conversions_variation: int,
+    users_variation: int,
+    confidence: float = 95
+) -> Dict[str, Any]:
+    """
+    Conversion metric of an A/B test known only from its counts
+    
+    Parameters:
+    -----------
+    conversions_control, conversions_variation : int
+        Number of converted users in each group
+    users_control, users_variation : int
+        Number of users in each group
+    confidence : float
+        Confidence level in percentage (significance level 1 - confidence / 100)
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Conversion rates, uplift, z-test results and interpretation, in the
+        format of calculate_metrics
+    """
+    test_result = conversion_z_test(
+        conversions_control, users_control, conversions_variation, users_variation,
+        alpha=1 - confidence / 100
+    )
+    return _metric_result(
+        "conversion", conversions_control / users_control, conversions_variation / users_variation, test_result
+    )
+
+def _aggregated_moments(aggregate: Dict[str, Any]) -> Dict[str, float]:
+    """Count, mean, squared deviations and standard deviation of a group from its count, sum and sum of squares"""
+    count = aggregate["count"]
+    if count < 2:
+        raise ValueError("Each group needs at least two values")
+    total = aggregate["sum"]
+    mean = total / count
+    # Sum of squared deviations from the mean (rounding can make it slightly negative)
+    m2 = max(aggregate["sum_squares"] - total * mean, 0.0)
+    return {
+        "count": count,
+        "mean": float(mean),
+        "m2": float(m2),
+        "std_dev": float(np.sqrt(m2 / (count - 1))),
+        "total": float(total)
+    }
+
+def analyze_aggregated_data(
+    control: Dict[str, Any],
+    variation: Dict[str, Any],
+    kpi_type: str,
+    users_per_variation: Dict[str, int],
+    metrics: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Analysis of A/B test data known only from pre-aggregated statistics of each group
+    
+    Runs the tests that only need sufficient statistics, as the chunked
+    analysis: z-test of the conversion rate, Welch t-test of the AOV and CLT
+    test of the revenue per user, with their power. Medians and quartiles come
+    from the quantiles given, the histogram from fixed-bin counts. The fields
+    that need the values themselves (normality, raw data, frequency data,
+    outlier counts), or statistics that were not given, are left empty and
+    listed in 'unavailable_fields'.
+    
+    Parameters:
+    -----------
+    control, variation : Dict[str, Any]
+        'count' (number of transactions, at least two for the AOV and revenue
+        tests and the value statistics), 'sum', 'sum_squares', 'min_value'
+        and 'max_value' of each group, and optionally 'quantiles' (value of
+        each percentile, between 0 and 100) and 'histogram' ('bin_edges' and
+        per-bin 'counts'; both groups must share the bin edges)
+    kpi_type : str
+        Type of KPI to analyze ('conversion', 'revenue', 'aov')
+    users_per_variation : Dict[str, int]
+        Number of users in each variation
+    metrics : List[str], optional
+        Metrics computed in addition to the one of `kpi_type` (see analyze_ab_test_data)
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Analysis results in the format of analyze_ab_test_data, plus
+        'unavailable_fields'
+    """
+    try:
+        metric_names = _requested_metrics(kpi_type, metrics)
+        
+        # Get user counts
+        users_control = users_per_variation.get("control", 0)
+        users_variation = users_per_variation.get("variation", 0)
+        
+        if users_control <= 0 or users_variation <= 0:
+            raise ValueError("User counts must be positive integers")
+        
+        aggregates = {"control": control, "variation": variation}
+        unavailable_fields = ["raw_data"]
+        
+        # The value statistics need a variance, hence two values per group; the
+        # conversion rate only needs the counts, which may be zero or one
+        with_moments = all(aggregate["count"] >= 2 for aggregate in aggregates.values())
+        if not with_moments and ("aov" in metric_names or "revenue" in metric_names):
+            raise ValueError("The AOV and revenue tests need at least two values in each group")
+        moments = {
+            name: _aggregated_moments(aggregate) for name, aggregate in aggregates.items() if with_moments
+        }
+        
+        # Basic statistics, with the median when its quantile is given
+        basic_stats = {}
+        for name, aggregate in aggregates.items():
+            if not with_moments:
+                basic_stats[name] = {"count": aggregate["count"]}
+                unavailable_fields.append(f"basic_statistics.{name}")
+                continue
+            basic_stats[name] = {
+                "mean": moments[name]["mean"],
+                "std_dev": moments[name]["std_dev"],
+                "count": aggregate["count"],
+                "min_value": float(aggregate["min_value"]),
+                "max_value": float(aggregate["max_value"])
+            }
+            quantiles = aggregate.get("quantiles") or {}
+            if 50 in quantiles:
+                basic_stats[name]["median"] = float(quantiles[50])
+            else:
+                unavailable_fields.append(f"basic_statistics.{name}.median")
+        
+        # Generate interpretation bullet points
+        basic_interpretation = (
+            generate_basic_interpretation(basic_stats["control"], basic_stats["variation"]) if with_moments else []
+        )
+        
+        # Quartiles of both groups, when given
+        quartiles = None
+        if all(25 in (aggregate.get("quantiles") or {}) and 75 in aggregate["quantiles"] for aggregate in aggregates.values()):
+            quartiles = {
+                name: {"q1": float(aggregate["quantiles"][25]), "q3": float(aggregate["quantiles"][75])}
+                for name, aggregate in aggregates.items()
+            }
+        
+        # Outliers can be detected from the quartiles and the extremes, but not counted
+        has_outliers = False
+        if quartiles is not None:
+            for name, aggregate in aggregates.items():
+                iqr = quartiles[name]["q3"] - quartiles[name]["q1"]
+                has_outliers = has_outliers or (
+                    aggregate["min_value"] < quartiles[name]["q1"] - 1.5 * iqr
+                    or aggregate["max_value"] > quartiles[name]["q3"] + 1.5 * iqr
+                )
+        
+        metric_results = {}
+        
+        # Conversion metrics: z-test on conversions out of users
+        if "conversion" in metric_names:
+            metric_results["conversion"] = _metric_result(
+                "conversion", control["count"] / users_control, variation["count"] / users_variation,
+                conversion_z_test(control["count"], users_control, variation["count"], users_variation)
+            )
+        
+        # AOV metrics: Welch t-test from the moments (normality cannot be assessed without the values)
+        if "aov" in metric_names:
+            metric_results["aov"] = _metric_result(
+                "aov", moments["control"]["mean"], moments["variation"]["mean"],
+                run_statistical_test_from_stats(moments["control"], moments["variation"], 't-test')
+            )
+            unavailable_fields.append("normality")
+        
+        # Revenue metrics: CLT test on revenue per user from the moments
+        if "revenue" in metric_names:
+            metric_results["revenue"] = _metric_result(
+                "revenue", moments["control"]["total"], moments["variation"]["total"],
+                run_statistical_test_from_stats(
+                    revenue_per_user_stats(
+                        control["count"], moments["control"]["mean"], moments["control"]["m2"], users_control
+                    ),
+                    revenue_per_user_stats(
+                        variation["count"], moments["variation"]["mean"], moments["variation"]["m2"], users_variation
+                    ),
+                    'clt'
+                )
+            )
+        
+        overall_message = _overall_message(
+            kpi_type, control["count"], variation["count"], has_outliers, False, 0, metric_results
+        )
+        
+        # Chart data of the value distributions, from the quartiles and histograms given
+        histogram_data = None
+        if kpi_type in ("aov", "revenue"):
+            if quartiles is None:
+                unavailable_fields.append("quartiles")
+            
+            histograms = [aggregate.get("histogram") for aggregate in aggregates.values()]
+            if all(histograms):
+                if list(histograms[0]["bin_edges"]) != list(histograms[1]["bin_edges"]):
+                    raise ValueError("The histograms of both groups must share their bin edges")
+                histogram_data = histogram_from_counts(
+                    histograms[0]["bin_edges"], histograms[0]["counts"], histograms[1]["counts"]
+                )
+            else:
+                unavailable_fields.append("histogram_data")
+            unavailable_fields.extend(["box_plot", "frequency_data"])
+        else:
+            quartiles = None
+        
+        return {
+            "basic_statistics": basic_stats,
+            "basic_interpretation": basic_interpretation,
+            "conversion_metrics": metric_results.get("conversion"),
+            "aov_metrics": metric_results.get("aov"),
+            "revenue_metrics": metric_results.get("revenue"),
+            "normality": None,
+            "message": overall_message,
+            "raw_data": None,
+            "quartiles": quartiles,
+            "histogram_data": histogram_data,
+            "frequency_data": None,
+            "unavailable_fields": unavailable_fields
+        }
+    
+    except Exception as e:
+        logger.error(f"Error analyzing data: {str(e)}")
+        raise ValueError(f"Error analyzing data: {str(e)}")
+
+def _revenue_per_user_from_values(data: np.ndarray, users: int) -> Dict[str, float]:
+    """Moments of the revenue per user from the transaction values (see revenue_per_user_stats)"""
+    mean = float(np.mean(data)) if len(data) else 0.0
+    m2 = float(np.sum((data - mean) ** 2))
+    return revenue_per_user_stats(len(data), mean, m2, users)
+
 def generate_basic_interpretation(
     control_stats: Dict[str, float],
     variation_stats: Dict[str, float]
@@ -566,13 +1360,15 @@ def generate_basic_interpretation(
             f"({variation_stats['mean']:.2f}) compared to the control ({control_stats['mean']:.2f})."
         )
     
-    # Compare medians and assess skew
-    control_skew = (control_stats["mean"] - control_stats["median"]) / control_stats["std_dev"] if control_stats["std_dev"] > 0 else 0
-    variation_skew = (variation_stats["mean"] - variation_stats["median"]) / variation_stats["std_dev"] if variation_stats["std_dev"] > 0 else 0
-    
-    median_diff_pct = ((variation_stats["median"] - control_stats["median"]) / control_stats["median"]) * 100
+    # Compare medians and assess skew (when the medians are known: pre-aggregated data may lack them)
+    has_medians = "median" in control_stats and "median" in variation_stats
+    if has_medians:
+        control_skew = (control_stats["mean"] - control_stats["median"]) / control_stats["std_dev"] if control_stats["std_dev"] > 0 else 0
+        variation_skew = (variation_stats["mean"] - variation_stats["median"]) / variation_stats["std_dev"] if variation_stats["std_dev"] > 0 else 0
+        
+        median_diff_pct = ((variation_stats["median"] - control_stats["median"]) / control_stats["median"]) * 100
     
-    if abs(control_skew) > 0.5 or abs(variation_skew) > 0.5:
+    if has_medians and (abs(control_skew) > 0.5 or abs(variation_skew) > 0.5):
         skew_interpretation = ""
         if control_skew > 0.5 and variation_skew > 0.5:
             skew_interpretation = "Both distributions are right-skewed (higher values are pulling up the average)."
@@ -613,24 +1409,567 @@ def generate_basic_interpretation(
     
     return interpretations
 
+def _overall_message(
+    kpi_type: str,
+    control_count: int,
+    variation_count: int,
+    has_outliers: bool,
+    exclude_outliers: bool,
+    outliers_count: int,
+    metrics: Dict[str, Dict[str, Any]]
+) -> str:
+    """
+    Overall summary message of an analysis
+    
+    Parameters:
+    -----------
+    kpi_type : str
+        Type of KPI analyzed
+    control_count, variation_count : int
+        Number of transactions analyzed in each group
+    has_outliers : bool
+        Whether outliers were detected
+    exclude_outliers : bool
+        Whether outliers were excluded
+    outliers_count : int
+        Number of outliers detected in both groups
+    metrics : Dict[str, Dict[str, Any]]
+        Metric results keyed by metric name
+        
+    Returns:
+    --------
+    str
+        Summary message with the key findings
+    """
+    overall_message = (
+        f"Analysis complete for {kpi_type.upper()} data. "
+        f"Found {control_count} control transactions and {variation_count} variation transactions. "
+    )
+    
+    if has_outliers:
+        if exclude_outliers:
+            overall_message += f"Excluded {outliers_count} outliers from the analysis. "
+        else:
+            overall_message += "Outliers were detected but not excluded from the analysis. "
+    
+    # Summarize key findings
+    significant_metrics = []
+    for metric_name, metric in metrics.items():
+        if metric["test_result"]["significant"]:
+            direction = "higher" if metric["uplift"] > 0 else "lower"
+            significant_metrics.append(
+                f"{metric_name.upper()} is {abs(metric['uplift']):.2f}% {direction} in variation"
+            )
+    
+    if significant_metrics:
+        overall_message += "Key findings: " + ", ".join(significant_metrics) + "."
+    else:
+        overall_message += "No statistically significant differences were found."
+    
+    return overall_message
+
+def adjust_p_values(
+    p_values: List[float],
+    correction: str = 'holm',
+    alpha: float = 0.05
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Correct the p-values of a family of comparisons
+    
+    Parameters:
+    -----------
+    p_values : List[float]
+        P-values of the comparisons
+    correction : str
+        'holm' or 'bonferroni' (family-wise error rate), 'benjamini-hochberg'
+        (false discovery rate) or 'none'
+    alpha : float
+        Significance level
+        
+    Returns:
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        Adjusted p-values and whether each comparison stays significant
+    """
+    if correction not in MULTIPLE_COMPARISON_CORRECTIONS:
+        raise ValueError(f"Unknown multiple-comparison correction: {correction}")
+    
+    p_values = np.asarray(p_values, dtype=float)
+    method = MULTIPLE_COMPARISON_CORRECTIONS[correction]
+    if method is not None and len(p_values) > 0:
+        p_values = multipletests(p_values, alpha=alpha, method=method)[1]
+    return p_values, p_values < alpha
+
+def _multi_arm_message(
+    kpi_type: str,
+    variation_names: List[str],
+    arms: List[Dict[str, Any]],
+    correction: str
+) -> str:
+    """Overall message of a multi-arm analysis, from the corrected test results"""
+    labels = {'holm': "Holm", 'bonferroni': "Bonferroni", 'benjamini-hochberg': "Benjamini-Hochberg"}
+    overall_message = f"Analysis complete for {kpi_type.upper()} data: {len(arms)} variations compared to the control"
+    if correction in labels:
+        overall_message += f", with {labels[correction]} correction. "
+    else:
+        overall_message += ", without multiple-comparison correction. "
+    
+    significant_metrics = []
+    for name, arm in zip(variation_names, arms):
+        for metric_name in METRIC_NAMES:
+            metric = arm.get(f"{metric_name}_metrics")
+            if metric and metric["test_result"]["adjusted_significant"]:
+                direction = "higher" if metric["uplift"] > 0 else "lower"
+                significant_metrics.append(
+                    f"{metric_name.upper()} is {abs(metric['uplift']):.2f}% {direction} in {name}"
+                )
+    
+    if significant_metrics:
+        overall_message += "Key findings: " + ", ".join(significant_metrics) + "."
+    else:
+        overall_message += "No statistically significant differences were found."
+    
+    return overall_message
+
+def _requested_metrics(kpi_type: str, metrics: Optional[List[str]] = None) -> List[str]:
+    """Metrics to compute: the one of the KPI analyzed plus the extra ones requested"""
+    requested = {kpi_type, *(metrics or ())}
+    unknown = requested - set(METRIC_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown metric: {', '.join(sorted(unknown))}")
+    return [metric_name for metric_name in METRIC_NAMES if metric_name in requested]
+
+def _load_dataset(
+    file_content: Union[str, bytes, BinaryIO],
+    file_type: str,
+    column_specs: List[Dict[str, Any]],
+    use_cache: bool = True,
+    segment_column: Optional[Dict[str, Any]] = None
+) -> CachedDataset:
+    """
+    Control and variation arrays of a file, from the dataset cache when already parsed
+    
+    With a segment column, the dataset also holds the segment of each value
+    ('control_segments', 'variation_segments': positions in the sorted
+    'segment_labels'; -1 for rows without a segment).
+    """
+    if segment_column is not None:
+        column_specs = [*column_specs, segment_column]
+    
+    key = None
+    if use_cache:
+        key = dataset_key(file_content, file_type, column_specs)
+        dataset = dataset_cache.get(key)
+        if dataset is not None:
+            return dataset
+    
+    # Load only the control and variation columns (and the segments)
+    columns = load_columns(
+        _decode_source(file_content), file_type, column_specs,
+        label_columns=() if segment_column is None else (2,)
+    )
+    control_data, variation_data = columns[:2]
+    
+    # Filter out NaN values
+    control_mask = ~np.isnan(control_data)
+    variation_mask = ~np.isnan(variation_data)
+    arrays = {
+        "control": control_data[control_mask],
+        "variation": variation_data[variation_mask]
+    }
+    
+    if segment_column is not None:
+        # The segment of a row applies to its control and variation values
+        codes, labels = pd.factorize(columns[2], sort=True)
+        arrays["control_segments"] = codes[control_mask]
+        arrays["variation_segments"] = codes[variation_mask]
+        arrays["segment_labels"] = np.array([str(label) for label in labels], dtype=object)
+    return dataset_cache.put(key, arrays) if use_cache else CachedDataset(None, arrays)
+
+def _dataset_summary(
+    dataset: CachedDataset,
+    exclude_outliers: bool,
+    groups: Optional[Callable[[], Tuple[GroupStats, GroupStats]]] = None
+) -> Tuple[Dict[str, Dict[str, float]], str, bool, GroupStats, GroupStats]:
+    """Summary stage of a dataset, as summarize_groups (the groups without outliers when excluded)"""
+    # Each group is sorted once per dataset; every later stage reuses it
+    if groups is None:
+        groups = lambda: (GroupStats(dataset.arrays["control"]), GroupStats(dataset.arrays["variation"]))
+    control_group, variation_group = dataset.stage("groups", groups)
+    
+    return dataset.stage(
+        ("summary", exclude_outliers),
+        lambda: summarize_groups(control_group, variation_group, exclude_outliers)
+    )
+
+def _data_summary(
+    summary_stats: Dict[str, Dict[str, float]],
+    summary_message: str,
+    has_outliers: bool
+) -> Dict[str, Any]:
+    """Data summary section of an analysis response"""
+    return {
+        "control_summary": summary_stats["control"],
+        "variation_summary": summary_stats["variation"],
+        "message": summary_message,
+        "has_outliers": has_outliers
+    }
+
+def _optional_float(value: float) -> Optional[float]:
+    """Float value, or None when undefined (NaN)"""
+    return None if np.isnan(value) else float(value)
+
+def _segment_results(
+    dataset: CachedDataset,
+    exclude_outliers: bool,
+    metric_names: List[str],
+    users_per_segment: Optional[Dict[str, Dict[str, int]]] = None,
+    correction: str = 'holm',
+    alpha: float = 0.05
+) -> Dict[str, Any]:
+    """
+    Per-segment summaries and tests of a segmented dataset, in one grouped pass
+    
+    Each group is sorted once by (segment, value) and cached on the dataset;
+    the summaries, outlier exclusion (with the fences of each segment) and
+    tests of all segments are then array operations. Conversion and revenue
+    use the z-test and the normal test on revenue per user with the users of
+    each segment, the AOV the Welch t-test; the p-values of each metric are
+    corrected for the number of segments tested.
+    
+    Parameters:
+    -----------
+    dataset : CachedDataset
+        Dataset loaded with a segment column (see _load_dataset)
+    exclude_outliers : bool
+        Whether to exclude the outliers of each segment
+    metric_names : List[str]
+        Metrics to compare
+    users_per_segment : Dict[str, Dict[str, int]], optional
+        Users of the control ('control') and variation ('variation') of each
+        segment, keyed by segment; conversion and revenue are only tested
+        for the segments listed
+    correction : str
+        Multiple-comparison correction across the segments (see adjust_p_values)
+    alpha : float
+        Significance level
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        'correction', and 'segments': one row per segment with the summary
+        of each group and the compact result of each metric (None when not
+        requested or not computable)
+    """
+    labels = dataset.arrays["segment_labels"]
+    n_segments = len(labels)
+    
+    def split():
+        # Rows without a segment only count in the overall analysis
+        groups = []
+        for name in ("control", "variation"):
+            codes = dataset.arrays[f"{name}_segments"]
+            assigned = codes >= 0
+            groups.append(SegmentedGroup(dataset.arrays[name][assigned], codes[assigned], n_segments))
+        return tuple(groups)
+    
+    def summarize():
+        control, variation = dataset.stage("segment_groups", split)
+        if exclude_outliers:
+            control, variation = control.without_outliers(), variation.without_outliers()
+        return control, variation, control.summary(), variation.summary()
+    
+    control, variation, control_summary, variation_summary = dataset.stage(
+        ("segment_summary", exclude_outliers), summarize
+    )
+    
+    # Users of each segment, NaN for the segments without user counts
+    users_per_segment = users_per_segment or {}
+    users_control, users_variation = (
+        np.array([users_per_segment.get(label, {}).get(name, np.nan) for label in labels], dtype=float)
+        for name in ("control", "variation")
+    )
+    with_users = ~np.isnan(users_control) & ~np.isnan(users_variation)
+    
+    metric_values = {}
+    for metric_name in metric_names:
+        if metric_name == "conversion":
+            if np.any(with_users & ((control.counts > users_control) | (variation.counts > users_variation))):
+                raise ValueError("Conversions must be between zero and the number of users of their group")
+            values = (control.counts / users_control, variation.counts / users_variation)
+            test = conversion_z_tests(control.counts, users_control, variation.counts, users_variation, alpha)
+            tested = with_users
+        elif metric_name == "aov":
+            values = (control.means, variation.means)
+            test = welch_t_tests(control, variation, alpha)
+            tested = ~np.isnan(test["p_value"])
+        else:
+            if np.any(with_users & ((control.counts > users_control) | (variation.counts > users_variation)
+                                    | (users_control < 2) | (users_variation < 2))):
+                raise ValueError(
+                    "The revenue test per user needs at least two users, and at least as many users "
+                    "as transactions, in each group of each segment"
+                )
+            values = (control.totals, variation.totals)
+            test = revenue_per_user_tests(control, variation, users_control, users_variation, alpha)
+            tested = with_users
+        
+        adjusted_p_values = np.full(n_segments, np.nan)
+        adjusted_p_values[tested], _ = adjust_p_values(test["p_value"][tested], correction, alpha)
+        metric_values[metric_name] = values, test, tested, adjusted_p_values
+    
+    def group_row(summary, segment):
+        row = {name: _optional_float(values[segment]) for name, values in summary.items()}
+        row["count"] = int(summary["count"][segment])
+        row["outliers_count"] = int(summary["outliers_count"][segment])
+        return row
+    
+    segments = []
+    for segment, label in enumerate(labels):
+        row = {
+            "segment": label,
+            "control": group_row(control_summary, segment),
+            "variation": group_row(variation_summary, segment)
+        }
+        for metric_name in METRIC_NAMES:
+            if metric_name not in metric_values:
+                row[f"{metric_name}_metrics"] = None
+                continue
+            (control_values, variation_values), test, tested, adjusted_p_values = metric_values[metric_name]
+            control_value = _optional_float(control_values[segment])
+            variation_value = _optional_float(variation_values[segment])
+            uplift = None
+            if control_value and variation_value is not None:
+                uplift = (variation_value - control_value) / control_value * 100
+            metric = {
+                "control_value": control_value,
+                "variation_value": variation_value,
+                "uplift": uplift,
+                "test_name": test["test_name"],
+                "p_value": None,
+                "confidence": None,
+                "significant": None,
+                "adjusted_p_value": None,
+                "adjusted_significant": None
+            }
+            if tested[segment]:
+                metric.update({
+                    "p_value": float(test["p_value"][segment]),
+                    "confidence": float(test["confidence"][segment]),
+                    "significant": bool(test["significant"][segment]),
+                    "adjusted_p_value": float(adjusted_p_values[segment]),
+                    "adjusted_significant": bool(adjusted_p_values[segment] < alpha)
+                })
+            row[f"{metric_name}_metrics"] = metric
+        segments.append(row)
+    
+    return {"correction": correction, "segments": segments}
+
+def _analyze_dataset(
+    dataset: CachedDataset,
+    kpi_type: str,
+    exclude_outliers: bool,
+    users_control: int,
+    users_variation: int,
+    rng: Optional[np.random.Generator] = None,
+    seed: Optional[Any] = None,
+    bootstrap_resamples: int = DEFAULT_RESAMPLES,
+    bootstrap_memory_mb: Optional[float] = None,
+    bootstrap_workers: Optional[int] = None,
+    revenue_test: str = 'clt',
+    groups: Optional[Callable[[], Tuple[GroupStats, GroupStats]]] = None,
+    metrics: Optional[List[str]] = None,
+    users_per_segment: Optional[Dict[str, Dict[str, int]]] = None,
+    segment_correction: str = 'holm',
+    raw_data_mode: str = 'full',
+    raw_data_points: int = DEFAULT_RAW_DATA_POINTS
+) -> Dict[str, Any]:
+    """
+    Analysis of the control and variation arrays of a dataset, stage by stage
+    
+    Every stage (summary, basic statistics, normality, each metric,
+    visualization) is cached on the dataset and only computed when the
+    response needs it: metrics other than the KPI's are only computed when
+    requested.
+    
+    Parameters:
+    -----------
+    dataset : CachedDataset
+        Dataset with 'control' and 'variation' arrays; its cached stages are
+        reused and completed
+    kpi_type, exclude_outliers, bootstrap_resamples, bootstrap_memory_mb, bootstrap_workers, revenue_test, metrics, raw_data_mode, raw_data_points
+        See analyze_ab_test_data
+    users_per_segment, segment_correction
+        Per-segment analysis of a dataset loaded with a segment column (see
+        _segment_results)
+    users_control, users_variation : int
+        Number of users in each group
+    rng : np.random.Generator, optional
+        Random generator of the comparison (seeded with DEFAULT_ANALYSIS_SEED if omitted)
+    seed : hashable, optional
+        Identifies the stream of `rng`; results drawn from it are only cached
+        when it is given (or when `rng` is omitted)
+    groups : callable, optional
+        Builds the GroupStats of both groups when they are not cached, to
+        share the control group between comparisons
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Complete analysis results (metrics not computed are None)
+    """
+    if users_control <= 0 or users_variation <= 0:
+        raise ValueError("User counts must be positive integers")
+    metric_names = _requested_metrics(kpi_type, metrics)
+    
+    summary_stats, summary_message, has_outliers, control_group, variation_group = _dataset_summary(
+        dataset, exclude_outliers, groups
+    )
+    control_data = control_group.values
+    variation_data = variation_group.values
+    
+    def describe():
+        # Calculate basic statistics for presentation
+        basic_stats = {
+            "control": control_group.describe(),
+            "variation": variation_group.describe()
+        }
+        
+        # Generate interpretation bullet points
+        basic_interpretation = generate_basic_interpretation(
+            summary_stats["control"], summary_stats["variation"]
+        )
+        return basic_stats, basic_interpretation
+    
+    basic_stats, basic_interpretation = dataset.stage(("basic", exclude_outliers), describe)
+    
+    # Normality of each group from its moments, deciding between the t-test and Mann-Whitney for the AOV
+    normality = None
+    if "aov" in metric_names:
+        normality = dataset.stage(
+            ("normality", exclude_outliers),
+            lambda: {"control": assess_normality(control_group), "variation": assess_normality(variation_group)}
+        )
+    
+    def measure(metric_name):
+        if metric_name == "conversion":
+            # Conversion metrics
+            return calculate_metrics(
+                control_data, variation_data, "conversion", users_control, users_variation
+            )
+        
+        if metric_name == "aov":
+            # AOV metrics
+            return calculate_metrics(
+                control_group, variation_group, "aov", users_control, users_variation, normality=normality
+            )
+        
+        # Revenue metrics
+        return calculate_metrics(
+            control_data, variation_data, "revenue", users_control, users_variation,
+            rng if rng is not None else create_rng(DEFAULT_ANALYSIS_SEED),
+            bootstrap_resamples=bootstrap_resamples,
+            bootstrap_memory_bytes=None if bootstrap_memory_mb is None else int(bootstrap_memory_mb * 1024 * 1024),
+            bootstrap_workers=bootstrap_workers,
+            revenue_test=revenue_test
+        )
+    
+    # Each requested metric is a stage of its own
+    metric_results = {}
+    for metric_name in metric_names:
+        if metric_name == "conversion":
+            key = ("conversion", exclude_outliers, users_control, users_variation)
+        elif metric_name == "aov":
+            key = ("aov", exclude_outliers)
+        else:
+            key = ("revenue", exclude_outliers, users_control, users_variation, revenue_test)
+            if revenue_test == "bootstrap":
+                # Metrics drawn from the random stream can only be reused for the same seed
+                # (and the same memory ceiling, which can change how the resamples are drawn)
+                if rng is not None and seed is None:
+                    metric_results[metric_name] = measure(metric_name)
+                    continue
+                key += (DEFAULT_ANALYSIS_SEED if rng is None else seed, bootstrap_resamples, bootstrap_memory_mb)
+        metric_results[metric_name] = dataset.stage(key, lambda metric_name=metric_name: measure(metric_name))
+    
+    # Generate overall message
+    outliers_count = summary_stats["control"]["outliers_count"] + summary_stats["variation"]["outliers_count"]
+    overall_message = _overall_message(
+        kpi_type, len(control_data), len(variation_data), has_outliers, exclude_outliers, outliers_count, metric_results
+    )
+    
+    def visualize():
+        # Generate visualization data using the preprocessor (the raw values are
+        # only converted to python lists when they are all returned)
+        from .visualization_preprocessor import prepare_visualization_data
+        
+        # Get visualization data
+        return prepare_visualization_data(
+            control_data, variation_data, kpi_type,
+            control_stats=control_group, variant_stats=variation_group,
+            raw_data_mode=raw_data_mode, raw_data_points=raw_data_points
+        )
+    
+    viz_key = ("visualization", exclude_outliers, kpi_type, raw_data_mode)
+    if raw_data_mode == "sample":
+        viz_key += (raw_data_points,)
+    viz_data = dataset.stage(viz_key, visualize)
+    
+    # Return the complete analysis with visualization data
+    return {
+        "basic_statistics": basic_stats,
+        "basic_interpretation": basic_interpretation,
+        "conversion_metrics": metric_results.get("conversion"),
+        "aov_metrics": metric_results.get("aov"),
+        "revenue_metrics": metric_results.get("revenue"),
+        "normality": normality,
+        "message": overall_message,
+        "data_summary": _data_summary(summary_stats, summary_message, has_outliers),
+        # Add visualization data
+        "raw_data": viz_data.get("raw_data"),
+        "quartiles": viz_data.get("quartiles"),
+        "box_plot": viz_data.get("box_plot"),
+        "histogram_data": viz_data.get("histogram_data"),
+        "frequency_data": viz_data.get("frequency_data"),
+        # Per-segment table of a dataset loaded with a segment column
+        "segment_results": _segment_results(
+            dataset, exclude_outliers, metric_names, users_per_segment, segment_correction
+        ) if "segment_labels" in dataset.arrays else None
+    }
+
 def analyze_ab_test_data(
-    file_content: str,
+    file_content: Union[str, bytes, BinaryIO],
     file_type: str,
     control_column: Dict[str, Any],
     variation_column: Dict[str, Any],
     kpi_type: str,
     exclude_outliers: bool,
-    users_per_variation: Dict[str, int]
+    users_per_variation: Dict[str, int],
+    rng: Optional[np.random.Generator] = None,
+    chunk_size: Optional[int] = None,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+    bootstrap_resamples: int = DEFAULT_RESAMPLES,
+    bootstrap_memory_mb: Optional[float] = None,
+    bootstrap_workers: Optional[int] = None,
+    revenue_test: str = 'clt',
+    metrics: Optional[List[str]] = None,
+    segment_column: Optional[Dict[str, Any]] = None,
+    users_per_segment: Optional[Dict[str, Dict[str, int]]] = None,
+    segment_correction: str = 'holm',
+    raw_data_mode: str = 'full',
+    raw_data_points: int = DEFAULT_RAW_DATA_POINTS
 ) -> Dict[str, Any]:
     """
     Complete analysis of A/B test data
     
     Parameters:
     -----------
-    file_content : str
-        Base64 encoded file content
+    file_content : str, bytes or binary file object
+        Base64 encoded file content, or the raw content / an open file for
+        uploads that skip the base64 encoding
     file_type : str
-        Type of file ('csv', 'json', 'xlsx')
+        Type of file ('csv', 'json', 'xlsx', 'parquet', 'arrow')
     control_column : Dict[str, Any]
         Specification for control column
     variation_column : Dict[str, Any]
@@ -641,23 +1980,411 @@ def analyze_ab_test_data(
         Whether to exclude outliers from analysis
     users_per_variation : Dict[str, int]
         Number of users in each variation
+    rng : np.random.Generator, optional
+        Random generator of the request (seeded with DEFAULT_ANALYSIS_SEED if omitted)
+    chunk_size : int, optional
+        Read the file in chunks of this many rows with bounded memory
+        (see analyze_ab_test_data_chunked)
+    seed : int, optional
+        Seed `rng` was created from; results drawn from the random stream are
+        only cached when it is given (or when `rng` is omitted)
+    use_cache : bool
+        Reuse the arrays and stage results cached for the same file and
+        columns (see dataset_cache)
+    bootstrap_resamples : int
+        Number of bootstrap resamples of the total revenue
+    bootstrap_memory_mb : float, optional
+        Memory ceiling of the bootstrap blocks, in megabytes
+    bootstrap_workers : int, optional
+        Worker processes of the bootstrap (defaults to the CPU count)
+    revenue_test : str
+        Test of the total revenue ('clt' or 'bootstrap', see calculate_metrics)
+    metrics : List[str], optional
+        Metrics computed in addition to the one of `kpi_type` ('conversion',
+        'aov', 'revenue'); the others are left out of the results (None)
+    segment_column : Dict[str, Any], optional
+        Specification of a column splitting the rows into segments (device,
+        country...): the results then include a per-segment table
+    users_per_segment : Dict[str, Dict[str, int]], optional
+        Users of the control ('control') and variation ('variation') of each
+        segment, for the per-segment conversion and revenue tests
+    segment_correction : str
+        Multiple-comparison correction of the per-segment p-values
+    raw_data_mode : str
+        Raw values returned for the charts: 'full' (every value), 'sample'
+        (stratified sample keeping the tails) or 'none'; outside 'full', the
+        chart data has a bounded size (see prepare_visualization_data)
+    raw_data_points : int
+        Values per group of the 'sample' mode
         
     Returns:
     --------
     Dict[str, Any]
         Complete analysis results
     """
+    if revenue_test not in REVENUE_TESTS:
+        raise ValueError(f"Unknown revenue test: {revenue_test}")
+    
+    if chunk_size is not None:
+        if segment_column is not None:
+            raise ValueError("The segmented analysis is not available when reading the file in chunks")
+        return analyze_ab_test_data_chunked(
+            file_content, file_type, control_column, variation_column, kpi_type,
+            exclude_outliers, users_per_variation, chunk_size, rng, revenue_test, metrics,
+            raw_data_mode, raw_data_points
+        )
+    
     try:
-        # Load data
-        df = load_data_from_base64(file_content, file_type)
+        # Reuse the arrays and stage results of a dataset already analyzed
+        dataset = _load_dataset(
+            file_content, file_type, [control_column, variation_column], use_cache, segment_column
+        )
         
-        # Extract column data
-        control_data = extract_column_data(df, control_column)
-        variation_data = extract_column_data(df, variation_column)
+        # Compare the two groups, stage by stage
+        return _analyze_dataset(
+            dataset, kpi_type, exclude_outliers,
+            users_per_variation.get("control", 0), users_per_variation.get("variation", 0),
+            rng, seed, bootstrap_resamples, bootstrap_memory_mb, bootstrap_workers, revenue_test,
+            metrics=metrics, users_per_segment=users_per_segment, segment_correction=segment_correction,
+            raw_data_mode=raw_data_mode, raw_data_points=raw_data_points
+        )
+    
+    except Exception as e:
+        logger.error(f"Error analyzing data: {str(e)}")
+        raise ValueError(f"Error analyzing data: {str(e)}")
+
+def summarize_ab_test_data(
+    file_content: Union[str, bytes, BinaryIO],
+    file_type: str,
+    control_column: Dict[str, Any],
+    variation_column: Dict[str, Any],
+    exclude_outliers: bool,
+    rng: Optional[np.random.Generator] = None,
+    chunk_size: Optional[int] = None,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Summary statistics and outlier detection of A/B test data, without statistical tests
+    
+    Only the summary stage is computed (and cached): user counts, tests and
+    chart data are not needed.
+    
+    Parameters:
+    -----------
+    file_content, file_type, control_column, variation_column, exclude_outliers, chunk_size, use_cache
+        See analyze_ab_test_data
+    rng : np.random.Generator, optional
+        Random generator of the request, used by the value samples of the
+        chunked mode
         
-        # Filter out NaN values
-        control_data = control_data[~np.isnan(control_data)]
-        variation_data = variation_data[~np.isnan(variation_data)]
+    Returns:
+    --------
+    Dict[str, Any]
+        Data summary, in the format of the 'data_summary' of analyze_ab_test_data
+    """
+    try:
+        if chunk_size is not None:
+            _, _, summary_stats, summary_message, has_outliers = _read_chunked_groups(
+                file_content, file_type, control_column, variation_column, exclude_outliers, chunk_size, rng
+            )
+            return _data_summary(summary_stats, summary_message, has_outliers)
+        
+        dataset = _load_dataset(file_content, file_type, [control_column, variation_column], use_cache)
+        return _data_summary(*_dataset_summary(dataset, exclude_outliers)[:3])
+    
+    except Exception as e:
+        logger.error(f"Error analyzing data: {str(e)}")
+        raise ValueError(f"Error analyzing data: {str(e)}")
+
+def analyze_multi_arm_data(
+    file_content: Union[str, bytes, BinaryIO],
+    file_type: str,
+    control_column: Dict[str, Any],
+    variation_columns: List[Dict[str, Any]],
+    kpi_type: str,
+    exclude_outliers: bool,
+    users_per_variation: Dict[str, int],
+    rng: Optional[np.random.Generator] = None,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+    bootstrap_resamples: int = DEFAULT_RESAMPLES,
+    bootstrap_memory_mb: Optional[float] = None,
+    bootstrap_workers: Optional[int] = None,
+    revenue_test: str = 'clt',
+    correction: str = 'holm',
+    workers: Optional[int] = None,
+    metrics: Optional[List[str]] = None,
+    raw_data_mode: str = 'full',
+    raw_data_points: int = DEFAULT_RAW_DATA_POINTS
+) -> Dict[str, Any]:
+    """
+    Analysis of several variations against one control (A/B/n test)
+    
+    The file is parsed once for all the columns. Each variation is then
+    compared to the control as by analyze_ab_test_data (sharing its dataset
+    cache entries, and the sorted control group), on a pool of threads with
+    one random stream per comparison spawned from the request's. The p-values
+    of each metric are corrected across the comparisons.
+    
+    Parameters:
+    -----------
+    file_content : str, bytes or binary file object
+        Base64 encoded file content, or the raw content / an open file
+    file_type : str
+        Type of file ('csv', 'json', 'xlsx', 'parquet', 'arrow')
+    control_column : Dict[str, Any]
+        Specification for control column
+    variation_columns : List[Dict[str, Any]]
+        Specifications for the variation columns
+    kpi_type : str
+        Type of KPI to analyze ('conversion', 'revenue', 'aov')
+    exclude_outliers : bool
+        Whether to exclude outliers from analysis
+    users_per_variation : Dict[str, int]
+        Number of users of the control ('control') and of each variation
+        (keyed by its column name)
+    rng : np.random.Generator, optional
+        Random generator of the request (seeded with DEFAULT_ANALYSIS_SEED if omitted)
+    seed : int, optional
+        Seed `rng` was created from; results drawn from the random streams are
+        only cached when it is given (or when `rng` is omitted)
+    use_cache : bool
+        Reuse the arrays and stage results cached for the same file and columns
+    bootstrap_resamples, bootstrap_memory_mb, bootstrap_workers, revenue_test, metrics, raw_data_mode, raw_data_points
+        See analyze_ab_test_data
+    correction : str
+        Multiple-comparison correction ('holm', 'bonferroni',
+        'benjamini-hochberg' or 'none', see adjust_p_values)
+    workers : int, optional
+        Threads running the comparisons (defaults to the CPU count)
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Control column, correction, overall message and the analysis of each
+        variation ('arms'), whose test results carry the adjusted p-values
+    """
+    if revenue_test not in REVENUE_TESTS:
+        raise ValueError(f"Unknown revenue test: {revenue_test}")
+    if correction not in MULTIPLE_COMPARISON_CORRECTIONS:
+        raise ValueError(f"Unknown multiple-comparison correction: {correction}")
+    
+    try:
+        # Unknown metrics fail before the file is parsed
+        _requested_metrics(kpi_type, metrics)
+        variation_names = [column["name"] for column in variation_columns]
+        if not variation_names:
+            raise ValueError("At least one variation column is required")
+        if len(set(variation_names)) != len(variation_names):
+            raise ValueError("Variation columns must be distinct")
+        
+        users_control = users_per_variation.get("control", 0)
+        users_variations = [users_per_variation.get(name, 0) for name in variation_names]
+        missing = [name for name, users in zip(variation_names, users_variations) if users <= 0]
+        if users_control <= 0 or missing:
+            raise ValueError(
+                "User counts must be positive integers for the control and every variation"
+                + (f" (missing: {', '.join(missing)})" if missing else "")
+            )
+        
+        # One dataset per comparison, keyed as for a single variation
+        keys = [
+            dataset_key(file_content, file_type, [control_column, column]) if use_cache else None
+            for column in variation_columns
+        ]
+        datasets = [dataset_cache.get(key) if use_cache else None for key in keys]
+        
+        if any(dataset is None for dataset in datasets):
+            # Parse the file once for the control and every variation column
+            columns = load_columns(_decode_source(file_content), file_type, [control_column] + list(variation_columns))
+            columns = [column[~np.isnan(column)] for column in columns]
+            for index, key in enumerate(keys):
+                if datasets[index] is None:
+                    arrays = {"control": columns[0], "variation": columns[index + 1]}
+                    datasets[index] = dataset_cache.put(key, arrays) if use_cache else CachedDataset(None, arrays)
+        
+        # The control group is sorted once for all the comparisons that need it
+        shared_control = []
+        control_lock = threading.Lock()
+        
+        def groups_of(dataset):
+            def build():
+                with control_lock:
+                    if not shared_control:
+                        shared_control.append(GroupStats(dataset.arrays["control"]))
+                return shared_control[0], GroupStats(dataset.arrays["variation"])
+            return build
+        
+        # One independent random stream per comparison
+        if rng is None:
+            rng, seed = create_rng(DEFAULT_ANALYSIS_SEED), DEFAULT_ANALYSIS_SEED
+        arm_rngs = rng.spawn(len(datasets))
+        
+        def compare(index):
+            return _analyze_dataset(
+                datasets[index], kpi_type, exclude_outliers, users_control, users_variations[index],
+                arm_rngs[index], None if seed is None else (seed, "arm", index),
+                bootstrap_resamples, bootstrap_memory_mb, bootstrap_workers, revenue_test,
+                groups=groups_of(datasets[index]), metrics=metrics,
+                raw_data_mode=raw_data_mode, raw_data_points=raw_data_points
+            )
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(datasets))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(compare, range(len(datasets))))
+        else:
+            results = [compare(index) for index in range(len(datasets))]
+        
+        # Correct the p-values of each metric across the comparisons (cached results are copied, not mutated)
+        arms = [{"variation": name, **result} for name, result in zip(variation_names, results)]
+        for metric_name in METRIC_NAMES:
+            field = f"{metric_name}_metrics"
+            tested = [arm for arm in arms if arm.get(field)]
+            adjusted, significant = adjust_p_values(
+                [arm[field]["test_result"]["p_value"] for arm in tested], correction
+            )
+            for arm, p_value, is_significant in zip(tested, adjusted, significant):
+                arm[field] = {
+                    **arm[field],
+                    "test_result": {
+                        **arm[field]["test_result"],
+                        "adjusted_p_value": float(p_value),
+                        "adjusted_significant": bool(is_significant)
+                    }
+                }
+        
+        return {
+            "control_column": control_column["name"],
+            "correction": correction,
+            "arms": arms,
+            "message": _multi_arm_message(kpi_type, variation_names, arms, correction)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error analyzing data: {str(e)}")
+        raise ValueError(f"Error analyzing data: {str(e)}")
+
+def _read_chunked_groups(
+    file_content: Union[str, bytes, BinaryIO],
+    file_type: str,
+    control_column: Dict[str, Any],
+    variation_column: Dict[str, Any],
+    exclude_outliers: bool,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rng: Optional[np.random.Generator] = None
+) -> Tuple[RunningStats, RunningStats, Dict[str, Dict[str, float]], str, bool]:
+    """
+    Running statistics of both groups of a file read in chunks, and their summary
+    
+    When outliers are excluded, the file is read a second time with the fences
+    estimated in the first pass.
+    
+    Returns:
+    --------
+    Tuple
+        Control and variation RunningStats, summary statistics, summary
+        message and whether outliers were detected
+    """
+    file_type = file_type.lower()
+    if file_type != 'csv' and file_type not in ARROW_FILE_TYPES:
+        raise ValueError("Chunked ingestion is only available for CSV, Parquet and Arrow files")
+    
+    if rng is None:
+        rng = create_rng(DEFAULT_ANALYSIS_SEED)
+    
+    source = _decode_source(file_content)
+    start = None if isinstance(source, (bytes, bytearray)) else source.tell()
+    
+    def read_groups(fences=None):
+        groups = (RunningStats(rng=rng), RunningStats(rng=rng))
+        if start is not None:
+            source.seek(start)
+        column_chunks = _iter_column_chunks(source, file_type, [control_column, variation_column], chunk_size)
+        for chunk_values in column_chunks:
+            for group, values, bounds in zip(groups, chunk_values, fences or (None, None)):
+                if bounds is not None:
+                    values = values[(values >= bounds[0]) & (values <= bounds[1])]
+                group.update(values)
+        if groups[0].count < 2 or groups[1].count < 2:
+            raise ValueError("Each group needs at least two values")
+        return groups
+    
+    control, variation = read_groups()
+    summary_stats = {"control": control.summary(), "variation": variation.summary()}
+    total_outliers = summary_stats["control"]["outliers_count"] + summary_stats["variation"]["outliers_count"]
+    has_outliers = total_outliers > 0
+    
+    summary_message = (
+        f"Analysis summary: Found {control.count} control transactions and "
+        f"{variation.count} variation transactions. "
+    )
+    
+    if exclude_outliers and has_outliers:
+        # Second pass without the values outside the fences of the first one
+        control, variation = read_groups((control.outlier_fences(), variation.outlier_fences()))
+        summary_stats = {"control": control.summary(), "variation": variation.summary()}
+        summary_message += (
+            f"Excluded {total_outliers} outliers from analysis. "
+            f"Now using {control.count} control and {variation.count} variation data points."
+        )
+    elif has_outliers:
+        summary_message += (
+            f"Detected {total_outliers} outliers in the data. "
+            f"Consider using the 'exclude outliers' option for more robust analysis."
+        )
+    else:
+        summary_message += "No outliers detected in the data."
+    
+    return control, variation, summary_stats, summary_message, has_outliers
+
+def analyze_ab_test_data_chunked(
+    file_content: Union[str, bytes, BinaryIO],
+    file_type: str,
+    control_column: Dict[str, Any],
+    variation_column: Dict[str, Any],
+    kpi_type: str,
+    exclude_outliers: bool,
+    users_per_variation: Dict[str, int],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rng: Optional[np.random.Generator] = None,
+    revenue_test: str = 'clt',
+    metrics: Optional[List[str]] = None,
+    raw_data_mode: str = 'full',
+    raw_data_points: int = DEFAULT_RAW_DATA_POINTS
+) -> Dict[str, Any]:
+    """
+    Analysis of A/B test data read in chunks, with bounded memory
+    
+    The file (CSV, Parquet or Arrow) is read `chunk_size` rows at a time and each group is reduced
+    to running moments (count, mean, variance, min, max, sum) plus a fixed-size
+    sample. Conversion rates use the z-test and AOV the Welch t-test computed
+    from these statistics; medians, outlier counts and chart data come from the
+    sample. When outliers are excluded, the file is read a second time with the
+    fences estimated in the first pass. The CLT revenue test only needs the
+    running moments; the bootstrap revenue test needs the values themselves and
+    is not available in this mode.
+    
+    Parameters:
+    -----------
+    Same as analyze_ab_test_data, plus:
+    chunk_size : int
+        Number of rows read per chunk
+    revenue_test : str
+        Test of the total revenue; only 'clt' is available
+        
+    Returns:
+    --------
+    Dict[str, Any]
+        Complete analysis results, in the format of analyze_ab_test_data
+    """
+    if revenue_test != 'clt':
+        raise ValueError("The bootstrap revenue test is not available when reading the file in chunks")
+    
+    try:
+        metric_names = _requested_metrics(kpi_type, metrics)
         
         # Get user counts
         users_control = users_per_variation.get("control", 0)
@@ -666,36 +2393,14 @@ def analyze_ab_test_data(
         if users_control <= 0 or users_variation <= 0:
             raise ValueError("User counts must be positive integers")
         
-        # Analyze data and get summary
-        summary_stats, summary_message, has_outliers = analyze_data(
-            control_data, variation_data, exclude_outliers
+        control, variation, summary_stats, summary_message, has_outliers = _read_chunked_groups(
+            file_content, file_type, control_column, variation_column, exclude_outliers, chunk_size, rng
         )
         
-        # If excluding outliers, update the data arrays
-        if exclude_outliers and has_outliers:
-            control_mask = ~detect_outliers(control_data)
-            variation_mask = ~detect_outliers(variation_data)
-            control_data = control_data[control_mask]
-            variation_data = variation_data[variation_mask]
-        
         # Calculate basic statistics for presentation
         basic_stats = {
-            "control": {
-                "mean": float(np.mean(control_data)),
-                "median": float(np.median(control_data)),
-                "std_dev": float(np.std(control_data, ddof=1)),
-                "count": len(control_data),
-                "min_value": float(np.min(control_data)),
-                "max_value": float(np.max(control_data))
-            },
-            "variation": {
-                "mean": float(np.mean(variation_data)),
-                "median": float(np.median(variation_data)),
-                "std_dev": float(np.std(variation_data, ddof=1)),
-                "count": len(variation_data),
-                "min_value": float(np.min(variation_data)),
-                "max_value": float(np.max(variation_data))
-            }
+            name: {key: value for key, value in group_stats.items() if key != "outliers_count"}
+            for name, group_stats in summary_stats.items()
         }
         
         # Generate interpretation bullet points
@@ -703,85 +2408,60 @@ def analyze_ab_test_data(
             summary_stats["control"], summary_stats["variation"]
         )
         
-        # Calculate all metrics
-        metrics = {}
-        
-        # Conversion metrics
-        metrics["conversion"] = calculate_metrics(
-            control_data, variation_data, "conversion", users_control, users_variation
-        )
-        
-        # AOV metrics
-        metrics["aov"] = calculate_metrics(
-            control_data, variation_data, "aov", users_control, users_variation
-        )
+        metric_results = {}
         
-        # Revenue metrics
-        metrics["revenue"] = calculate_metrics(
-            control_data, variation_data, "revenue", users_control, users_variation
-        )
-        
-        # Generate overall message
-        overall_message = (
-            f"Analysis complete for {kpi_type.upper()} data. "
-            f"Found {len(control_data)} control transactions and {len(variation_data)} variation transactions. "
-        )
+        # Conversion metrics: z-test on conversions out of users
+        if "conversion" in metric_names:
+            metric_results["conversion"] = _metric_result(
+                "conversion", control.count / users_control, variation.count / users_variation,
+                conversion_z_test(control.count, users_control, variation.count, users_variation)
+            )
         
-        if has_outliers:
-            if exclude_outliers:
-                outliers_count = (
-                    summary_stats["control"]["outliers_count"] + 
-                    summary_stats["variation"]["outliers_count"]
-                )
-                overall_message += f"Excluded {outliers_count} outliers from the analysis. "
-            else:
-                overall_message += "Outliers were detected but not excluded from the analysis. "
+        # AOV metrics: Welch t-test from the running moments
+        if "aov" in metric_names:
+            metric_results["aov"] = _metric_result(
+                "aov", control.mean, variation.mean,
+                run_statistical_test_from_stats(summary_stats["control"], summary_stats["variation"], 't-test')
+            )
         
-        # Summarize key findings
-        significant_metrics = []
-        for metric_name, metric in metrics.items():
-            if metric["test_result"]["significant"]:
-                direction = "higher" if metric["uplift"] > 0 else "lower"
-                significant_metrics.append(
-                    f"{metric_name.upper()} is {abs(metric['uplift']):.2f}% {direction} in variation"
+        # Revenue metrics: CLT test on revenue per user from the running moments
+        if "revenue" in metric_names:
+            metric_results["revenue"] = _metric_result(
+                "revenue", control.total, variation.total,
+                run_statistical_test_from_stats(
+                    revenue_per_user_stats(control.count, control.mean, control.m2, users_control),
+                    revenue_per_user_stats(variation.count, variation.mean, variation.m2, users_variation),
+                    'clt'
                 )
+            )
         
-        if significant_metrics:
-            overall_message += "Key findings: " + ", ".join(significant_metrics) + "."
-        else:
-            overall_message += "No statistically significant differences were found."
+        overall_message = _overall_message(
+            kpi_type, control.count, variation.count, has_outliers, exclude_outliers,
+            summary_stats["control"]["outliers_count"] + summary_stats["variation"]["outliers_count"], metric_results
+        )
         
-        # Generate visualization data using the preprocessor
+        # Visualization data from the sampled values
         from .visualization_preprocessor import prepare_visualization_data
+        viz_data = prepare_visualization_data(
+            control.sample.tolist(), variation.sample.tolist(), kpi_type,
+            raw_data_mode=raw_data_mode, raw_data_points=raw_data_points
+        )
         
-        # Convert numpy arrays to python lists for serialization
-        control_list = control_data.tolist()
-        variation_list = variation_data.tolist()
-        
-        # Get visualization data
-        viz_data = prepare_visualization_data(control_list, variation_list, kpi_type)
-        
-        # Return the complete analysis with visualization data
         return {
             "basic_statistics": basic_stats,
             "basic_interpretation": basic_interpretation,
-            "conversion_metrics": metrics["conversion"],
-            "aov_metrics": metrics["aov"],
-            "revenue_metrics": metrics["revenue"],
+            "conversion_metrics": metric_results.get("conversion"),
+            "aov_metrics": metric_results.get("aov"),
+            "revenue_metrics": metric_results.get("revenue"),
             "message": overall_message,
-            "data_summary": {
-                "control_summary": summary_stats["control"],
-                "variation_summary": summary_stats["variation"],
-                "message": summary_message,
-                "has_outliers": has_outliers
-            },
-            # Add visualization data
+            "data_summary": _data_summary(summary_stats, summary_message, has_outliers),
             "raw_data": viz_data.get("raw_data"),
             "quartiles": viz_data.get("quartiles"),
+            "box_plot": viz_data.get("box_plot"),
             "histogram_data": viz_data.get("histogram_data"),
             "frequency_data": viz_data.get("frequency_data")
         }
     
     except Exception as e:
         logger.error(f"Error analyzing data: {str(e)}")
-        raise ValueError(f"Error analyzing data: {str(e)}") 
\ No newline at end of file
+        raise ValueError(f"Error analyzing data: {str(e)}")
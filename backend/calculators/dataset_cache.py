@@ -0,0 +1,220 @@
+"""
+Cache of parsed datasets and of the analysis stages computed on them
+
+The frontend sends the same file to /analyze-data/summary and then to
+/analyze-data/detailed, and toggles options such as exclude_outliers on it.
+Datasets are keyed by a SHA-256 hash of the file content, file type and column
+specification; each entry holds the extracted arrays and the results of the
+analysis stages already computed on them. The cache is bounded in entries and
+in bytes, entries expire after a TTL, and the least recently used entries are
+evicted first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("DATASET_CACHE_MAX_ENTRIES", 16))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("DATASET_CACHE_MAX_MB", 256)) * 1024 * 1024)
+DEFAULT_TTL_SECONDS = float(os.environ.get("DATASET_CACHE_TTL_SECONDS", 900))
+
+# Block size used to hash file objects
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def _nbytes(value):
+    """Approximate memory held by the arrays of a cached value."""
+    if isinstance(value, np.ndarray) or isinstance(getattr(value, "nbytes", None), int):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, float) for item in value[:8]):
+            return 8 * len(value)
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+def dataset_key(file_content, file_type, column_specs):
+    """
+    Key of a dataset: hash of its content, file type and column specification.
+
+    Parameters:
+    -----------
+    file_content : str, bytes or binary file object
+        Content as received (base64 string, raw bytes or open file; an open
+        file is read to the end and rewound)
+    file_type : str
+        Type of the file
+    column_specs : list of dict
+        Specifications of the extracted columns
+
+    Returns:
+    --------
+    str
+        Hex digest identifying the dataset
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([file_type.lower(), column_specs], sort_keys=True).encode())
+    if isinstance(file_content, str):
+        digest.update(b"base64:")
+        digest.update(file_content.encode())
+    elif isinstance(file_content, (bytes, bytearray)):
+        digest.update(b"raw:")
+        digest.update(file_content)
+    else:
+        digest.update(b"raw:")
+        start = file_content.tell()
+        for block in iter(lambda: file_content.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        file_content.seek(start)
+    return digest.hexdigest()
+
+
+class CachedDataset:
+    """Arrays of a dataset and the stage results computed on them."""
+
+    def __init__(self, key, arrays, cache=None):
+        for array in arrays.values():
+            array.flags.writeable = False
+        self.key = key
+        self.arrays = arrays
+        self.stages = {}
+        self.nbytes = _nbytes(arrays)
+        self.created_at = time.monotonic()
+        self._cache = cache
+
+    def stage(self, name, compute):
+        """
+        Result of an analysis stage, computed once per dataset.
+
+        Parameters:
+        -----------
+        name : hashable
+            Stage name and the parameters its result depends on
+        compute : callable
+            Computes the result when it is not cached
+
+        Returns:
+        --------
+        Any
+            Stage result (shared between requests, must not be mutated)
+        """
+        if name in self.stages:
+            if self._cache is not None:
+                self._cache._count("stage_hits")
+            return self.stages[name]
+        result = compute()
+        self.stages[name] = result
+        if self._cache is not None:
+            self._cache._count("stage_misses")
+            self._cache._grow(self, _nbytes(result))
+        return result
+
+
+class DatasetCache:
+    """
+    Thread-safe LRU cache of datasets bounded in entries, bytes and age.
+
+    Parameters:
+    -----------
+    max_entries : int
+        Maximum number of datasets kept
+    max_bytes : int
+        Maximum memory held by the cached arrays and stage results
+    ttl_seconds : float
+        Lifetime of an entry
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stage_hits": 0, "stage_misses": 0, "evictions": 0, "expirations": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+        entry._cache = None
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def _grow(self, entry, nbytes):
+        with self._lock:
+            entry.nbytes += nbytes
+            if self._entries.get(entry.key) is entry:
+                self._bytes += nbytes
+                self._evict()
+
+    def get(self, key):
+        """Cached dataset for a key, or None (expired entries are dropped)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created_at > self.ttl_seconds:
+                self._remove(key)
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry
+
+    def put(self, key, arrays):
+        """
+        Cache the arrays of a dataset.
+
+        Returns:
+        --------
+        CachedDataset
+            The new entry (not retained when it alone exceeds max_bytes)
+        """
+        entry = CachedDataset(key, arrays, self)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if entry.nbytes > self.max_bytes:
+                entry._cache = None
+                return entry
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._evict()
+        return entry
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self):
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Cache shared by the data analysis endpoints
+dataset_cache = DatasetCache()
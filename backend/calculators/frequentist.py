@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from scipy.stats import norm
 
 def calculate_frequentist(visits, conversions, traffic, variations, improvement, confidence):
@@ -61,4 +62,83 @@ def calculate_frequentist(visits, conversions, traffic, variations, improvement,
     return {
         "days": days_needed,
         "minSample": total_sample_size
-    } 
\ No newline at end of file
+    } 
+
+def calculate_frequentist_grid(visits, conversions, traffic, variations, improvement, confidence, power=0.8):
+    """
+    Calculate sample sizes and test durations over a grid of scenarios.
+
+    Every argument from traffic onwards may be a scalar or a 1-D array; the
+    result covers the full Cartesian product, computed with broadcast NumPy
+    operations instead of one call per scenario.
+
+    Parameters:
+    -----------
+    visits : float
+        Daily visits to the website
+    conversions : float
+        Daily conversions
+    traffic : float or array-like
+        Percentage of traffic to include in the test
+    variations : int or array-like
+        Number of test variations (including control)
+    improvement : float or array-like
+        Expected improvement in conversion rate (percentage)
+    confidence : float or array-like
+        Statistical confidence level (percentage)
+    power : float or array-like
+        Statistical power (decimal)
+
+    Returns:
+    --------
+    dict
+        Flattened columns for every grid cell, in C order over
+        (improvement, confidence, power, traffic, variations). Days and
+        sample sizes are NaN where they cannot be computed.
+    """
+    axes = [np.atleast_1d(np.asarray(axis, dtype=float))
+            for axis in (improvement, confidence, power, traffic, variations)]
+    improvement_grid, confidence_grid, power_grid, traffic_grid, variations_grid = np.meshgrid(
+        *axes, indexing='ij', sparse=True
+    )
+
+    # Convert percentage values to decimals
+    p = conversions / visits  # baseline conversion rate
+    traffic_decimal = traffic_grid / 100
+    improvement_decimal = improvement_grid / 100
+
+    # Calculate Z-scores
+    alpha = 1 - (confidence_grid / 100)
+    z_alpha = norm.ppf(1 - alpha/2)  # two-tailed test
+    z_beta = norm.ppf(power_grid)
+
+    # Calculate minimum detectable effect
+    mde = p * improvement_decimal
+
+    # Calculate sample size per variation
+    numerator = (z_alpha + z_beta)**2 * 2 * p * (1 - p)
+    denominator = mde**2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sample_size = np.where(denominator > 0, np.ceil(numerator / denominator), np.nan)
+
+        # Calculate total sample size accounting for number of variations
+        total_sample_size = sample_size * variations_grid
+
+        # Calculate days needed
+        daily_test_visitors = visits * traffic_decimal
+        days_needed = np.where(
+            daily_test_visitors > 0, np.ceil(total_sample_size / daily_test_visitors), np.nan
+        )
+
+    shape = tuple(len(axis) for axis in axes)
+    columns = {
+        name: np.broadcast_to(grid, shape).ravel()
+        for name, grid in zip(
+            ("improvement", "confidence", "power", "traffic", "variations"),
+            (improvement_grid, confidence_grid, power_grid, traffic_grid, variations_grid)
+        )
+    }
+    columns["days"] = np.broadcast_to(days_needed, shape).ravel()
+    columns["minSample"] = np.broadcast_to(total_sample_size, shape).ravel()
+    return columns
@@ -0,0 +1,178 @@
+"""
+Shared per-group statistics kernel
+
+A GroupStats is built once per group and analysis: it sorts the values once
+and computes the moments once, then serves percentiles, medians, outlier
+fences and counts (by binary search in the sorted values), summary statistics
+and outlier-free subsets without sorting again. Results are identical to the
+NumPy calls they replace (np.percentile, np.median, np.mean, np.std). The
+shape moments (skewness, kurtosis) are computed on first use and kept.
+"""
+
+import numpy as np
+
+
+class GroupStats:
+    """
+    Sorted values and moments of one group.
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        Values of the group, in their original order (kept for the
+        order-dependent resampling done by the tests)
+    sorted_values : np.ndarray, optional
+        The same values already sorted, to skip the sort
+    """
+
+    def __init__(self, values, sorted_values=None):
+        self.values = np.asarray(values, dtype=float)
+        self.sorted = np.sort(self.values) if sorted_values is None else sorted_values
+        self.count = len(self.values)
+        self.mean = float(np.mean(self.values)) if self.count else float("nan")
+        self.std_dev = float(np.std(self.values, ddof=1)) if self.count > 1 else float("nan")
+        self._shape_moments = None
+
+    @property
+    def nbytes(self):
+        """Memory held by the values and their sorted copy."""
+        return self.values.nbytes + self.sorted.nbytes
+
+    @property
+    def min_value(self):
+        return float(self.sorted[0])
+
+    @property
+    def max_value(self):
+        return float(self.sorted[-1])
+
+    @property
+    def total(self):
+        return float(np.sum(self.values))
+
+    def shape_moments(self):
+        """Skewness and kurtosis (see shape_moments), computed once."""
+        if self._shape_moments is None:
+            self._shape_moments = shape_moments(self.values, self.mean)
+        return self._shape_moments
+
+    def percentile(self, q):
+        """
+        Percentile(s) with linear interpolation, as np.percentile.
+
+        Parameters:
+        -----------
+        q : float or array-like
+            Percentile(s) between 0 and 100
+
+        Returns:
+        --------
+        float or np.ndarray
+        """
+        quantiles = np.true_divide(np.asarray(q, dtype=float), 100)
+        # Même indice virtuel et même interpolation que np.percentile (méthode 'linear')
+        virtual = np.clip((self.count - 1) * quantiles, 0, self.count - 1)
+        below = np.floor(virtual).astype(np.int64)
+        above = np.minimum(below + 1, self.count - 1)
+        gamma = virtual - below
+        a, b = self.sorted[below], self.sorted[above]
+        diff = b - a
+        result = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+        return float(result) if np.ndim(result) == 0 else result
+
+    @property
+    def median(self):
+        """Median, as np.median."""
+        middle = self.count // 2
+        if self.count % 2:
+            return float(self.sorted[middle])
+        return float(np.mean(self.sorted[middle - 1:middle + 1]))
+
+    def outlier_fences(self, threshold=1.5):
+        """Lower and upper IQR outlier bounds."""
+        q1, q3 = self.percentile([25, 75])
+        iqr = q3 - q1
+        return q1 - threshold * iqr, q3 + threshold * iqr
+
+    def outlier_bounds_indices(self, threshold=1.5):
+        """Slice of the sorted values inside the fences."""
+        lower, upper = self.outlier_fences(threshold)
+        return (
+            int(np.searchsorted(self.sorted, lower, side="left")),
+            int(np.searchsorted(self.sorted, upper, side="right"))
+        )
+
+    def outliers_count(self, threshold=1.5):
+        """Number of values outside the IQR fences."""
+        start, stop = self.outlier_bounds_indices(threshold)
+        return self.count - (stop - start)
+
+    def outlier_mask(self, threshold=1.5):
+        """Boolean mask of outliers in the original order, as detect_outliers."""
+        lower, upper = self.outlier_fences(threshold)
+        return (self.values < lower) | (self.values > upper)
+
+    def without_outliers(self, threshold=1.5):
+        """GroupStats of the values inside the fences, reusing the sorted values."""
+        start, stop = self.outlier_bounds_indices(threshold)
+        if stop - start == self.count:
+            return self
+        return GroupStats(self.values[~self.outlier_mask(threshold)], self.sorted[start:stop])
+
+    def describe(self):
+        """Mean, median, standard deviation, count, min and max."""
+        return {
+            "mean": self.mean,
+            "median": self.median,
+            "std_dev": self.std_dev,
+            "count": self.count,
+            "min_value": self.min_value,
+            "max_value": self.max_value
+        }
+
+    def summary(self):
+        """Summary statistics in the format of calculate_summary_statistics."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "median": self.median,
+            "std_dev": self.std_dev,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "outliers_count": self.outliers_count()
+        }
+
+
+def shape_moments(values, mean=None):
+    """
+    Sample skewness and kurtosis, as scipy.stats.skew and scipy.stats.kurtosis(fisher=False).
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        Values of the group
+    mean : float, optional
+        Their mean, when already known
+
+    Returns:
+    --------
+    tuple
+        (skewness, kurtosis), both biased (population) estimates; NaN for
+        constant values
+    """
+    values = np.asarray(values, dtype=float)
+    if mean is None:
+        mean = np.mean(values)
+    deviations = values - mean
+    squared = deviations * deviations
+    m2 = np.mean(squared)
+    if m2 <= (np.finfo(float).eps * mean) ** 2:
+        return float("nan"), float("nan")
+    m3 = np.mean(squared * deviations)
+    m4 = np.mean(squared * squared)
+    return float(m3 / m2 ** 1.5), float(m4 / m2 ** 2)
+
+
+def as_group_stats(data):
+    """GroupStats of an array, or the GroupStats itself."""
+    return data if isinstance(data, GroupStats) else GroupStats(data)
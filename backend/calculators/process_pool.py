@@ -0,0 +1,73 @@
+"""
+Worker processes shared by the calculators
+
+One process pool serves every request: it is created on first use with the
+'spawn' start method (forking the multi-threaded server process can deadlock)
+and kept, so requests do not pay the startup of new processes. A call splits
+its tasks into at most `workers` contiguous groups, each run in order by one
+worker, which bounds its parallelism without a pool of its own and keeps the
+results in the order of the tasks. shutdown_pool stops the workers when the
+application shuts down.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes of the shared pool
+POOL_WORKERS = int(os.environ.get("CALCULATOR_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Shared process pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _run_group(function, group):
+    return [function(task) for task in group]
+
+
+def map_in_pool(function, tasks, workers):
+    """
+    Run a function on tasks in the shared pool.
+
+    Parameters:
+    -----------
+    function : callable
+        Module-level function taking one task (picklable, as the tasks)
+    tasks : list
+        Arguments of each call
+    workers : int
+        Maximum number of workers used by the call
+
+    Returns:
+    --------
+    list
+        Result of each task, in the order of the tasks
+    """
+    groups = min(workers, POOL_WORKERS, len(tasks))
+    bounds = [len(tasks) * index // groups for index in range(groups + 1)]
+    futures = [
+        _get_pool().submit(_run_group, function, tasks[start:stop])
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    return [result for future in futures for result in future.result()]
+
+
+def shutdown_pool():
+    """Stop the workers of the shared pool (a later call creates a new one)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,51 @@
+"""
+Per-request random number streams
+
+Calculators never touch NumPy's global random state: each request derives its
+own Generator from a seed through SeedSequence, so concurrent requests cannot
+interfere with each other and any result can be reproduced from its seed.
+"""
+
+import hashlib
+import numpy as np
+
+# Seeds are returned in JSON responses, so keep them exact in JavaScript numbers
+MAX_SEED = 2**53
+
+# Seed used when a data analysis request does not provide one
+DEFAULT_ANALYSIS_SEED = 42
+
+
+def create_rng(seed):
+    """
+    Create the random generator of a request.
+
+    Parameters:
+    -----------
+    seed : int
+        Request seed
+
+    Returns:
+    --------
+    np.random.Generator
+        Generator derived from the seed via SeedSequence
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed))
+
+
+def seed_from_parameters(*parameters):
+    """
+    Deterministic seed derived from request parameters.
+
+    Parameters:
+    -----------
+    *parameters
+        Values identifying the request
+
+    Returns:
+    --------
+    int
+        Seed in [0, MAX_SEED)
+    """
+    seed_str = "_".join(str(parameter) for parameter in parameters)
+    return int(hashlib.md5(seed_str.encode()).hexdigest(), 16) % MAX_SEED
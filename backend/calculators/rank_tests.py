@@ -0,0 +1,247 @@
+"""
+Mann-Whitney U test from sorted samples
+
+The U statistic, tie correction, rank-biserial correlation and Hodges-Lehmann
+shift estimate are computed from the two groups already sorted (see
+group_stats), without ranking the concatenated values again: U counts the
+pairs by binary search of one sorted group in the other, ties come from a
+merge of the two sorted runs, and the Hodges-Lehmann estimate (median of all
+pairwise differences) is selected by narrowing a value interval with counts
+of pairs and sampled pairs, without materializing the n1 * n2 differences.
+Groups larger than SHIFT_GRID_SIZE are reduced to evenly spaced order
+statistics for the estimate, so its cost does not grow with the data.
+"""
+
+import numpy as np
+from scipy import stats
+
+# Up to this group size, without ties, SciPy's exact distribution is used, as mannwhitneyu does
+EXACT_MAX_SIZE = 8
+
+# Pairwise differences closer than this fraction of the largest one are considered equal
+RELATIVE_TOLERANCE = 1e-12
+
+# Pairs sampled per round of the Hodges-Lehmann selection
+SELECTION_SAMPLE_SIZE = 1 << 16
+
+# Pairs enumerated at once to finish the Hodges-Lehmann selection, per value of the larger group
+SELECTION_PAIRS_PER_VALUE = 4
+
+# Above this size, a group enters the Hodges-Lehmann estimate as this many evenly spaced order statistics
+SHIFT_GRID_SIZE = 4096
+
+
+def _control_starts(control_sorted, variation_sorted, shift):
+    """Per variation value, index of the first control value with variation - control <= shift."""
+    return np.searchsorted(control_sorted, variation_sorted - shift, side="left")
+
+
+def _pairs_at_most(control_sorted, starts):
+    """Number of pairs with variation - control <= shift, from _control_starts."""
+    return int(len(control_sorted) * len(starts) - starts.sum())
+
+
+def _pairs_below(control_sorted, variation_sorted, shift):
+    """Number of pairs with variation - control < shift."""
+    above = np.searchsorted(control_sorted, variation_sorted - shift, side="right")
+    return int(len(control_sorted) * len(variation_sorted) - above.sum())
+
+
+def _next_pair_difference(control_sorted, variation_sorted, shift):
+    """Smallest difference variation - control above shift (inf when there is none)."""
+    stop = _control_starts(control_sorted, variation_sorted, shift)
+    valid = stop > 0
+    if not valid.any():
+        return np.inf
+    return float(np.min(variation_sorted[valid] - control_sorted[stop[valid] - 1]))
+
+
+def _sample_pair_differences(control_sorted, variation_sorted, starts_upper, starts_lower, size, rng):
+    """Differences of `size` pairs drawn uniformly among those between two bounds."""
+    lengths = starts_lower - starts_upper
+    ends = np.cumsum(lengths)
+    draws = rng.integers(0, ends[-1], size)
+    rows = np.searchsorted(ends, draws, side="right")
+    columns = starts_upper[rows] + draws - (ends[rows] - lengths[rows])
+    return variation_sorted[rows] - control_sorted[columns]
+
+
+def _select_pair_difference(control_sorted, variation_sorted, rank):
+    """
+    Value of rank `rank` (0-based) among the sorted differences variation - control.
+
+    Narrows a value interval around it with the quantiles of pairs sampled
+    inside the interval (each round keeps about 1 / sqrt(SELECTION_SAMPLE_SIZE)
+    of the pairs), then enumerates the few pairs left. A sample tied at the
+    upper bound ends the search when that value is the answer; otherwise a
+    round without progress bisects and jumps to the next actual difference.
+    Differences closer than RELATIVE_TOLERANCE of the data range are
+    treated as equal (they only differ by rounding). The sampling generator
+    has a fixed seed, so the result is deterministic.
+    """
+    n1, n2 = len(control_sorted), len(variation_sorted)
+    # Bounds widened past the extreme differences so rounding cannot put a pair outside
+    lowest = float(variation_sorted[0] - control_sorted[-1])
+    highest = float(variation_sorted[-1] - control_sorted[0])
+    tolerance = RELATIVE_TOLERANCE * max(abs(lowest), abs(highest), np.finfo(float).tiny)
+    lower = lowest - (highest - lowest) - 1
+    upper = highest + (highest - lowest) + 1
+    starts_lower = _control_starts(control_sorted, variation_sorted, lower)
+    starts_upper = _control_starts(control_sorted, variation_sorted, upper)
+    count_lower = _pairs_at_most(control_sorted, starts_lower)
+    count_upper = _pairs_at_most(control_sorted, starts_upper)
+    limit = SELECTION_PAIRS_PER_VALUE * max(n1, n2)
+    rng = np.random.default_rng(0)
+
+    while count_upper - count_lower > limit:
+        if upper - lower <= tolerance:
+            return min(_next_pair_difference(control_sorted, variation_sorted, lower), upper)
+        gap = count_upper - count_lower
+        sample = _sample_pair_differences(
+            control_sorted, variation_sorted, starts_upper, starts_lower, SELECTION_SAMPLE_SIZE, rng
+        )
+        # Sample quantiles bracketing the rank with a margin of about 3 standard errors
+        fraction = (rank + 0.5 - count_lower) / gap
+        margin = 3 * np.sqrt(fraction * (1 - fraction) / SELECTION_SAMPLE_SIZE) + 1 / SELECTION_SAMPLE_SIZE
+        positions = np.clip(np.array([fraction - margin, fraction + margin]) * SELECTION_SAMPLE_SIZE, 0,
+                            SELECTION_SAMPLE_SIZE - 1).astype(np.int64)
+        quantiles = np.unique(np.partition(sample, positions)[positions])
+        for candidate in quantiles:
+            if lower < candidate < upper:
+                starts = _control_starts(control_sorted, variation_sorted, candidate)
+                count = _pairs_at_most(control_sorted, starts)
+                if count > rank:
+                    upper, starts_upper, count_upper = candidate, starts, count
+                else:
+                    lower, starts_lower, count_lower = candidate, starts, count
+        if len(quantiles) == 1 and quantiles[0] == upper:
+            # Sample tied at the upper bound: it is the answer unless more pairs lie strictly below
+            if _pairs_below(control_sorted, variation_sorted, upper) <= rank:
+                return upper
+
+        if count_upper - count_lower > gap / 2:
+            # No progress (unlucky sample or ties below the bound): bisect, then the
+            # next difference above the lower bound is the answer when it reaches the rank
+            middle = lower + (upper - lower) / 2
+            if not lower < middle < upper:
+                return upper
+            starts = _control_starts(control_sorted, variation_sorted, middle)
+            count = _pairs_at_most(control_sorted, starts)
+            if count > rank:
+                upper, starts_upper, count_upper = middle, starts, count
+            else:
+                lower, starts_lower, count_lower = middle, starts, count
+            following = _next_pair_difference(control_sorted, variation_sorted, lower)
+            if following < upper:
+                starts = _control_starts(control_sorted, variation_sorted, following)
+                count = _pairs_at_most(control_sorted, starts)
+                if count > rank:
+                    return following
+                lower, starts_lower, count_lower = following, starts, count
+
+    # Enumerate the pairs with lower < difference <= upper
+    lengths = starts_lower - starts_upper
+    offsets = np.repeat(starts_upper - (np.cumsum(lengths) - lengths), lengths)
+    control_index = offsets + np.arange(lengths.sum())
+    differences = np.repeat(variation_sorted, lengths) - control_sorted[control_index]
+    position = rank - count_lower
+    return float(np.partition(differences, position)[position])
+
+
+def _order_statistics_grid(values_sorted, size):
+    """Order statistics at the midpoints of `size` equal-count strata (all values when there are fewer)."""
+    n = len(values_sorted)
+    if n <= size:
+        return values_sorted
+    return values_sorted[((np.arange(size) + 0.5) * (n / size)).astype(np.intp)]
+
+
+def hodges_lehmann_shift(control_sorted, variation_sorted, grid_size=SHIFT_GRID_SIZE):
+    """
+    Hodges-Lehmann estimate of the shift: median of all differences variation - control.
+
+    Groups larger than grid_size are replaced by grid_size evenly spaced order
+    statistics: the median of their pairwise differences differs from the
+    exact one by a small fraction of its standard error, in a time that does
+    not depend on the group sizes.
+
+    Parameters:
+    -----------
+    control_sorted, variation_sorted : np.ndarray
+        Sorted values of each group
+    grid_size : int, optional
+        Largest group size computed exactly (None computes every size exactly)
+
+    Returns:
+    --------
+    float
+        Median of the n1 * n2 pairwise differences
+    """
+    if grid_size is not None:
+        control_sorted = _order_statistics_grid(control_sorted, grid_size)
+        variation_sorted = _order_statistics_grid(variation_sorted, grid_size)
+    total = len(control_sorted) * len(variation_sorted)
+    middle = _select_pair_difference(control_sorted, variation_sorted, (total - 1) // 2)
+    if total % 2:
+        return middle
+    return (middle + _select_pair_difference(control_sorted, variation_sorted, total // 2)) / 2
+
+
+def _tie_term(control_sorted, variation_sorted):
+    """Sum of t^3 - t over the groups of tied values of the pooled sample."""
+    pooled = np.concatenate([control_sorted, variation_sorted])
+    # Two sorted runs: the stable sort merges them in linear time
+    pooled.sort(kind="stable")
+    boundaries = np.flatnonzero(np.diff(pooled)) + 1
+    ties = np.diff(np.concatenate([[0], boundaries, [len(pooled)]])).astype(float)
+    return float(np.sum(ties ** 3 - ties))
+
+
+def mann_whitney_sorted(control_sorted, variation_sorted):
+    """
+    Two-sided Mann-Whitney U test from sorted groups.
+
+    Same statistic and p-value as scipy.stats.mannwhitneyu(control, variation,
+    alternative='two-sided'): normal approximation with tie and continuity
+    corrections, and SciPy's exact test for small groups without ties.
+
+    Parameters:
+    -----------
+    control_sorted, variation_sorted : np.ndarray
+        Sorted values of each group
+
+    Returns:
+    --------
+    dict
+        'u_stat' (U of the control group), 'p_value', 'effect_size'
+        (rank-biserial correlation 1 - 2U / (n1 n2)) and 'shift_estimate'
+        (Hodges-Lehmann estimate of variation - control, see hodges_lehmann_shift)
+    """
+    n1, n2 = len(control_sorted), len(variation_sorted)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("The Mann-Whitney test needs values in both groups")
+
+    # U of the control group: pairs where control > variation, ties counting half
+    below = np.searchsorted(variation_sorted, control_sorted, side="left")
+    at_most = np.searchsorted(variation_sorted, control_sorted, side="right")
+    u_stat = float(below.sum() + 0.5 * (at_most - below).sum())
+
+    tie_term = _tie_term(control_sorted, variation_sorted)
+    if min(n1, n2) <= EXACT_MAX_SIZE and tie_term == 0:
+        p_value = float(stats.mannwhitneyu(control_sorted, variation_sorted, alternative="two-sided").pvalue)
+    else:
+        n = n1 + n2
+        mean = n1 * n2 / 2
+        sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        if sigma == 0:
+            p_value = 1.0
+        else:
+            z_stat = (max(u_stat, n1 * n2 - u_stat) - mean - 0.5) / sigma
+            p_value = float(min(1.0, 2 * stats.norm.sf(z_stat)))
+
+    return {
+        "u_stat": u_stat,
+        "p_value": p_value,
+        "effect_size": 1 - (2 * u_stat) / (n1 * n2),
+        "shift_estimate": hodges_lehmann_shift(control_sorted, variation_sorted)
+    }
@@ -0,0 +1,249 @@
+"""
+Per-segment statistics and tests in one grouped pass
+
+A SegmentedGroup holds the values of one group with the segment of each
+value, sorted once by (segment, value) with a radix sort of the segments then
+a sort of each segment's run: counts, sums and squared deviations per segment
+come from np.bincount, and medians, quartiles, outlier fences, minimums and
+maximums from positions in the sorted runs, for all segments at once. The tests compare the segments of two groups from these
+sufficient statistics (two-proportion z-test, Welch t-test, normal test on the
+revenue per user) with array operations, without a loop over the segments.
+Per segment, the summaries match those of GroupStats on the segment's values.
+"""
+
+import numpy as np
+from scipy import stats
+
+
+class SegmentedGroup:
+    """
+    Values of one group sorted by segment then value, with per-segment moments.
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        Values of the group
+    codes : np.ndarray
+        Segment of each value, between 0 and n_segments - 1
+    n_segments : int
+        Number of segments
+    presorted : bool
+        Whether the values are already sorted by (segment, value), to skip the sort
+    """
+
+    def __init__(self, values, codes, n_segments, presorted=False):
+        values = np.asarray(values, dtype=float)
+        codes = np.asarray(codes, dtype=np.intp)
+        if not presorted:
+            # Stable radix sort of the segments (16-bit codes when they fit), then a sort of each run
+            small = np.int16 if n_segments <= np.iinfo(np.int16).max else np.intp
+            order = np.argsort(codes.astype(small), kind="stable")
+            values, codes = values[order], codes[order]
+        self.sorted = values
+        self.codes = codes
+        self.n_segments = n_segments
+        self.counts = np.bincount(codes, minlength=n_segments)
+        self.starts = np.cumsum(self.counts) - self.counts
+        if not presorted:
+            for start, stop in zip(self.starts, self.starts + self.counts):
+                values[start:stop].sort()
+        self.totals = np.bincount(codes, weights=values, minlength=n_segments)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.means = self.totals / self.counts
+            # Second pass on the deviations from the segment means, as np.var
+            deviations = values - self.means[codes]
+            self.m2 = np.bincount(codes, weights=deviations * deviations, minlength=n_segments)
+            self.std_devs = np.where(self.counts > 1, np.sqrt(self.m2 / (self.counts - 1)), np.nan)
+
+    @property
+    def nbytes(self):
+        """Memory held by the sorted values and their segments."""
+        return self.sorted.nbytes + self.codes.nbytes
+
+    def _at(self, offsets):
+        """Sorted value at an offset of each segment's run, NaN for empty segments."""
+        empty = self.counts == 0
+        index = np.minimum(self.starts + offsets, max(len(self.sorted) - 1, 0))
+        if len(self.sorted) == 0:
+            return np.full(self.n_segments, np.nan)
+        return np.where(empty, np.nan, self.sorted[index])
+
+    @property
+    def min_values(self):
+        return self._at(0)
+
+    @property
+    def max_values(self):
+        return self._at(self.counts - 1)
+
+    def percentile(self, q):
+        """
+        Percentile of each segment with linear interpolation, as GroupStats.percentile.
+
+        Parameters:
+        -----------
+        q : float
+            Percentile between 0 and 100
+
+        Returns:
+        --------
+        np.ndarray
+            Percentile of each segment (NaN for empty segments)
+        """
+        last = np.maximum(self.counts - 1, 0)
+        virtual = np.clip(last * (q / 100), 0, last)
+        below = np.floor(virtual).astype(np.intp)
+        above = np.minimum(below + 1, last)
+        gamma = virtual - below
+        a, b = self._at(below), self._at(above)
+        diff = b - a
+        return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+    @property
+    def medians(self):
+        """Median of each segment, as np.median."""
+        middle = self.counts // 2
+        upper = self._at(middle)
+        lower = self._at(np.maximum(middle - 1, 0))
+        return np.where(self.counts % 2 == 1, upper, (lower + upper) / 2)
+
+    def outlier_fences(self, threshold=1.5):
+        """Lower and upper IQR outlier bounds of each segment."""
+        q1, q3 = self.percentile(25), self.percentile(75)
+        iqr = q3 - q1
+        return q1 - threshold * iqr, q3 + threshold * iqr
+
+    def outlier_mask(self, threshold=1.5):
+        """Boolean mask of the sorted values outside the fences of their segment."""
+        lower, upper = self.outlier_fences(threshold)
+        return (self.sorted < lower[self.codes]) | (self.sorted > upper[self.codes])
+
+    def outliers_counts(self, threshold=1.5):
+        """Number of values outside the IQR fences, per segment."""
+        return np.bincount(self.codes[self.outlier_mask(threshold)], minlength=self.n_segments)
+
+    def without_outliers(self, threshold=1.5):
+        """SegmentedGroup of the values inside the fences of their segment, without sorting again."""
+        keep = ~self.outlier_mask(threshold)
+        if keep.all():
+            return self
+        return SegmentedGroup(self.sorted[keep], self.codes[keep], self.n_segments, presorted=True)
+
+    def summary(self):
+        """Summary statistics of each segment, as arrays in the format of GroupStats.summary."""
+        return {
+            "count": self.counts,
+            "mean": self.means,
+            "median": self.medians,
+            "std_dev": self.std_devs,
+            "min_value": self.min_values,
+            "max_value": self.max_values,
+            "outliers_count": self.outliers_counts()
+        }
+
+
+def _test_result(test_name, p_value, alpha):
+    """P-values, confidences and significance of a test run on every segment."""
+    return {
+        "test_name": test_name,
+        "p_value": p_value,
+        "confidence": (1 - p_value) * 100,
+        "significant": p_value < alpha
+    }
+
+
+def conversion_z_tests(conversions_control, users_control, conversions_variation, users_variation, alpha=0.05):
+    """
+    Two-proportion z-test of every segment, as conversion_z_test.
+
+    Parameters:
+    -----------
+    conversions_control, conversions_variation : np.ndarray
+        Number of converted users of each segment in each group
+    users_control, users_variation : np.ndarray
+        Number of users of each segment in each group (positive)
+    alpha : float
+        Significance level
+
+    Returns:
+    --------
+    dict
+        'test_name', and 'p_value', 'confidence' and 'significant' arrays
+    """
+    n1, n2 = users_control, users_variation
+    p1, p2 = conversions_control / n1, conversions_variation / n2
+    p_pooled = (conversions_control + conversions_variation) / (n1 + n2)
+    se = np.sqrt(p_pooled * (1 - p_pooled) * (1 / n1 + 1 / n2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z_stat = (p2 - p1) / se
+    # Handle division by zero
+    p_value = np.where(se > 0, 2 * stats.norm.sf(np.abs(z_stat)), 1.0)
+    return _test_result("z-test", p_value, alpha)
+
+
+def welch_t_tests(control, variation, alpha=0.05):
+    """
+    Welch t-test of every segment, as scipy.stats.ttest_ind_from_stats(equal_var=False).
+
+    Parameters:
+    -----------
+    control, variation : SegmentedGroup
+        Segmented values of each group
+    alpha : float
+        Significance level
+
+    Returns:
+    --------
+    dict
+        'test_name', and 'p_value', 'confidence' and 'significant' arrays
+        (NaN p-values for segments with fewer than two values in a group)
+    """
+    n1, n2 = control.counts, variation.counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        v1 = control.std_devs ** 2 / n1
+        v2 = variation.std_devs ** 2 / n2
+        se = np.sqrt(v1 + v2)
+        t_stat = (variation.means - control.means) / se
+        df = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+        p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+    # Handle division by zero (identical constant groups)
+    p_value = np.where(se == 0, 1.0, p_value)
+    return _test_result("t-test", p_value, alpha)
+
+
+def revenue_per_user_tests(control, variation, users_control, users_variation, alpha=0.05):
+    """
+    Normal test on the revenue per assigned user of every segment, as the 'clt' revenue test.
+
+    Users without a transaction count as zeros (see revenue_per_user_stats).
+
+    Parameters:
+    -----------
+    control, variation : SegmentedGroup
+        Segmented transaction values of each group
+    users_control, users_variation : np.ndarray
+        Number of users of each segment in each group (at least two, and at
+        least the number of transactions)
+    alpha : float
+        Significance level
+
+    Returns:
+    --------
+    dict
+        'test_name', and 'p_value', 'confidence' and 'significant' arrays
+    """
+    def per_user(group, users):
+        # Merge the users without a transaction as a group of zeros
+        user_mean = group.totals / users
+        mean = np.where(group.counts > 0, group.means, 0.0)
+        user_m2 = group.m2 + group.counts * (mean - user_mean) ** 2 + (users - group.counts) * user_mean ** 2
+        return user_mean, user_m2 / (users - 1)
+
+    mean1, var1 = per_user(control, users_control)
+    mean2, var2 = per_user(variation, users_variation)
+    se = np.sqrt(var1 / users_control + var2 / users_variation)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z_stat = (mean2 - mean1) / se
+    # Handle division by zero
+    p_value = np.where(se > 0, 2 * stats.norm.sf(np.abs(z_stat)), 1.0)
+    return _test_result("clt", p_value, alpha)
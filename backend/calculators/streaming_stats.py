@@ -0,0 +1,163 @@
+"""
+Online summary statistics for chunked data ingestion
+
+Accumulates count, mean, variance, min, max and sum of a stream of chunks with
+the pairwise update of Chan et al. (the batched form of Welford's algorithm),
+so large files can be summarized with memory bounded by the chunk size. A
+fixed-size uniform reservoir sample is kept next to the moments for the
+statistics that need the values themselves (median, quartiles, charts).
+"""
+
+import numpy as np
+import pandas as pd
+
+# Values kept per group for medians, outlier fences and charts
+RESERVOIR_SIZE = 100_000
+
+# Rows per chunk when none is requested
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class RunningStats:
+    """
+    Numerically stable running moments of a stream of values.
+
+    Parameters:
+    -----------
+    reservoir_size : int
+        Number of values kept as a uniform sample of the stream (0 disables it)
+    rng : np.random.Generator, optional
+        Random generator used to maintain the reservoir
+    """
+
+    def __init__(self, reservoir_size=RESERVOIR_SIZE, rng=None):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min_value = np.inf
+        self.max_value = -np.inf
+        self.reservoir_size = reservoir_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._reservoir = np.empty(reservoir_size)
+        self._filled = 0
+
+    def update(self, values):
+        """Merge a chunk of values into the running statistics."""
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n == 0:
+            return self
+
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(np.sum((values - chunk_mean) ** 2))
+        self._merge_moments(n, chunk_mean, chunk_m2)
+        self.total += float(values.sum())
+        self.min_value = min(self.min_value, float(values.min()))
+        self.max_value = max(self.max_value, float(values.max()))
+        self._sample(values, self.count - n)
+        return self
+
+    def merge(self, other):
+        """Merge the statistics of another stream (its reservoir is not merged)."""
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2)
+            self.total += other.total
+            self.min_value = min(self.min_value, other.min_value)
+            self.max_value = max(self.max_value, other.max_value)
+        return self
+
+    def _merge_moments(self, n, mean, m2):
+        total_count = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total_count
+        self.m2 += m2 + delta ** 2 * self.count * n / total_count
+        self.count = total_count
+
+    def _sample(self, values, seen):
+        """Algorithm R applied to a whole chunk: value i replaces a random slot with probability size / (seen + i + 1)."""
+        if self.reservoir_size == 0:
+            return
+        fill = min(self.reservoir_size - self._filled, len(values))
+        if fill > 0:
+            self._reservoir[self._filled:self._filled + fill] = values[:fill]
+            self._filled += fill
+        rest = values[fill:]
+        if len(rest):
+            positions = seen + fill + np.arange(1, len(rest) + 1)
+            slots = self.rng.integers(0, positions)
+            kept = slots < self.reservoir_size
+            self._reservoir[slots[kept]] = rest[kept]
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def std_dev(self):
+        """Sample standard deviation (ddof=1)."""
+        return float(np.sqrt(self.variance))
+
+    @property
+    def sample(self):
+        """Uniform sample of the values seen (all of them while the stream fits the reservoir)."""
+        return self._reservoir[:self._filled]
+
+    @property
+    def is_exact(self):
+        """Whether the sample holds every value of the stream."""
+        return self._filled == self.count
+
+    def outlier_fences(self, threshold=1.5):
+        """IQR outlier bounds estimated from the sample."""
+        q1, q3 = np.percentile(self.sample, [25, 75])
+        iqr = q3 - q1
+        return q1 - threshold * iqr, q3 + threshold * iqr
+
+    def summary(self):
+        """
+        Summary statistics in the format of calculate_summary_statistics.
+
+        The median and the outlier count come from the sample, so they are
+        estimates once the stream outgrows the reservoir.
+        """
+        sample = self.sample
+        lower, upper = self.outlier_fences()
+        outlier_share = float(np.mean((sample < lower) | (sample > upper)))
+        return {
+            "count": self.count,
+            "mean": float(self.mean),
+            "median": float(np.median(sample)),
+            "std_dev": self.std_dev,
+            "min_value": float(self.min_value),
+            "max_value": float(self.max_value),
+            "outliers_count": int(round(outlier_share * self.count))
+        }
+
+
+def iter_csv_column_chunks(source, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read numeric columns of a CSV file chunk by chunk.
+
+    Parameters:
+    -----------
+    source : file object
+        Open binary CSV file
+    columns : list of callable
+        One extractor per requested column, called with each chunk DataFrame
+        and returning its values
+    chunk_size : int
+        Rows read per chunk
+
+    Yields:
+    -------
+    list of np.ndarray
+        Values of each column in the chunk, without missing values
+    """
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        values = []
+        for extract in columns:
+            column = pd.to_numeric(pd.Series(extract(chunk)), errors="coerce").to_numpy(dtype=float)
+            values.append(column[~np.isnan(column)])
+        yield values
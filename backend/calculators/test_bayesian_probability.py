@@ -0,0 +1,88 @@
+"""
+Agreement of the deterministic P(B > A) evaluations with each other and with adaptive quadrature
+"""
+
+import numpy as np
+import pytest
+from scipy import integrate
+from scipy.stats import beta as beta_dist
+
+from .bayesian_probability import (
+    prob_b_beats_a,
+    prob_b_beats_a_closed_form,
+    prob_b_beats_a_normal,
+    prob_b_beats_a_quadrature,
+)
+
+# (alpha_a, beta_a, alpha_b, beta_b) with integer shapes, from tiny to sizing-scale posteriors
+INTEGER_POSTERIORS = [
+    (1, 1, 1, 1),
+    (2, 8, 3, 7),
+    (11, 90, 15, 86),
+    (30, 970, 42, 958),
+    (301, 9700, 345, 9656),
+    (1500, 48500, 1590, 48410),
+]
+
+# Fractional shapes, as with the Jeffreys prior and expected conversions
+FRACTIONAL_POSTERIORS = [
+    (0.5, 0.5, 0.5, 0.5),
+    (3.5, 97.5, 5.5, 95.5),
+    (300.5, 9700.5, 330.2, 9670.8),
+    (1200.5, 38800.5, 1260.6, 38740.4),
+]
+
+
+def _adaptive_quadrature(alpha_a, beta_a, alpha_b, beta_b):
+    value, _ = integrate.quad(
+        lambda x: beta_dist.pdf(x, alpha_b, beta_b) * beta_dist.cdf(x, alpha_a, beta_a),
+        0, 1, limit=500, epsabs=1e-13, epsrel=1e-11,
+        points=[alpha_a / (alpha_a + beta_a), alpha_b / (alpha_b + beta_b)]
+    )
+    return value
+
+
+@pytest.mark.parametrize("params", INTEGER_POSTERIORS)
+def test_quadrature_matches_closed_form(params):
+    assert prob_b_beats_a_quadrature(*params) == pytest.approx(prob_b_beats_a_closed_form(*params), abs=1e-9)
+
+
+@pytest.mark.parametrize("params", INTEGER_POSTERIORS[:4])
+def test_closed_form_matches_adaptive_quadrature(params):
+    assert prob_b_beats_a_closed_form(*params) == pytest.approx(_adaptive_quadrature(*params), abs=1e-9)
+
+
+@pytest.mark.parametrize("params", FRACTIONAL_POSTERIORS)
+def test_quadrature_of_fractional_shapes(params):
+    assert prob_b_beats_a_quadrature(*params) == pytest.approx(_adaptive_quadrature(*params), abs=1e-8)
+
+
+@pytest.mark.parametrize("params", INTEGER_POSTERIORS + FRACTIONAL_POSTERIORS)
+def test_complementary_orders_sum_to_one(params):
+    alpha_a, beta_a, alpha_b, beta_b = params
+    total = prob_b_beats_a(alpha_a, beta_a, alpha_b, beta_b) + prob_b_beats_a(alpha_b, beta_b, alpha_a, beta_a)
+    assert total == pytest.approx(1.0, abs=1e-9)
+
+
+def test_exact_uses_the_closed_form_on_either_integer_alpha():
+    # Integer alpha on the control only: evaluated as 1 - P(A > B)
+    params = (30, 970.5, 42.5, 958.5)
+    assert prob_b_beats_a(*params) == pytest.approx(1 - prob_b_beats_a_closed_form(42.5, 958.5, 30, 970.5), abs=1e-12)
+    assert prob_b_beats_a(*params) == pytest.approx(prob_b_beats_a_quadrature(*params), abs=1e-9)
+
+
+def test_normal_approximation_on_large_posteriors():
+    params = INTEGER_POSTERIORS[-1]
+    assert prob_b_beats_a_normal(*params) == pytest.approx(prob_b_beats_a_closed_form(*params), abs=2e-3)
+
+
+def test_closed_form_needs_an_integer_alpha():
+    with pytest.raises(ValueError):
+        prob_b_beats_a(0.5, 0.5, 0.5, 0.5, method="closed_form")
+    with pytest.raises(ValueError):
+        prob_b_beats_a(1, 1, 1, 1, method="unknown")
+
+
+def test_probabilities_are_monotonic_in_the_variation_successes():
+    values = [prob_b_beats_a(300.5, 9700.5, 300.5 + extra, 9700.5 - extra) for extra in np.arange(0, 60, 10)]
+    assert all(low < high for low, high in zip(values, values[1:]))
@@ -0,0 +1,79 @@
+"""
+Agreement of the block bootstrap with the per-resample loop it replaced
+
+The loop drew each resample with a separate choice call (first from the
+global np.random state, then from the request generator, alternating the
+control and variation groups), so no block layout can reproduce its draws
+one for one: the distributions of the bootstrap sums are compared instead.
+"""
+
+import numpy as np
+import pytest
+
+from . import bootstrap, process_pool
+from .bootstrap import bootstrap_sums
+from .random_streams import create_rng
+
+RESAMPLES = 4000
+
+
+def _loop_sums(values, resamples, rng):
+    """Reference: one resample with replacement per iteration, as the original revenue test."""
+    sums = np.zeros(resamples)
+    for i in range(resamples):
+        sums[i] = np.sum(rng.choice(values, size=len(values), replace=True))
+    return sums
+
+
+def _values(kind, n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(3.5, 1.0, n)
+    if kind == "prices":
+        # Few distinct amounts: resampled as multinomial counts
+        values = rng.choice([9.99, 19.99, 29.99, 49.99, 99.99], size=n, p=[0.4, 0.3, 0.15, 0.1, 0.05])
+    return values
+
+
+@pytest.mark.parametrize("kind, memory_bytes", [
+    ("continuous", None),
+    ("prices", None),
+    # Ceiling below one resample: drawn in column blocks
+    ("continuous", 4096),
+])
+def test_matches_the_loop_within_monte_carlo_error(kind, memory_bytes):
+    values = _values(kind)
+    blocks = bootstrap_sums(values, RESAMPLES, create_rng(7), memory_bytes=memory_bytes, workers=1)
+    loop = _loop_sums(values, RESAMPLES, create_rng(7))
+
+    # Standard deviation of the sum of n values drawn with replacement
+    sd = np.sqrt(len(values)) * np.std(values)
+    mean_tolerance = 4 * sd * np.sqrt(2 / RESAMPLES)
+    assert blocks.mean() == pytest.approx(loop.mean(), abs=mean_tolerance)
+    assert blocks.mean() == pytest.approx(values.sum(), abs=4 * sd / np.sqrt(RESAMPLES))
+    # Relative standard error of a standard deviation estimate: about 1 / sqrt(2 R)
+    assert blocks.std(ddof=1) == pytest.approx(loop.std(ddof=1), rel=4 / np.sqrt(RESAMPLES))
+    assert blocks.std(ddof=1) == pytest.approx(sd, rel=4 / np.sqrt(2 * RESAMPLES))
+
+
+def test_same_seed_gives_the_same_sums():
+    values = _values("continuous")
+    first = bootstrap_sums(values, 1200, create_rng(3), workers=1)
+    assert np.array_equal(first, bootstrap_sums(values, 1200, create_rng(3), workers=1))
+    assert not np.array_equal(first, bootstrap_sums(values, 1200, create_rng(4), workers=1))
+
+
+def test_results_do_not_depend_on_the_worker_count(monkeypatch):
+    monkeypatch.setattr(bootstrap, "PARALLEL_MIN_DRAWS", 0)
+    values = _values("continuous", n=500)
+    serial = bootstrap_sums(values, 1200, create_rng(5), workers=1)
+    try:
+        assert np.array_equal(serial, bootstrap_sums(values, 1200, create_rng(5), workers=2))
+    finally:
+        process_pool.shutdown_pool()
+
+
+def test_invalid_inputs_are_rejected():
+    with pytest.raises(ValueError):
+        bootstrap_sums(np.array([]), 100)
+    with pytest.raises(ValueError):
+        bootstrap_sums(np.array([1.0, 2.0]), 0)
@@ -0,0 +1,62 @@
+"""
+Parity of the sorted-sample Mann-Whitney test with SciPy
+"""
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from .rank_tests import SHIFT_GRID_SIZE, hodges_lehmann_shift, mann_whitney_sorted
+
+
+def _groups(kind, n1, n2, seed=0):
+    rng = np.random.default_rng(seed)
+    control = rng.lognormal(3.0, 1.0, n1)
+    variation = rng.lognormal(3.1, 1.0, n2)
+    if kind == "ties":
+        # Rounded amounts: many values tied within and across the groups
+        control, variation = np.round(control / 5) * 5, np.round(variation / 5) * 5
+    elif kind == "constant":
+        control, variation = np.full(n1, 10.0), np.full(n2, 10.0)
+    return control, variation
+
+
+@pytest.mark.parametrize("kind, n1, n2", [
+    ("continuous", 5, 7),
+    ("continuous", 8, 30),
+    ("continuous", 200, 150),
+    ("continuous", 3000, 5000),
+    ("ties", 6, 8),
+    ("ties", 200, 150),
+    ("ties", 3000, 5000),
+    ("constant", 50, 40),
+])
+def test_matches_scipy_mannwhitneyu(kind, n1, n2):
+    control, variation = _groups(kind, n1, n2)
+    result = mann_whitney_sorted(np.sort(control), np.sort(variation))
+    expected = stats.mannwhitneyu(control, variation, alternative="two-sided")
+
+    assert result["u_stat"] == pytest.approx(expected.statistic, rel=1e-12)
+    assert result["p_value"] == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-300)
+    assert result["effect_size"] == pytest.approx(1 - 2 * expected.statistic / (n1 * n2), rel=1e-12, abs=1e-15)
+
+
+@pytest.mark.parametrize("kind, n1, n2", [("continuous", 7, 9), ("continuous", 300, 400), ("ties", 300, 400)])
+def test_shift_is_the_median_pairwise_difference(kind, n1, n2):
+    control, variation = _groups(kind, n1, n2, seed=1)
+    expected = np.median(np.subtract.outer(variation, control))
+    assert hodges_lehmann_shift(np.sort(control), np.sort(variation)) == pytest.approx(expected, rel=1e-12)
+
+
+def test_shift_of_large_groups_stays_close_to_the_exact_value():
+    control, variation = _groups("continuous", 5 * SHIFT_GRID_SIZE, 6 * SHIFT_GRID_SIZE, seed=2)
+    control, variation = np.sort(control), np.sort(variation)
+    exact = hodges_lehmann_shift(control, variation, grid_size=None)
+    approximate = hodges_lehmann_shift(control, variation)
+    # Far below the standard error of the estimate (about 1% of the shift here)
+    assert approximate == pytest.approx(exact, rel=1e-3)
+
+
+def test_empty_group_is_rejected():
+    with pytest.raises(ValueError):
+        mann_whitney_sorted(np.array([]), np.array([1.0, 2.0]))
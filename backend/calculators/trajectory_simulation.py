@@ -0,0 +1,192 @@
+"""
+Monte Carlo simulation of experiment trajectories
+
+Simulates many experiments day by day (cumulative binomial conversions per
+arm), computes the observed confidence of a two-proportion z-test at each
+daily checkpoint, and summarizes the runs into percentile bands. A second
+set of runs without any true effect measures how often peeking at the test
+every day declares a false "win".
+"""
+
+import math
+import os
+
+import numpy as np
+from scipy.special import ndtr
+
+from .frequentist import calculate_frequentist
+from .process_pool import map_in_pool
+from .random_streams import create_rng
+
+# Runs simulated per shard; fixed so that results do not depend on the worker count
+SHARD_RUNS = 1000
+
+# Longest simulated horizon
+MAX_SIMULATION_DAYS = 365
+
+# Below this many simulated arm-days the shards run in-process
+PARALLEL_MIN_CELLS = 2_000_000
+
+
+def _observed_confidence(control, variations, users):
+    """
+    Observed confidence of the best variation at every checkpoint.
+
+    Parameters:
+    -----------
+    control : np.ndarray
+        Cumulative control conversions, shape (runs, days)
+    variations : np.ndarray
+        Cumulative variation conversions, shape (arms, runs, days)
+    users : np.ndarray
+        Cumulative users per arm at each checkpoint, shape (days,)
+
+    Returns:
+    --------
+    tuple
+        (1 - p-value) * 100 of the two-sided z-test of the variation with the
+        highest observed rate, and whether that variation is ahead of the
+        control (z > 0), both of shape (runs, days)
+    """
+    best = variations.max(axis=0)
+    p_control = control / users
+    p_variation = best / users
+    p_pooled = (control + best) / (2 * users)
+    se = np.sqrt(p_pooled * (1 - p_pooled) * (2 / users))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_stat = np.where(se > 0, (p_variation - p_control) / se, 0.0)
+    p_value = 2 * ndtr(-np.abs(z_stat))
+    return ((1 - p_value) * 100).astype(np.float32), best > control
+
+
+def _simulate_shard(args):
+    """
+    Simulate one shard of runs with and without the expected improvement.
+
+    Returns the observed confidence and variation-ahead matrices (runs, days)
+    of both scenarios.
+    """
+    seed, runs, days, daily_users, p, target_rate, variations = args
+    rng = create_rng(seed)
+
+    def cumulative(rate, arms):
+        return np.cumsum(rng.binomial(daily_users, rate, (arms, runs, days)), axis=2)
+
+    users = daily_users * np.arange(1, days + 1)
+
+    # Alternative: every variation carries the expected improvement
+    control = cumulative(p, 1)[0]
+    treated = cumulative(target_rate, variations - 1)
+    effect = _observed_confidence(control, treated, users)
+
+    # Null: all arms convert like the control
+    control = cumulative(p, 1)[0]
+    untreated = cumulative(p, variations - 1)
+    null = _observed_confidence(control, untreated, users)
+
+    return effect, null
+
+
+def simulate_confidence_trajectories(
+    visits, conversions, traffic, variations, improvement, confidence,
+    runs=10000, days=None, workers=None, rng=None
+):
+    """
+    Simulate experiment trajectories and summarize the observed confidence.
+
+    Parameters:
+    -----------
+    visits : float
+        Daily visits to the website
+    conversions : float
+        Daily conversions
+    traffic : float
+        Percentage of traffic to include in the test
+    variations : int
+        Number of test variations (including control)
+    improvement : float
+        Expected improvement in conversion rate (percentage)
+    confidence : float
+        Statistical confidence level (percentage)
+    runs : int
+        Number of simulated experiments per scenario
+    days : int, optional
+        Simulated horizon (defaults to the frequentist duration, capped at
+        MAX_SIMULATION_DAYS)
+    workers : int, optional
+        Worker processes for the shards (defaults to the CPU count; 1 runs
+        everything in-process)
+    rng : np.random.Generator, optional
+        Random generator of the request, used to seed the shards
+
+    Returns:
+    --------
+    dict
+        Per-day p5/p50/p95 bands of observed (two-sided) confidence and
+        probability of a significant result with the variation ahead of the
+        control, under the expected improvement, plus the probability of such a
+        false win when peeking daily without any true effect
+    """
+    p = conversions / visits
+    target_rate = p * (1 + improvement / 100)
+    if p <= 0 or target_rate >= 1:
+        raise ValueError("The baseline and improved conversion rates must be between 0 and 1")
+
+    daily_users = int(round(visits * traffic / 100 / variations))
+    if daily_users < 1:
+        raise ValueError("Less than one visitor per variation and day")
+
+    planned_days = calculate_frequentist(visits, conversions, traffic, variations, improvement, confidence)["days"]
+    if days is None:
+        days = min(planned_days, MAX_SIMULATION_DAYS)
+    days = int(max(1, min(days, MAX_SIMULATION_DAYS)))
+
+    if rng is None:
+        rng = create_rng(0)
+
+    shard_sizes = [min(SHARD_RUNS, runs - start) for start in range(0, runs, SHARD_RUNS)]
+    shard_seeds = rng.integers(0, 2**63, len(shard_sizes))
+    shards = [
+        (int(seed), size, days, daily_users, p, target_rate, variations)
+        for seed, size in zip(shard_seeds, shard_sizes)
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    cells = 2 * runs * days * variations
+    if workers > 1 and len(shards) > 1 and cells >= PARALLEL_MIN_CELLS:
+        results = map_in_pool(_simulate_shard, shards, workers)
+    else:
+        results = [_simulate_shard(shard) for shard in shards]
+
+    effect_confidence = np.concatenate([effect[0] for effect, _ in results])
+    effect_ahead = np.concatenate([effect[1] for effect, _ in results])
+    null_confidence = np.concatenate([null[0] for _, null in results])
+    null_ahead = np.concatenate([null[1] for _, null in results])
+
+    bands = np.percentile(effect_confidence, [5, 50, 95], axis=0)
+    # A win is a significant result with the variation ahead: a significant loss is not one
+    win_probability = np.mean((effect_confidence >= confidence) & effect_ahead, axis=0)
+
+    # A false win is declared the first time an A/A run crosses the threshold with the variation ahead
+    null_crossed = np.maximum.accumulate((null_confidence >= confidence) & null_ahead, axis=1)
+    false_win_by_day = null_crossed.mean(axis=0)
+
+    return {
+        "runs": int(runs),
+        "simulatedDays": days,
+        "plannedDays": int(planned_days) if math.isfinite(planned_days) else None,
+        "dataPointsByDay": [
+            {
+                "day": day + 1,
+                "p5": float(bands[0, day]),
+                "p50": float(bands[1, day]),
+                "p95": float(bands[2, day]),
+                "winProbability": float(win_probability[day]),
+                "falseWinProbability": float(false_win_by_day[day])
+            }
+            for day in range(days)
+        ],
+        "falseWinProbability": float(false_win_by_day[-1]),
+        "finalWinProbability": float(win_probability[-1])
+    }
@@ -6,49 +6,182 @@ import numpy as np
 from typing import Dict, List, Any, Tuple, Optional
 import math
 
-def prepare_visualization_data(control_data: List[float], variant_data: List[float], kpi_type: str) -> Dict[str, Any]:
+from .group_stats import GroupStats
+
+# Raw values returned: every value, a stratified sample of each group, or none
+RAW_DATA_MODES = ("full", "sample", "none")
+
+# Values per group of the 'sample' mode when no size is given
+DEFAULT_RAW_DATA_POINTS = 1000
+
+# Share of a sample taken from each tail (the most extreme values, all kept)
+SAMPLE_TAIL_FRACTION = 0.05
+
+# Points per group of the scatter-plot frequencies outside the 'full' mode
+FREQUENCY_MAX_POINTS = 500
+
+def prepare_visualization_data(
+    control_data: List[float],
+    variant_data: List[float],
+    kpi_type: str,
+    control_stats: Optional[GroupStats] = None,
+    variant_stats: Optional[GroupStats] = None,
+    raw_data_mode: str = "full",
+    raw_data_points: int = DEFAULT_RAW_DATA_POINTS
+) -> Dict[str, Any]:
     """
     Process raw data to prepare visualization-ready data structures for frontend charts
     
+    Outside the 'full' mode, the response has a bounded size whatever the
+    number of values: the raw values are sampled or left out, and the
+    scatter-plot frequencies are grouped into at most FREQUENCY_MAX_POINTS
+    points per group. Quartiles, box plots and histograms always summarize
+    every value.
+    
     Args:
-        control_data: List of values for control group
-        variant_data: List of values for variant group
+        control_data: Values for control group (list or array)
+        variant_data: Values for variant group (list or array)
         kpi_type: Type of KPI being analyzed (conversion, aov, revenue)
+        control_stats: Sorted statistics of the control values (NaN-free), reused instead of sorting again
+        variant_stats: Sorted statistics of the variant values (NaN-free), reused instead of sorting again
+        raw_data_mode: 'full' (every value), 'sample' (stratified sample of each group, see
+            stratified_sample) or 'none' (no raw values)
+        raw_data_points: Values per group of the 'sample' mode
         
     Returns:
         Dictionary containing structured data for various chart types
     """
-    result = {
-        "raw_data": {
-            "control": control_data,
-            "variation": variant_data
+    if raw_data_mode not in RAW_DATA_MODES:
+        raise ValueError(f"Unknown raw data mode: {raw_data_mode}")
+    
+    if raw_data_mode != "full" or kpi_type in ["aov", "revenue", "revenue_per_user"]:
+        # Sorted statistics of each group, built from the values when not given
+        if control_stats is None or variant_stats is None:
+            control_stats, variant_stats = (
+                GroupStats(_clean_values(values)) for values in (control_data, variant_data)
+            )
+    
+    if raw_data_mode == "full":
+        raw_data = {
+            "control": control_data if isinstance(control_data, list) else control_data.tolist(),
+            "variation": variant_data if isinstance(variant_data, list) else variant_data.tolist()
         }
-    }
+    elif raw_data_mode == "sample":
+        raw_data = {
+            "control": stratified_sample(control_stats.sorted, raw_data_points).tolist(),
+            "variation": stratified_sample(variant_stats.sorted, raw_data_points).tolist()
+        }
+    else:
+        raw_data = None
+    
+    result = {"raw_data": raw_data}
     
     # Only perform these calculations for AOV and revenue type metrics
     if kpi_type in ["aov", "revenue", "revenue_per_user"]:
         # Calculate quartiles for box plots
-        result["quartiles"] = calculate_quartiles(control_data, variant_data)
+        result["quartiles"] = calculate_quartiles(control_data, variant_data, control_stats, variant_stats)
+        
+        # Box plot statistics, whiskers included
+        result["box_plot"] = calculate_box_plot(control_stats, variant_stats)
         
         # Generate histogram data
-        result["histogram_data"] = generate_histogram_bins(control_data, variant_data)
+        result["histogram_data"] = generate_histogram_bins(
+            control_data, variant_data, control_stats=control_stats, variant_stats=variant_stats
+        )
         
         # Generate frequency data for scatter plots
-        result["frequency_data"] = generate_frequency_data(control_data, variant_data)
+        result["frequency_data"] = generate_frequency_data(
+            control_data, variant_data, None if raw_data_mode == "full" else FREQUENCY_MAX_POINTS
+        )
     
     return result
 
-def calculate_quartiles(control_data: List[float], variant_data: List[float]) -> Dict[str, Dict[str, float]]:
+def _clean_values(values) -> np.ndarray:
+    """Float values without NaN and None"""
+    values = np.asarray(values, dtype=float)
+    return values[~np.isnan(values)]
+
+def stratified_sample(sorted_values: np.ndarray, size: int) -> np.ndarray:
+    """
+    Deterministic sample of sorted values that keeps the shape and the tails of the distribution
+    
+    The SAMPLE_TAIL_FRACTION most extreme values at each end are all kept (so
+    the minimum, maximum and outliers stay visible); the rest of the sample
+    takes one value per stratum of equal counts between them, at its center.
+    
+    Args:
+        sorted_values: Sorted values of a group
+        size: Number of values to return (at least 3)
+        
+    Returns:
+        Sorted sample of `size` values, or all the values when there are not more
+    """
+    n = len(sorted_values)
+    if n <= size:
+        return sorted_values
+    
+    tail = max(1, int(size * SAMPLE_TAIL_FRACTION))
+    middle = size - 2 * tail
+    positions = tail + ((np.arange(middle) + 0.5) * (n - 2 * tail) / middle).astype(np.int64)
+    indices = np.concatenate([np.arange(tail), positions, np.arange(n - tail, n)])
+    return sorted_values[indices]
+
+def calculate_box_plot(control_stats: GroupStats, variant_stats: GroupStats) -> Dict[str, Dict[str, float]]:
+    """
+    Box plot statistics of both groups, computed on every value
+    
+    Args:
+        control_stats: Sorted statistics of the control values
+        variant_stats: Sorted statistics of the variant values
+        
+    Returns:
+        Dictionary with, for each non-empty group, the extremes, quartiles, median, mean,
+        whiskers (most extreme values inside the 1.5 IQR fences) and number of outliers
+    """
+    box_plot = {}
+    for name, group in (("control", control_stats), ("variation", variant_stats)):
+        if not group.count:
+            continue
+        q1, q3 = group.percentile([25, 75])
+        start, stop = group.outlier_bounds_indices()
+        box_plot[name] = {
+            "min_value": group.min_value,
+            "q1": float(q1),
+            "median": group.median,
+            "q3": float(q3),
+            "max_value": group.max_value,
+            "mean": group.mean,
+            "lower_whisker": float(group.sorted[start]),
+            "upper_whisker": float(group.sorted[stop - 1]),
+            "outliers_count": group.count - (stop - start)
+        }
+    return box_plot
+
+def calculate_quartiles(
+    control_data: List[float],
+    variant_data: List[float],
+    control_stats: Optional[GroupStats] = None,
+    variant_stats: Optional[GroupStats] = None
+) -> Dict[str, Dict[str, float]]:
     """
     Calculate quartile values for box plot visualizations
     
     Args:
         control_data: List of values for control group
         variant_data: List of values for variant group
+        control_stats: Sorted statistics of the control values, if already computed
+        variant_stats: Sorted statistics of the variant values, if already computed
         
     Returns:
         Dictionary with quartile values for both groups
     """
+    if control_stats is not None and variant_stats is not None:
+        quartiles = {}
+        for name, group in (("control", control_stats), ("variation", variant_stats)):
+            q1, q3 = group.percentile([25, 75]) if group.count else (0, 0)
+            quartiles[name] = {"q1": float(q1), "q3": float(q3)}
+        return quartiles
+    
     # Clean data - remove NaN and None values
     control_clean = [x for x in control_data if x is not None and not math.isnan(x)]
     variant_clean = [x for x in variant_data if x is not None and not math.isnan(x)]
@@ -74,7 +207,13 @@ def calculate_quartiles(control_data: List[float], variant_data: List[float]) ->
         }
     }
 
-def generate_histogram_bins(control_data: List[float], variant_data: List[float], bin_count: int = 7) -> List[Dict[str, Any]]:
+def generate_histogram_bins(
+    control_data: List[float],
+    variant_data: List[float],
+    bin_count: int = 7,
+    control_stats: Optional[GroupStats] = None,
+    variant_stats: Optional[GroupStats] = None
+) -> List[Dict[str, Any]]:
     """
     Generate histogram bins for visualization
     
@@ -82,22 +221,34 @@ def generate_histogram_bins(control_data: List[float], variant_data: List[float]
         control_data: List of values for control group
         variant_data: List of values for variant group
         bin_count: Number of bins to generate
+        control_stats: Sorted statistics of the control values, if already computed
+        variant_stats: Sorted statistics of the variant values, if already computed
         
     Returns:
         List of bin data suitable for histogram visualization
     """
-    # Clean data - remove NaN and None values
-    control_clean = [x for x in control_data if x is not None and not math.isnan(x)]
-    variant_clean = [x for x in variant_data if x is not None and not math.isnan(x)]
-    
-    # Combine data to determine overall range
-    all_data = control_clean + variant_clean
-    
-    if not all_data:
-        return []
-    
-    min_value = min(all_data)
-    max_value = max(all_data)
+    if control_stats is not None and variant_stats is not None:
+        # Range from the ends of the sorted values, bins counted in one vectorized pass
+        control_clean = control_stats.sorted
+        variant_clean = variant_stats.sorted
+        groups = [group for group in (control_clean, variant_clean) if len(group)]
+        if not groups:
+            return []
+        min_value = min(float(group[0]) for group in groups)
+        max_value = max(float(group[-1]) for group in groups)
+    else:
+        # Clean data - remove NaN and None values
+        control_clean = [x for x in control_data if x is not None and not math.isnan(x)]
+        variant_clean = [x for x in variant_data if x is not None and not math.isnan(x)]
+        
+        # Combine data to determine overall range
+        all_data = control_clean + variant_clean
+        
+        if not all_data:
+            return []
+        
+        min_value = min(all_data)
+        max_value = max(all_data)
     
     # Ensure we have a non-zero range
     if min_value == max_value:
@@ -111,82 +262,110 @@ def generate_histogram_bins(control_data: List[float], variant_data: List[float]
     for i in range(bin_count):
         bin_start = min_value + i * bin_size
         bin_end = min_value + (i + 1) * bin_size if i < bin_count - 1 else max_value
-        
-        # Round bin edges for better readability
-        bin_start_rounded = round(bin_start, 2)
-        bin_end_rounded = round(bin_end, 2)
-        
-        bin_label = f"{bin_start_rounded}€-{bin_end_rounded}€"
-        
-        bins.append({
-            "bin": bin_label,
-            "control": 0,
-            "variant": 0,
-            "binStart": bin_start_rounded,
-            "binEnd": bin_end_rounded
-        })
-    
-    # Count values in each bin
-    for value in control_clean:
-        bin_index = min(bin_count - 1, max(0, int((value - min_value) / bin_size)))
-        bins[bin_index]["control"] += 1
-        
-    for value in variant_clean:
-        bin_index = min(bin_count - 1, max(0, int((value - min_value) / bin_size)))
-        bins[bin_index]["variant"] += 1
+        bins.append(_histogram_bin(bin_start, bin_end))
+    
+    # Count values in each bin (same bin index as int((value - min_value) / bin_size), clipped)
+    for key, values in (("control", control_clean), ("variant", variant_clean)):
+        indices = ((np.asarray(values, dtype=float) - min_value) / bin_size).astype(np.int64)
+        counts = np.bincount(np.clip(indices, 0, bin_count - 1), minlength=bin_count)
+        for bin_data, count in zip(bins, counts):
+            bin_data[key] = int(count)
     
     return bins
 
-def generate_frequency_data(control_data: List[float], variant_data: List[float]) -> Dict[str, List[Dict[str, Any]]]:
+def _histogram_bin(bin_start: float, bin_end: float, control_count: int = 0, variant_count: int = 0) -> Dict[str, Any]:
+    """Histogram bin entry, with edges rounded for better readability"""
+    bin_start_rounded = round(bin_start, 2)
+    bin_end_rounded = round(bin_end, 2)
+    
+    return {
+        "bin": f"{bin_start_rounded}€-{bin_end_rounded}€",
+        "control": control_count,
+        "variant": variant_count,
+        "binStart": bin_start_rounded,
+        "binEnd": bin_end_rounded
+    }
+
+def histogram_from_counts(
+    bin_edges: List[float],
+    control_counts: List[int],
+    variant_counts: List[int]
+) -> List[Dict[str, Any]]:
     """
-    Generate frequency distribution data for scatter plots
+    Histogram bins from counts already computed on fixed bins (pre-aggregated data)
     
     Args:
-        control_data: List of values for control group
-        variant_data: List of values for variant group
+        bin_edges: Edges of the bins shared by both groups (one more than the counts)
+        control_counts: Number of control values in each bin
+        variant_counts: Number of variant values in each bin
         
     Returns:
-        Dictionary with frequency data for scatter plot visualization
+        List of bin data in the format of generate_histogram_bins
     """
-    # Clean data - remove NaN and None values
-    control_clean = [x for x in control_data if x is not None and not math.isnan(x)]
-    variant_clean = [x for x in variant_data if x is not None and not math.isnan(x)]
-    
-    # Round values to create discrete bins
-    control_rounded = [round(x) for x in control_clean]
-    variant_rounded = [round(x) for x in variant_clean]
+    if len(control_counts) != len(bin_edges) - 1 or len(variant_counts) != len(bin_edges) - 1:
+        raise ValueError("A histogram needs one count per bin, between consecutive bin edges")
     
-    # Count frequency of each value
-    control_freq = {}
-    for value in control_rounded:
-        control_freq[value] = control_freq.get(value, 0) + 1
-        
-    variant_freq = {}
-    for value in variant_rounded:
-        variant_freq[value] = variant_freq.get(value, 0) + 1
-    
-    # Format data for scatter plot
-    control_scatter = [
-        {
-            "orderValue": float(value),
-            "frequency": count,
-            "name": "Control",
-            "color": "#8884d8"
-        }
-        for value, count in control_freq.items()
+    return [
+        _histogram_bin(bin_start, bin_end, int(control_count), int(variant_count))
+        for bin_start, bin_end, control_count, variant_count
+        in zip(bin_edges[:-1], bin_edges[1:], control_counts, variant_counts)
     ]
+
+def _nice_step(target: float) -> float:
+    """Smallest step of 1, 2 or 5 times a power of ten at least equal to target"""
+    magnitude = 10 ** math.floor(math.log10(target))
+    for factor in (1, 2, 5):
+        if factor * magnitude >= target:
+            return factor * magnitude
+    return 10 * magnitude
+
+def generate_frequency_data(
+    control_data: List[float],
+    variant_data: List[float],
+    max_points: Optional[int] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate frequency distribution data for scatter plots
     
-    variant_scatter = [
-        {
-            "orderValue": float(value),
-            "frequency": count,
-            "name": "Variant",
-            "color": "#82ca9d"
-        }
-        for value, count in variant_freq.items()
-    ]
+    Args:
+        control_data: Values for control group (list or array)
+        variant_data: Values for variant group (list or array)
+        max_points: Maximum number of points per group; values are rounded to a coarser
+            step (1, 2 or 5 times a power of ten) when they have more distinct rounded values
+        
+    Returns:
+        Dictionary with frequency data for scatter plot visualization
+    """
+    scatter = {}
+    for key, values, name, color in (
+        ("control", control_data, "Control", "#8884d8"),
+        ("variation", variant_data, "Variant", "#82ca9d")
+    ):
+        # Round values to create discrete bins (half to even, as round; + 0.0 turns -0.0 into 0.0)
+        rounded = np.round(_clean_values(values)) + 0.0
+        unique, first, counts = np.unique(rounded, return_index=True, return_counts=True)
+        
+        if max_points is not None and len(unique) > max_points:
+            # Finest step (2, 5, 10, 20...) that leaves few enough points, regrouping the rounded values
+            rounded_values, rounded_first, rounded_counts = unique, first, counts
+            step = 1.0
+            while len(unique) > max_points:
+                step = _nice_step(step * 1.5)
+                unique, inverse = np.unique(np.round(rounded_values / step) * step + 0.0, return_inverse=True)
+                counts = np.bincount(inverse, weights=rounded_counts, minlength=len(unique)).astype(np.int64)
+                first = np.full(len(unique), len(rounded))
+                np.minimum.at(first, inverse, rounded_first)
+        
+        # Points in order of first appearance of their value
+        order = np.argsort(first, kind="stable")
+        scatter[key] = [
+            {
+                "orderValue": float(value),
+                "frequency": int(count),
+                "name": name,
+                "color": color
+            }
+            for value, count in zip(unique[order], counts[order])
+        ]
     
-    return {
-        "control": control_scatter,
-        "variation": variant_scatter
-    } 
\ No newline at end of file
+    return scatter
@@ -3,16 +3,33 @@ A/B Test Toolkit API
 Main FastAPI application
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import io
+import json
 import logging
+import math
+import tempfile
 import time
 
-from models import CalculationRequest, CalculationResponse
-from models_analysis import DataAnalysisRequest, DataAnalysisSummary, DetailedAnalysisResult
-from calculators import calculate_frequentist, calculate_bayesian, calculate_confidence_evolution, analyze_ab_test_data, analyze_data
+from models import (
+    CalculationRequest, CalculationResponse, ConfidenceEvolutionBatchRequest, ConfidenceEvolutionScenario,
+    GridCalculationRequest, TrajectorySimulationRequest, GRID_AXES, expand_grid_axis
+)
+from models_analysis import (
+    AggregatedAnalysisRequest, ConversionCountsRequest, DataAnalysisRequest, DataAnalysisSpec, DataAnalysisSummary, DetailedAnalysisResult,
+    MetricResult, MultiArmAnalysisRequest, MultiArmAnalysisResult
+)
+from calculators import calculate_frequentist, calculate_frequentist_grid, calculate_bayesian, calculate_confidence_evolution, calculate_confidence_evolution_batch, iter_confidence_evolution, simulate_confidence_trajectories, analyze_ab_test_data, analyze_aggregated_data, analyze_data, analyze_conversion_counts, analyze_multi_arm_data, summarize_ab_test_data, create_rng, seed_from_parameters
+from calculators.bayesian import SIMULATION_SEED
+from calculators.dataset_cache import dataset_cache
+from calculators.process_pool import shutdown_pool
+from calculators.random_streams import DEFAULT_ANALYSIS_SEED
 
 # Configure logging
 logging.basicConfig(
@@ -21,11 +38,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger("abtest_api")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the worker processes shared by the calculators
+    shutdown_pool()
+
 # Create FastAPI app
 app = FastAPI(
     title="A/B Test Calculator API",
     description="API for calculating A/B test sample sizes and durations",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -85,18 +109,149 @@ async def calculate(request: CalculationRequest):
             )
         else:
             logger.info(f"Processing bayesian calculation: {request.dict()}")
-            return calculate_bayesian(
+            seed = request.seed if request.seed is not None else SIMULATION_SEED
+            result = calculate_bayesian(
                 request.visits,
                 request.conversions,
                 request.traffic,
                 request.variations,
                 request.improvement,
-                request.confidence
+                request.confidence,
+                engine=request.bayesian_engine,
+                precise=request.precise,
+                rng=create_rng(seed)
             )
+            result["seed"] = seed
+            return result
     except Exception as e:
         logger.error(f"Calculation error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
 
+# Output formats supported by the grid endpoint
+GRID_FORMATS = ("json", "csv", "parquet")
+
+# Rows per chunk when streaming a grid as CSV
+GRID_CSV_CHUNK_ROWS = 10000
+
+# Grid columns serialized as integers
+GRID_INTEGER_COLUMNS = ("variations", "days", "minSample")
+
+def _grid_column_values(values, integer):
+    """Convert a grid column to JSON-friendly values (None where not computable)"""
+    if integer:
+        return [None if math.isnan(v) else int(v) for v in values.tolist()]
+    return values.tolist()
+
+def _iter_grid_csv(columns):
+    """Yield a grid as CSV text, one chunk of rows at a time"""
+    names = list(columns)
+    yield ",".join(names) + "\n"
+    cells = len(columns["days"])
+    for start in range(0, cells, GRID_CSV_CHUNK_ROWS):
+        chunk = [
+            _grid_column_values(columns[name][start:start + GRID_CSV_CHUNK_ROWS], name in GRID_INTEGER_COLUMNS)
+            for name in names
+        ]
+        yield "".join(
+            ",".join("" if value is None else str(value) for value in row) + "\n"
+            for row in zip(*chunk)
+        )
+
+# Frequentist sensitivity grid endpoint
+@app.post("/calculate/grid", tags=["Calculations"])
+async def calculate_grid(
+    request: GridCalculationRequest,
+    format: str = Query("json", description="Output format: json, csv or parquet"),
+):
+    """
+    Calculate frequentist durations and sample sizes over a grid of scenarios
+    
+    Each of improvement, confidence, power, traffic and variations accepts a single
+    value, a list of values or a range, and the full Cartesian grid is computed in
+    one vectorized pass. Large grids can be streamed as CSV or returned as Parquet.
+    """
+    format = format.lower()
+    if format not in GRID_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(GRID_FORMATS)}")
+    
+    try:
+        axes = {
+            name: expand_grid_axis(getattr(request, name))
+            for name in GRID_AXES
+        }
+        logger.info(f"Processing frequentist grid of {math.prod(len(v) for v in axes.values())} cells")
+        columns = calculate_frequentist_grid(request.visits, request.conversions, **axes)
+    except Exception as e:
+        logger.error(f"Grid calculation error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
+    
+    if format == "csv":
+        return StreamingResponse(
+            _iter_grid_csv(columns),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="grid.csv"'},
+        )
+    
+    if format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet output requires the pyarrow package")
+        buffer = io.BytesIO()
+        pq.write_table(pa.table(columns), buffer)
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": 'attachment; filename="grid.parquet"'},
+        )
+    
+    # Bypass response model encoding, which walks every value of large grids
+    return JSONResponse(content={
+        "cells": len(columns["days"]),
+        "axes": {name: values.tolist() for name, values in axes.items()},
+        **{
+            name: _grid_column_values(values, name in GRID_INTEGER_COLUMNS)
+            for name, values in columns.items()
+        },
+    })
+
+def _evolution_seed(request: CalculationRequest) -> int:
+    """Seed of a confidence evolution request (derived from its parameters if not given)"""
+    if request.seed is not None:
+        return request.seed
+    return seed_from_parameters(
+        request.visits, request.conversions, request.traffic,
+        request.variations, request.improvement, request.confidence
+    )
+
+# Streaming formats supported by the confidence evolution stream
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+# Events serialized per chunk written to the stream
+STREAM_CHUNK_EVENTS = 200
+
+def _format_stream_event(event, format):
+    """Serialize one event as an NDJSON line or a server-sent event"""
+    data = json.dumps(event)
+    if format == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+def _iter_stream_chunks(events, format):
+    """Group serialized events into chunks to limit the number of writes"""
+    chunk = []
+    for event in events:
+        chunk.append(_format_stream_event(event, format))
+        if len(chunk) >= STREAM_CHUNK_EVENTS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
 # Confidence evolution endpoint
 @app.post("/confidence-evolution", tags=["Calculations"])
 async def get_confidence_evolution(request: CalculationRequest):
@@ -108,45 +263,243 @@ async def get_confidence_evolution(request: CalculationRequest):
     """
     try:
         logger.info(f"Processing confidence evolution calculation: {request.dict()}")
-        return calculate_confidence_evolution(
+        seed = _evolution_seed(request)
+        result = calculate_confidence_evolution(
             request.visits,
             request.conversions,
             request.traffic,
             request.variations,
             request.improvement,
-            request.confidence
+            request.confidence,
+            request.sample_points,
+            rng=create_rng(seed)
         )
+        result["seed"] = seed
+        return result
     except Exception as e:
         logger.error(f"Confidence evolution calculation error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
 
-# Data Analysis Endpoints
-@app.post("/analyze-data/summary", response_model=DataAnalysisSummary, tags=["Data Analysis"])
-async def get_data_analysis_summary(request: DataAnalysisRequest):
+# Streaming confidence evolution endpoint
+@app.post("/confidence-evolution/stream", tags=["Calculations"])
+async def stream_confidence_evolution(
+    request: CalculationRequest,
+    format: str = Query("ndjson", description="Stream format: ndjson or sse"),
+):
     """
-    Analyze uploaded data and provide summary statistics
+    Stream the evolution of statistical confidence point by point
     
-    This endpoint takes data file content and specifications, and returns summary statistics
-    for the control and variation groups, along with outlier detection.
+    Returns the same curve as /confidence-evolution as newline-delimited JSON or
+    server-sent events: a 'summary' event with the target sizes, one 'point' event
+    per data point and a final 'end' event, so charts can render while the
+    response is still being written.
     """
+    format = format.lower()
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(STREAM_FORMATS)}")
+    
     try:
-        logger.info(f"Processing data analysis summary request for KPI: {request.kpi_type}")
-        
-        analysis_result = analyze_ab_test_data(
-            request.file_content,
-            request.file_type.value,
-            request.control_column.dict(),
-            request.variation_column.dict(),
-            request.kpi_type,
-            request.exclude_outliers,
-            request.users_per_variation
+        logger.info(f"Processing streamed confidence evolution calculation: {request.dict()}")
+        seed = _evolution_seed(request)
+        events = iter_confidence_evolution(
+            request.visits,
+            request.conversions,
+            request.traffic,
+            request.variations,
+            request.improvement,
+            request.confidence,
+            request.sample_points,
+            rng=create_rng(seed)
+        )
+        # Compute the curve before the response starts so errors still get a status code
+        summary = next(events)
+        summary["seed"] = seed
+    except Exception as e:
+        logger.error(f"Confidence evolution calculation error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
+    
+    def stream():
+        yield _format_stream_event(summary, format)
+        yield from _iter_stream_chunks(events, format)
+    
+    return StreamingResponse(stream(), media_type=STREAM_FORMATS[format])
+
+def _validation_message(error: ValidationError, subject: str = "scenario") -> str:
+    """One-line summary of a validation error (errors of the whole model are reported on `subject`)"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or subject}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+# Batch confidence evolution endpoint
+@app.post("/confidence-evolution/batch", tags=["Calculations"])
+async def get_confidence_evolution_batch(request: ConfidenceEvolutionBatchRequest):
+    """
+    Calculate the confidence evolution of many scenarios in one call
+    
+    Each scenario takes the fields of /confidence-evolution plus an optional `id`.
+    All valid scenarios are computed in one vectorized pass; the response holds
+    the curves keyed by id ('results', same shape as /confidence-evolution) and
+    the reason each invalid or failed scenario was skipped ('errors').
+    """
+    logger.info(f"Processing batch confidence evolution calculation: {len(request.scenarios)} scenarios")
+    errors = {}
+    scenarios = []
+    seen_ids = set()
+    for index, data in enumerate(request.scenarios):
+        scenario_id = str(index) if data.get("id") is None else str(data["id"])
+        if scenario_id in seen_ids:
+            errors[f"{scenario_id} (#{index})"] = f"Duplicate scenario id: {scenario_id}"
+            continue
+        seen_ids.add(scenario_id)
+        try:
+            scenario = ConfidenceEvolutionScenario(**{**data, "id": scenario_id})
+        except ValidationError as e:
+            errors[scenario_id] = _validation_message(e)
+            continue
+        seed = _evolution_seed(scenario)
+        scenarios.append({
+            "id": scenario_id,
+            "visits": scenario.visits,
+            "conversions": scenario.conversions,
+            "traffic": scenario.traffic,
+            "variations": scenario.variations,
+            "improvement": scenario.improvement,
+            "confidence": scenario.confidence,
+            "sample_points": scenario.sample_points,
+            "seed": seed,
+            "rng": create_rng(seed),
+        })
+    
+    try:
+        results, calculation_errors = calculate_confidence_evolution_batch(scenarios)
+    except Exception as e:
+        logger.error(f"Batch confidence evolution calculation error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
+    
+    for scenario in scenarios:
+        if scenario["id"] in results:
+            results[scenario["id"]]["seed"] = scenario["seed"]
+    errors.update(calculation_errors)
+    return {"results": results, "errors": errors}
+
+# Monte Carlo confidence trajectories endpoint
+@app.post("/confidence-evolution/simulate", tags=["Calculations"])
+def simulate_confidence_evolution(request: TrajectorySimulationRequest):
+    """
+    Simulate experiment trajectories and return observed confidence bands
+    
+    Runs `runs` simulated experiments with the expected improvement and as many
+    without any effect, day by day, and returns p5/p50/p95 bands of the observed
+    confidence plus the probability of a false early win when peeking every day.
+    Declared without async so the simulation runs outside the event loop.
+    """
+    try:
+        logger.info(f"Processing confidence trajectory simulation: {request.dict()}")
+        seed = _evolution_seed(request)
+        result = simulate_confidence_trajectories(
+            request.visits,
+            request.conversions,
+            request.traffic,
+            request.variations,
+            request.improvement,
+            request.confidence,
+            runs=request.runs,
+            days=request.days,
+            workers=request.workers,
+            rng=create_rng(seed)
         )
+        result["seed"] = seed
+        return result
+    except Exception as e:
+        logger.error(f"Confidence trajectory simulation error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Calculation error: {str(e)}")
+
+# Data Analysis Endpoints
+def _analysis_summary(spec: DataAnalysisSpec, source) -> dict:
+    """Summary statistics of an analysis request (base64 string, bytes or open file), without statistical tests"""
+    try:
+        logger.info(f"Processing data analysis summary request for KPI: {spec.kpi_type}")
         
-        return analysis_result["data_summary"]
+        seed = spec.seed if spec.seed is not None else DEFAULT_ANALYSIS_SEED
+        return summarize_ab_test_data(
+            source,
+            spec.file_type.value,
+            spec.control_column.dict(),
+            spec.variation_column.dict(),
+            spec.exclude_outliers,
+            rng=create_rng(seed),
+            chunk_size=spec.chunk_size
+        )
     except Exception as e:
         logger.error(f"Data analysis summary error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Data analysis error: {str(e)}")
 
+def _detailed_analysis(spec: DataAnalysisSpec, source) -> dict:
+    """Detailed analysis of an analysis request (base64 string, bytes or open file)"""
+    if spec.users_per_variation is None:
+        raise HTTPException(status_code=422, detail="The detailed analysis needs the user counts (users_per_variation, or users_control and users_variation for uploads)")
+    try:
+        logger.info(f"Processing detailed data analysis request for KPI: {spec.kpi_type}")
+        
+        seed = spec.seed if spec.seed is not None else DEFAULT_ANALYSIS_SEED
+        analysis_result = analyze_ab_test_data(
+            source,
+            spec.file_type.value,
+            spec.control_column.dict(),
+            spec.variation_column.dict(),
+            spec.kpi_type,
+            spec.exclude_outliers,
+            spec.users_per_variation,
+            rng=create_rng(seed),
+            chunk_size=spec.chunk_size,
+            seed=seed,
+            bootstrap_resamples=spec.bootstrap_resamples,
+            bootstrap_memory_mb=spec.bootstrap_memory_mb,
+            bootstrap_workers=spec.bootstrap_workers,
+            revenue_test=spec.revenue_test,
+            metrics=spec.metrics,
+            raw_data_mode=spec.raw_data_mode,
+            raw_data_points=spec.raw_data_points,
+            segment_column=spec.segment_column.dict() if spec.segment_column is not None else None,
+            users_per_segment=spec.users_per_segment,
+            segment_correction=spec.segment_correction
+        )
+        analysis_result["seed"] = seed
+        return _detailed_result(analysis_result, spec.exclude_outliers)
+    except Exception as e:
+        logger.error(f"Detailed data analysis error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Data analysis error: {str(e)}")
+
+def _detailed_result(analysis_result: dict, exclude_outliers: bool) -> dict:
+    """Detailed analysis response: outliers removed instead of the data summary"""
+    # Add outliers removed information in the response
+    outliers_data = {}
+    if exclude_outliers and "data_summary" in analysis_result:
+        if analysis_result["data_summary"].get("has_outliers", False):
+            outliers_data = {
+                "control": analysis_result["data_summary"]["control_summary"].get("outliers_count", 0),
+                "variation": analysis_result["data_summary"]["variation_summary"].get("outliers_count", 0)
+            }
+            
+    analysis_result["outliers_removed"] = outliers_data
+    
+    # Remove data summary from response
+    if "data_summary" in analysis_result:
+        del analysis_result["data_summary"]
+    
+    return analysis_result
+
+@app.post("/analyze-data/summary", response_model=DataAnalysisSummary, tags=["Data Analysis"])
+async def get_data_analysis_summary(request: DataAnalysisRequest):
+    """
+    Analyze uploaded data and provide summary statistics
+    
+    This endpoint takes data file content and specifications, and returns summary statistics
+    for the control and variation groups, along with outlier detection.
+    """
+    return _analysis_summary(request, request.file_content)
+
 @app.post("/analyze-data/detailed", response_model=DetailedAnalysisResult, tags=["Data Analysis"])
 async def get_detailed_analysis(request: DataAnalysisRequest):
     """
@@ -155,39 +508,275 @@ async def get_detailed_analysis(request: DataAnalysisRequest):
     This endpoint takes data file content and specifications, and returns detailed
     analysis including statistical tests, metrics, and interpretations.
     """
+    return _detailed_analysis(request, request.file_content)
+
+@app.post("/analyze-data/detailed/multi", response_model=MultiArmAnalysisResult, tags=["Data Analysis"])
+async def get_multi_arm_analysis(request: MultiArmAnalysisRequest):
+    """
+    Detailed analysis of several variations against one control (A/B/n test)
+    
+    The file is parsed once; each variation is compared to the control as by
+    /analyze-data/detailed, concurrently, and the p-values of each metric are
+    corrected for the multiple comparisons (Holm by default).
+    """
     try:
-        logger.info(f"Processing detailed data analysis request for KPI: {request.kpi_type}")
+        logger.info(
+            f"Processing multi-variation data analysis request for KPI: {request.kpi_type} "
+            f"({len(request.variation_columns)} variations)"
+        )
         
-        analysis_result = analyze_ab_test_data(
+        seed = request.seed if request.seed is not None else DEFAULT_ANALYSIS_SEED
+        analysis_result = analyze_multi_arm_data(
             request.file_content,
             request.file_type.value,
             request.control_column.dict(),
-            request.variation_column.dict(),
+            [column.dict() for column in request.variation_columns],
             request.kpi_type,
             request.exclude_outliers,
-            request.users_per_variation
+            request.users_per_variation,
+            rng=create_rng(seed),
+            seed=seed,
+            bootstrap_resamples=request.bootstrap_resamples,
+            bootstrap_memory_mb=request.bootstrap_memory_mb,
+            bootstrap_workers=request.bootstrap_workers,
+            revenue_test=request.revenue_test,
+            correction=request.correction,
+            workers=request.workers,
+            metrics=request.metrics,
+            raw_data_mode=request.raw_data_mode,
+            raw_data_points=request.raw_data_points
         )
-        
-        # Add outliers removed information in the response
-        outliers_data = {}
-        if request.exclude_outliers and "data_summary" in analysis_result:
-            if analysis_result["data_summary"].get("has_outliers", False):
-                outliers_data = {
-                    "control": analysis_result["data_summary"]["control_summary"].get("outliers_count", 0),
-                    "variation": analysis_result["data_summary"]["variation_summary"].get("outliers_count", 0)
-                }
-                
-        analysis_result["outliers_removed"] = outliers_data
-        
-        # Remove data summary from response
-        if "data_summary" in analysis_result:
-            del analysis_result["data_summary"]
-        
+        analysis_result["arms"] = [_detailed_result(arm, request.exclude_outliers) for arm in analysis_result["arms"]]
+        analysis_result["seed"] = seed
         return analysis_result
     except Exception as e:
-        logger.error(f"Detailed data analysis error: {str(e)}", exc_info=True)
+        logger.error(f"Multi-variation data analysis error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Data analysis error: {str(e)}")
+
+@app.post("/analyze-data/conversion-counts", response_model=MetricResult, tags=["Data Analysis"])
+def get_conversion_counts_analysis(request: ConversionCountsRequest):
+    """
+    Conversion z-test computed from counts, without a data file
+    
+    Returns the conversion rates, uplift, z-test (with the confidence interval of
+    the difference of rates and its power) and interpretation, as the
+    conversion_metrics of a detailed analysis.
+    """
+    try:
+        return analyze_conversion_counts(
+            request.conversions_control,
+            request.users_control,
+            request.conversions_variation,
+            request.users_variation,
+            request.confidence
+        )
+    except Exception as e:
+        logger.error(f"Conversion counts analysis error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Data analysis error: {str(e)}")
+
+@app.post("/analyze-data/aggregated", response_model=DetailedAnalysisResult, tags=["Data Analysis"])
+def get_aggregated_analysis(request: AggregatedAnalysisRequest):
+    """
+    Detailed analysis from pre-aggregated statistics of each group, without a data file
+    
+    Takes the count, sum, sum of squares, minimum and maximum of each group (plus
+    optional quantiles and fixed-bin histogram) and runs the tests valid on these
+    statistics (z-test, Welch t-test, CLT revenue test, with their power). The
+    response has the format of /analyze-data/detailed; the fields the statistics
+    cannot provide are empty and listed in unavailable_fields.
+    """
+    try:
+        logger.info(f"Processing aggregated data analysis request for KPI: {request.kpi_type}")
+        
+        return analyze_aggregated_data(
+            request.control.dict(),
+            request.variation.dict(),
+            request.kpi_type,
+            request.users_per_variation,
+            metrics=request.metrics
+        )
+    except Exception as e:
+        logger.error(f"Aggregated data analysis error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Data analysis error: {str(e)}")
 
+# Uploads larger than this are spooled to a temporary file instead of memory
+UPLOAD_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Request bodies accepted by the upload endpoints, for the OpenAPI schema
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            },
+            "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+def _upload_fields(
+    file_type: Optional[str] = Query(None, description="Type of the data file (csv, json, xlsx, parquet, arrow); taken from the file name of a multipart upload when omitted"),
+    control_column: Optional[str] = Query(None, description="Name of the control column"),
+    control_index: Optional[int] = Query(None, description="Index of the control column"),
+    variation_column: Optional[str] = Query(None, description="Name of the variation column"),
+    variation_index: Optional[int] = Query(None, description="Index of the variation column"),
+    segment_column: Optional[str] = Query(None, description="Name of the column splitting the rows into segments"),
+    segment_index: Optional[int] = Query(None, description="Index of the segment column"),
+    segment_correction: Optional[str] = Query(None, description="Multiple-comparison correction of the per-segment p-values"),
+    kpi_type: Optional[str] = Query(None, description="Type of KPI to analyze (conversion, revenue, aov)"),
+    metrics: Optional[List[str]] = Query(None, description="Metrics computed in addition to the one of kpi_type (repeat the parameter or separate them with commas)"),
+    exclude_outliers: Optional[bool] = Query(None, description="Whether to exclude outliers from analysis"),
+    users_control: Optional[int] = Query(None, description="Number of users in the control group"),
+    users_variation: Optional[int] = Query(None, description="Number of users in the variation group"),
+    seed: Optional[int] = Query(None, description="Seed of the request's random stream"),
+    chunk_size: Optional[int] = Query(None, description="Read CSV, Parquet and Arrow files in chunks of this many rows with bounded memory"),
+    revenue_test: Optional[str] = Query(None, description="Test of the total revenue (clt, bootstrap)"),
+    bootstrap_resamples: Optional[int] = Query(None, description="Number of bootstrap resamples of the total revenue"),
+    bootstrap_memory_mb: Optional[float] = Query(None, description="Memory ceiling of the bootstrap blocks, in megabytes"),
+    bootstrap_workers: Optional[int] = Query(None, description="Worker processes of the bootstrap"),
+    raw_data_mode: Optional[str] = Query(None, description="Raw values returned for the charts (full, sample, none)"),
+    raw_data_points: Optional[int] = Query(None, description="Values per group returned by the sample raw data mode"),
+) -> Dict[str, Any]:
+    """Analysis specification of an upload given as query parameters"""
+    fields = {
+        "file_type": file_type,
+        "control_column": control_column,
+        "control_index": control_index,
+        "variation_column": variation_column,
+        "variation_index": variation_index,
+        "segment_column": segment_column,
+        "segment_index": segment_index,
+        "segment_correction": segment_correction,
+        "kpi_type": kpi_type,
+        "metrics": metrics,
+        "exclude_outliers": exclude_outliers,
+        "users_control": users_control,
+        "users_variation": users_variation,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "revenue_test": revenue_test,
+        "bootstrap_resamples": bootstrap_resamples,
+        "bootstrap_memory_mb": bootstrap_memory_mb,
+        "bootstrap_workers": bootstrap_workers,
+        "raw_data_mode": raw_data_mode,
+        "raw_data_points": raw_data_points,
+    }
+    return {name: value for name, value in fields.items() if value is not None}
+
+async def _read_upload(http_request: Request, fields: Dict[str, Any]):
+    """
+    Open the file of an upload request and build its analysis specification
+    
+    Multipart bodies carry the file in a 'file' part (form fields override the
+    query parameters); any other body is the raw file, streamed into a spooled
+    temporary file. The file is handed to the parser as is, without base64 or
+    JSON copies.
+    """
+    content_type = http_request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await http_request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="The multipart body needs a 'file' part")
+        fields = {**fields, **{name: value for name, value in form.items() if name != "file"}}
+        if "file_type" not in fields and upload.filename and "." in upload.filename:
+            fields["file_type"] = upload.filename.rsplit(".", 1)[-1].lower()
+        source = upload.file
+    elif content_type.startswith("application/json"):
+        raise HTTPException(status_code=415, detail="Send the file as multipart/form-data or application/octet-stream")
+    else:
+        source = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+        async for chunk in http_request.stream():
+            source.write(chunk)
+        source.seek(0)
+    
+    def column(name_field, index_field):
+        index = fields.get(index_field)
+        name = fields.get(name_field)
+        return {"name": name if name is not None or index is None else str(index), "index": index}
+    
+    metrics = fields.get("metrics")
+    if metrics is not None:
+        # Repeated parameters or a comma-separated list (multipart form fields)
+        metrics = [name.strip() for value in ([metrics] if isinstance(metrics, str) else metrics) for name in value.split(",") if name.strip()]
+    
+    try:
+        spec = DataAnalysisSpec(
+            file_type=fields.get("file_type"),
+            control_column=column("control_column", "control_index"),
+            variation_column=column("variation_column", "variation_index"),
+            segment_column=(
+                column("segment_column", "segment_index")
+                if "segment_column" in fields or "segment_index" in fields else None
+            ),
+            kpi_type=fields.get("kpi_type"),
+            metrics=metrics,
+            exclude_outliers=fields.get("exclude_outliers", False),
+            users_per_variation=(
+                {"control": fields.get("users_control"), "variation": fields.get("users_variation")}
+                if "users_control" in fields or "users_variation" in fields else None
+            ),
+            seed=fields.get("seed"),
+            chunk_size=fields.get("chunk_size"),
+            **{
+                name: fields[name]
+                for name in (
+                    "revenue_test", "bootstrap_resamples", "bootstrap_memory_mb", "bootstrap_workers", "segment_correction",
+                    "raw_data_mode", "raw_data_points"
+                )
+                if name in fields
+            },
+        )
+    except ValidationError as e:
+        source.close()
+        raise HTTPException(status_code=422, detail=_validation_message(e, "request"))
+    return spec, source
+
+@app.post("/analyze-data/upload/summary", response_model=DataAnalysisSummary, tags=["Data Analysis"], openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_data_analysis_summary(http_request: Request, fields: Dict[str, Any] = Depends(_upload_fields)):
+    """
+    Summary statistics of a file sent as multipart/form-data or as a raw body
+    
+    Same result as /analyze-data/summary; the analysis specification is given as
+    query parameters (or multipart form fields) instead of a JSON body.
+    """
+    spec, source = await _read_upload(http_request, fields)
+    try:
+        return _analysis_summary(spec, source)
+    finally:
+        source.close()
+
+@app.post("/analyze-data/upload/detailed", response_model=DetailedAnalysisResult, tags=["Data Analysis"], openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_detailed_analysis(http_request: Request, fields: Dict[str, Any] = Depends(_upload_fields)):
+    """
+    Detailed analysis of a file sent as multipart/form-data or as a raw body
+    
+    Same result as /analyze-data/detailed; the analysis specification is given as
+    query parameters (or multipart form fields) instead of a JSON body.
+    """
+    spec, source = await _read_upload(http_request, fields)
+    try:
+        return _detailed_analysis(spec, source)
+    finally:
+        source.close()
+
+# Dataset cache statistics endpoint
+@app.get("/cache/stats", tags=["Data Analysis"])
+async def get_cache_stats():
+    """
+    Hit/miss counters and size of the cache of parsed datasets
+    
+    'hits' and 'misses' count dataset lookups by the analysis endpoints,
+    'stage_hits' and 'stage_misses' the analysis stages reused or computed on
+    cached datasets.
+    """
+    return dataset_cache.stats()
+
 # Custom OpenAPI schema
 def custom_openapi():
     if app.openapi_schema:
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
 
 class CalculationRequest(BaseModel):
     """
@@ -11,6 +13,22 @@ class CalculationRequest(BaseModel):
     improvement: float = Field(..., gt=0, description="Expected improvement in percentage")
     confidence: float = Field(..., ge=80, le=99.9, description="Statistical confidence level in percentage")
     method: str = Field(..., description="Statistical method to use (frequentist or bayesian)")
+    bayesian_engine: str = Field(
+        "exact",
+        description="How the Bayesian method evaluates P(variation > control): exact, normal or simulation"
+    )
+    precise: bool = Field(
+        False,
+        description="Skip the precomputed Bayesian sample-size table and always run the live search"
+    )
+    sample_points: int = Field(
+        20, ge=2, le=10000,
+        description="Number of data points of the confidence evolution curve (at most one per day)"
+    )
+    seed: Optional[int] = Field(
+        None, ge=0, lt=2**53,
+        description="Seed of the request's random stream (derived deterministically when omitted)"
+    )
     
     @validator('conversions')
     def validate_conversions(cls, v, values):
@@ -24,10 +42,151 @@ class CalculationRequest(BaseModel):
         if v.lower() not in allowed_methods:
             raise ValueError(f'Method must be one of: {", ".join(allowed_methods)}')
         return v.lower()
+    
+    @validator('bayesian_engine')
+    def validate_bayesian_engine(cls, v):
+        allowed_engines = ['exact', 'normal', 'simulation']
+        if v.lower() not in allowed_engines:
+            raise ValueError(f'Bayesian engine must be one of: {", ".join(allowed_engines)}')
+        return v.lower()
+
+class TrajectorySimulationRequest(CalculationRequest):
+    """
+    Request model for the Monte Carlo confidence trajectory simulation
+    """
+    runs: int = Field(10000, ge=100, le=100000, description="Number of simulated experiments per scenario")
+    days: Optional[int] = Field(
+        None, ge=1, le=365,
+        description="Simulated horizon in days (defaults to the frequentist test duration)"
+    )
+    workers: Optional[int] = Field(
+        None, ge=1, le=64,
+        description="Worker processes used for the simulation (defaults to the CPU count)"
+    )
+
+class ConfidenceEvolutionScenario(CalculationRequest):
+    """
+    One scenario of a batch confidence evolution request
+    """
+    id: Optional[str] = Field(None, description="Scenario identifier keying its result (defaults to its position in the batch)")
+    
+    @validator('id', pre=True)
+    def validate_id(cls, v):
+        return None if v is None else str(v)
+
+# Largest number of scenarios accepted in one batch
+MAX_BATCH_SCENARIOS = 1000
+
+class ConfidenceEvolutionBatchRequest(BaseModel):
+    """
+    Request model for the batch confidence evolution endpoint
+    """
+    scenarios: List[Dict[str, Any]] = Field(
+        ...,
+        description="Scenarios with the fields of ConfidenceEvolutionScenario, validated one by one so that an invalid scenario does not fail the batch"
+    )
+    
+    @validator('scenarios')
+    def validate_scenarios(cls, v):
+        if not v:
+            raise ValueError('At least one scenario is required')
+        if len(v) > MAX_BATCH_SCENARIOS:
+            raise ValueError(f'A batch accepts at most {MAX_BATCH_SCENARIOS} scenarios')
+        return v
 
 class CalculationResponse(BaseModel):
     """
     Response model for ab test calculation endpoints
     """
     days: int = Field(..., description="Estimated number of days needed for the test")
-    minSample: int = Field(..., description="Minimum required sample size") 
\ No newline at end of file
+    minSample: int = Field(..., description="Minimum required sample size")
+    evaluations: Optional[int] = Field(None, description="Number of candidate sample sizes evaluated by the Bayesian search")
+    source: Optional[str] = Field(None, description="Origin of the Bayesian sample size (table or search)")
+    probabilityToBeBest: Optional[float] = Field(None, description="Bayesian probability that the improved variation is the best arm at the recommended sample size")
+    expectedLoss: Optional[float] = Field(None, description="Bayesian expected loss of choosing the improved variation at the recommended sample size")
+    seed: Optional[int] = Field(None, description="Seed of the random stream used, to reproduce the result") 
+
+class GridRange(BaseModel):
+    """
+    Evenly spaced range of values for one axis of a calculation grid
+    """
+    start: float = Field(..., description="First value of the range")
+    stop: float = Field(..., description="Last value of the range (included)")
+    step: Optional[float] = Field(None, gt=0, description="Spacing between values")
+    num: Optional[int] = Field(None, ge=1, description="Number of values (used when step is not set)")
+    
+    @property
+    def size(self):
+        """Number of values of the range, computed without building it"""
+        if self.step is None:
+            return self.num or 2
+        count = np.floor((self.stop - self.start) / self.step + 1e-9) + 1
+        return int(np.nan_to_num(max(count, 0), nan=0, posinf=np.iinfo(np.int64).max))
+    
+    def expand(self):
+        if self.step is not None:
+            return self.start + self.step * np.arange(self.size)
+        return np.linspace(self.start, self.stop, self.size)
+
+GridAxis = Union[float, List[float], GridRange]
+
+def grid_axis_size(axis):
+    """Return the number of values of a grid axis without expanding it"""
+    if isinstance(axis, GridRange):
+        return axis.size
+    return len(axis) if isinstance(axis, list) else 1
+
+def expand_grid_axis(axis):
+    """Return the values of a grid axis as a 1-D array"""
+    if isinstance(axis, GridRange):
+        return axis.expand()
+    return np.atleast_1d(np.asarray(axis, dtype=float))
+
+# Upper bound on the number of cells computed by a single grid request
+MAX_GRID_CELLS = 2_000_000
+
+# Axes of the grid, in the order of its Cartesian product
+GRID_AXES = ("improvement", "confidence", "power", "traffic", "variations")
+
+class GridCalculationRequest(BaseModel):
+    """
+    Request model for the frequentist sensitivity grid endpoint
+    """
+    visits: float = Field(..., gt=0, description="Daily visits to the website")
+    conversions: float = Field(..., ge=0, description="Daily conversions")
+    improvement: GridAxis = Field(..., description="Expected improvement(s) in percentage")
+    confidence: GridAxis = Field(95, description="Statistical confidence level(s) in percentage")
+    power: GridAxis = Field(0.8, description="Statistical power(s) as a decimal")
+    traffic: GridAxis = Field(100, description="Percentage(s) of traffic to include in the test")
+    variations: GridAxis = Field(2, description="Number(s) of variations (including control)")
+    
+    @validator('conversions')
+    def validate_conversions(cls, v, values):
+        if 'visits' in values and v > values['visits']:
+            raise ValueError('Conversions cannot be greater than visits')
+        return v
+    
+    @root_validator(skip_on_failure=True)
+    def validate_grid(cls, values):
+        # The grid size comes from the axis lengths, so oversized ranges are
+        # rejected before any of them is expanded
+        cells = 1
+        for name in GRID_AXES:
+            cells *= grid_axis_size(values[name])
+        if cells == 0:
+            raise ValueError('Every grid axis needs at least one value')
+        if cells > MAX_GRID_CELLS:
+            raise ValueError(f'Grid has {cells} cells, the maximum is {MAX_GRID_CELLS}')
+        
+        axes = {name: expand_grid_axis(values[name]) for name in GRID_AXES}
+        if np.any(axes["improvement"] <= 0):
+            raise ValueError('Improvements must be positive')
+        if np.any(axes["confidence"] < 80) or np.any(axes["confidence"] > 99.9):
+            raise ValueError('Confidence levels must be between 80 and 99.9')
+        if np.any(axes["power"] <= 0) or np.any(axes["power"] >= 1):
+            raise ValueError('Power values must be between 0 and 1')
+        if np.any(axes["traffic"] <= 0) or np.any(axes["traffic"] > 100):
+            raise ValueError('Traffic percentages must be between 0 and 100')
+        if np.any(axes["variations"] < 2) or np.any(axes["variations"] != np.round(axes["variations"])):
+            raise ValueError('Variations must be integers of at least 2')
+        return values
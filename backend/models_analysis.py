@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, root_validator, validator
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 
@@ -7,6 +7,8 @@ class FileType(str, Enum):
     CSV = "csv"
     JSON = "json"
     EXCEL = "xlsx"
+    PARQUET = "parquet"
+    ARROW = "arrow"
 
 class DataColumn(BaseModel):
     """Model for a data column specification"""
@@ -14,17 +16,13 @@ class DataColumn(BaseModel):
     index: Optional[int] = Field(None, description="Column index (for CSV files without headers)")
     type: str = Field("numeric", description="Data type (numeric, categorical, etc.)")
 
-class DataAnalysisRequest(BaseModel):
-    """Request model for data analysis endpoints"""
-    file_content: str = Field(..., description="Base64 encoded file content")
-    file_type: FileType = Field(..., description="Type of the data file")
-    control_column: DataColumn = Field(..., description="Column representing the control group")
-    variation_column: DataColumn = Field(..., description="Column representing the variation group")
+class MetricOptions(BaseModel):
+    """KPI and metrics of an analysis, shared by the file and pre-aggregated analysis requests"""
     kpi_type: str = Field(..., description="Type of KPI to analyze (conversion, revenue, aov)")
-    exclude_outliers: bool = Field(False, description="Whether to exclude outliers from analysis")
-    users_per_variation: Dict[str, int] = Field(
-        ..., 
-        description="Number of users in each variation"
+    metrics: Optional[List[str]] = Field(
+        None,
+        description="Metrics computed in addition to the one of kpi_type (conversion, aov, revenue); "
+                    "the others are left out of the detailed response"
     )
     
     @validator('kpi_type')
@@ -33,6 +31,260 @@ class DataAnalysisRequest(BaseModel):
         if v.lower() not in allowed_kpis:
             raise ValueError(f'KPI type must be one of: {", ".join(allowed_kpis)}')
         return v.lower()
+    
+    @validator('metrics')
+    def validate_metrics(cls, v):
+        if v is None:
+            return v
+        allowed_metrics = ['conversion', 'aov', 'revenue']
+        metrics = [metric.lower() for metric in v]
+        for metric in metrics:
+            if metric not in allowed_metrics:
+                raise ValueError(f'Metrics must be among: {", ".join(allowed_metrics)}')
+        return metrics
+
+class DataAnalysisOptions(MetricOptions):
+    """Analysis options shared by the single and multi-variation data analysis requests"""
+    file_type: FileType = Field(..., description="Type of the data file (parquet and arrow read only the analyzed columns)")
+    exclude_outliers: bool = Field(False, description="Whether to exclude outliers from analysis")
+    seed: Optional[int] = Field(
+        None, ge=0, lt=2**53,
+        description="Seed of the request's random stream (a fixed default is used when omitted)"
+    )
+    revenue_test: str = Field(
+        "clt",
+        description="Test of the total revenue: 'clt' (normal test on revenue per assigned user, non-buyers "
+                    "counting as zeros) or 'bootstrap' (bootstrap distributions of the sums)"
+    )
+    bootstrap_resamples: int = Field(
+        10000, ge=100, le=100000,
+        description="Number of bootstrap resamples of the total revenue (revenue_test 'bootstrap')"
+    )
+    bootstrap_memory_mb: Optional[float] = Field(
+        None, gt=0, le=4096,
+        description="Memory ceiling of the bootstrap blocks drawn at once, in megabytes (only changes the result "
+                    "when a single resample exceeds it)"
+    )
+    bootstrap_workers: Optional[int] = Field(
+        None, ge=1, le=64,
+        description="Worker processes of the bootstrap (defaults to the CPU count; does not change the result)"
+    )
+    raw_data_mode: str = Field(
+        "full",
+        description="Raw values returned for the charts: 'full' (every value), 'sample' (stratified sample of "
+                    "raw_data_points values per group, keeping the tails) or 'none'; outside 'full', the chart "
+                    "data has a bounded size"
+    )
+    raw_data_points: int = Field(
+        1000, ge=10, le=100000,
+        description="Values per group returned by the 'sample' raw data mode"
+    )
+    
+    @validator('revenue_test')
+    def validate_revenue_test(cls, v):
+        allowed_tests = ['clt', 'bootstrap']
+        if v.lower() not in allowed_tests:
+            raise ValueError(f'Revenue test must be one of: {", ".join(allowed_tests)}')
+        return v.lower()
+    
+    @validator('raw_data_mode')
+    def validate_raw_data_mode(cls, v):
+        allowed_modes = ['full', 'sample', 'none']
+        if v.lower() not in allowed_modes:
+            raise ValueError(f'Raw data mode must be one of: {", ".join(allowed_modes)}')
+        return v.lower()
+
+class DataAnalysisSpec(DataAnalysisOptions):
+    """Analysis specification shared by the JSON and upload data analysis endpoints"""
+    control_column: DataColumn = Field(..., description="Column representing the control group")
+    variation_column: DataColumn = Field(..., description="Column representing the variation group")
+    users_per_variation: Optional[Dict[str, int]] = Field(
+        None,
+        description="Number of users in each variation (required by the detailed analysis, not by the summary)"
+    )
+    chunk_size: Optional[int] = Field(
+        None, ge=1000,
+        description="Read CSV, Parquet and Arrow files in chunks of this many rows with bounded memory: tests use running statistics, "
+                    "medians and charts a sample of the values (the bootstrap revenue test is not available)"
+    )
+    segment_column: Optional[DataColumn] = Field(
+        None,
+        description="Column splitting the rows into segments (device, country, traffic source...): "
+                    "the detailed response then includes a per-segment table"
+    )
+    users_per_segment: Optional[Dict[str, Dict[str, int]]] = Field(
+        None,
+        description="Number of users of the control ('control') and variation ('variation') of each segment, "
+                    "keyed by segment, for the per-segment conversion and revenue tests"
+    )
+    segment_correction: str = Field(
+        "holm",
+        description="Multiple-comparison correction of the per-segment p-values: 'holm', 'bonferroni', "
+                    "'benjamini-hochberg' or 'none'"
+    )
+    
+    @validator('users_per_segment')
+    def validate_users_per_segment(cls, v):
+        if v is None:
+            return v
+        for segment, users in v.items():
+            if set(users) != {'control', 'variation'} or min(users.values()) <= 0:
+                raise ValueError(
+                    f"Users of segment '{segment}' must give positive 'control' and 'variation' counts"
+                )
+        return v
+    
+    @validator('segment_correction')
+    def validate_segment_correction(cls, v):
+        allowed_corrections = ['holm', 'bonferroni', 'benjamini-hochberg', 'none']
+        if v.lower() not in allowed_corrections:
+            raise ValueError(f'Correction must be one of: {", ".join(allowed_corrections)}')
+        return v.lower()
+    
+    @root_validator(skip_on_failure=True)
+    def validate_option_combinations(cls, values):
+        if values.get('users_per_segment') is not None and values.get('segment_column') is None:
+            raise ValueError('users_per_segment needs a segment_column')
+        if values.get('chunk_size') is None:
+            return values
+        if values['file_type'] not in (FileType.CSV, FileType.PARQUET, FileType.ARROW):
+            raise ValueError('chunk_size is only available for CSV, Parquet and Arrow files')
+        if values.get('segment_column') is not None:
+            raise ValueError('The segmented analysis is not available with chunk_size')
+        if values.get('revenue_test') == 'bootstrap':
+            raise ValueError("The bootstrap revenue test needs every value: use revenue_test 'clt' with chunk_size")
+        return values
+
+class DataAnalysisRequest(DataAnalysisSpec):
+    """Request model for data analysis endpoints"""
+    file_content: str = Field(..., description="Base64 encoded file content")
+
+class MultiArmAnalysisRequest(DataAnalysisOptions):
+    """Request model for the analysis of several variations against one control"""
+    file_content: str = Field(..., description="Base64 encoded file content")
+    control_column: DataColumn = Field(..., description="Column representing the control group")
+    variation_columns: List[DataColumn] = Field(..., description="Columns of the variations, each compared to the control")
+    users_per_variation: Dict[str, int] = Field(
+        ...,
+        description="Number of users of the control ('control') and of each variation (keyed by its column name)"
+    )
+    correction: str = Field(
+        "holm",
+        description="Multiple-comparison correction across the variations: 'holm', 'bonferroni', "
+                    "'benjamini-hochberg' or 'none'"
+    )
+    workers: Optional[int] = Field(None, ge=1, le=64, description="Threads comparing the variations (defaults to the CPU count)")
+    
+    @validator('variation_columns')
+    def validate_variation_columns(cls, v):
+        if not 1 <= len(v) <= 20:
+            raise ValueError('Between 1 and 20 variation columns are required')
+        names = [column.name for column in v]
+        if len(set(names)) != len(names) or 'control' in names:
+            raise ValueError("Variation column names must be distinct and different from 'control'")
+        return v
+    
+    @validator('correction')
+    def validate_correction(cls, v):
+        allowed_corrections = ['holm', 'bonferroni', 'benjamini-hochberg', 'none']
+        if v.lower() not in allowed_corrections:
+            raise ValueError(f'Correction must be one of: {", ".join(allowed_corrections)}')
+        return v.lower()
+
+class ConversionCountsRequest(BaseModel):
+    """Request model for the conversion test computed from counts, without a data file"""
+    conversions_control: int = Field(..., ge=0, description="Number of converted users in the control group")
+    users_control: int = Field(..., gt=0, description="Number of users in the control group")
+    conversions_variation: int = Field(..., ge=0, description="Number of converted users in the variation group")
+    users_variation: int = Field(..., gt=0, description="Number of users in the variation group")
+    confidence: float = Field(95, ge=80, le=99.9, description="Statistical confidence level in percentage")
+    
+    @validator('users_control')
+    def validate_users_control(cls, v, values):
+        if 'conversions_control' in values and values['conversions_control'] > v:
+            raise ValueError('Conversions cannot be greater than users')
+        return v
+    
+    @validator('users_variation')
+    def validate_users_variation(cls, v, values):
+        if 'conversions_variation' in values and values['conversions_variation'] > v:
+            raise ValueError('Conversions cannot be greater than users')
+        return v
+
+class HistogramCounts(BaseModel):
+    """Counts of a group's values in fixed bins"""
+    bin_edges: List[float] = Field(..., description="Increasing edges of the bins (one more than the counts)")
+    counts: List[int] = Field(..., description="Number of values in each bin")
+    
+    @validator('bin_edges')
+    def validate_bin_edges(cls, v):
+        if len(v) < 2 or any(start >= end for start, end in zip(v, v[1:])):
+            raise ValueError('Bin edges must be at least two increasing values')
+        return v
+    
+    @validator('counts')
+    def validate_counts(cls, v, values):
+        if 'bin_edges' in values and len(v) != len(values['bin_edges']) - 1:
+            raise ValueError('A histogram needs one count per bin, between consecutive bin edges')
+        if any(count < 0 for count in v):
+            raise ValueError('Histogram counts cannot be negative')
+        return v
+
+class AggregatedGroupData(BaseModel):
+    """Pre-aggregated statistics of the transaction values of one group"""
+    count: int = Field(
+        ..., ge=0,
+        description="Number of transactions (converted users for the conversion rate); the AOV and revenue tests "
+                    "need at least two"
+    )
+    sum: float = Field(..., description="Sum of the values")
+    sum_squares: float = Field(..., ge=0, description="Sum of the squared values")
+    min_value: float = Field(..., description="Minimum value")
+    max_value: float = Field(..., description="Maximum value")
+    quantiles: Optional[Dict[float, float]] = Field(
+        None,
+        description="Value of percentiles between 0 and 100, e.g. {\"25\": 12.5, \"50\": 30, \"75\": 61} "
+                    "(50 gives the median, 25 and 75 the box plots)"
+    )
+    histogram: Optional[HistogramCounts] = Field(None, description="Counts in fixed bins, shared by both groups")
+    
+    @validator('max_value')
+    def validate_max_value(cls, v, values):
+        if 'min_value' in values and v < values['min_value']:
+            raise ValueError('The maximum cannot be below the minimum')
+        if {'count', 'sum', 'min_value'} <= set(values) and values['count'] > 0:
+            mean = values['sum'] / values['count']
+            if not values['min_value'] - 1e-9 * abs(mean) <= mean <= v + 1e-9 * abs(mean):
+                raise ValueError('The mean (sum / count) must lie between the minimum and the maximum')
+        return v
+    
+    @validator('quantiles')
+    def validate_quantiles(cls, v, values):
+        if v is None:
+            return v
+        percentiles = sorted(v)
+        if percentiles and not 0 <= percentiles[0] <= percentiles[-1] <= 100:
+            raise ValueError('Quantiles must be keyed by percentiles between 0 and 100')
+        if any(v[lower] > v[upper] for lower, upper in zip(percentiles, percentiles[1:])):
+            raise ValueError('Quantile values must increase with the percentile')
+        return v
+
+class AggregatedAnalysisRequest(MetricOptions):
+    """Request model for the analysis of pre-aggregated statistics, without a data file"""
+    control: AggregatedGroupData = Field(..., description="Statistics of the control group")
+    variation: AggregatedGroupData = Field(..., description="Statistics of the variation group")
+    users_per_variation: Dict[str, int] = Field(
+        ...,
+        description="Number of users in each variation"
+    )
+    
+    @validator('control', 'variation')
+    def validate_count(cls, v, values):
+        # The conversion rate accepts any count, the AOV and revenue tests need a variance
+        metrics = {values.get('kpi_type'), *(values.get('metrics') or [])}
+        if v.count < 2 and metrics & {'aov', 'revenue'}:
+            raise ValueError('The AOV and revenue tests need at least two values in each group')
+        return v
 
 class DataSummary(BaseModel):
     """Summary statistics for a dataset"""
@@ -58,6 +310,21 @@ class StatisticalTestResult(BaseModel):
     confidence: float = Field(..., description="Statistical confidence level (1 - p_value) * 100")
     significant: bool = Field(..., description="Whether the result is statistically significant")
     power: Optional[float] = Field(None, description="Statistical power of the test")
+    ci_lower: Optional[float] = Field(None, description="Lower bound of the confidence interval of the difference (variation - control)")
+    ci_upper: Optional[float] = Field(None, description="Upper bound of the confidence interval of the difference (variation - control)")
+    effect_size: Optional[float] = Field(None, description="Rank-biserial correlation 1 - 2U / (n1 * n2) of the Mann-Whitney test")
+    shift_estimate: Optional[float] = Field(None, description="Hodges-Lehmann estimate of the shift (variation - control) of the Mann-Whitney test (from 4096 order statistics of larger groups)")
+    adjusted_p_value: Optional[float] = Field(None, description="P-value corrected for multiple comparisons (multi-variation analysis)")
+    adjusted_significant: Optional[bool] = Field(None, description="Whether the result stays significant after the correction")
+
+class NormalityResult(BaseModel):
+    """Normality assessment of a group, used to select the statistical test"""
+    test_name: Optional[str] = Field(None, description="Normality test used ('dagostino-pearson', or 'shapiro' for small groups)")
+    statistic: Optional[float] = Field(None, description="Statistic of the normality test")
+    p_value: Optional[float] = Field(None, description="P-value of the normality test")
+    skewness: Optional[float] = Field(None, description="Sample skewness")
+    kurtosis: Optional[float] = Field(None, description="Sample excess kurtosis (0 for a normal distribution)")
+    normal: bool = Field(..., description="Whether the group is considered normally distributed")
 
 class MetricResult(BaseModel):
     """Detailed results for a specific metric"""
@@ -68,6 +335,42 @@ class MetricResult(BaseModel):
     test_result: StatisticalTestResult = Field(..., description="Statistical test results")
     interpretation: str = Field(..., description="Interpretation of the results")
 
+class SegmentGroupSummary(BaseModel):
+    """Summary statistics of one group in a segment (None when undefined, e.g. for an empty group)"""
+    count: int = Field(..., description="Number of data points")
+    mean: Optional[float] = Field(None, description="Mean value")
+    median: Optional[float] = Field(None, description="Median value")
+    std_dev: Optional[float] = Field(None, description="Standard deviation")
+    min_value: Optional[float] = Field(None, description="Minimum value")
+    max_value: Optional[float] = Field(None, description="Maximum value")
+    outliers_count: int = Field(0, description="Number of outliers detected with the fences of the segment")
+
+class SegmentMetricResult(BaseModel):
+    """Compact result of a metric in a segment"""
+    control_value: Optional[float] = Field(None, description="Value for control group")
+    variation_value: Optional[float] = Field(None, description="Value for variation group")
+    uplift: Optional[float] = Field(None, description="Uplift percentage (None when the control value is zero)")
+    test_name: str = Field(..., description="Name of the statistical test used")
+    p_value: Optional[float] = Field(None, description="P-value of the test (None when the segment cannot be tested)")
+    confidence: Optional[float] = Field(None, description="Statistical confidence level (1 - p_value) * 100")
+    significant: Optional[bool] = Field(None, description="Whether the result is statistically significant")
+    adjusted_p_value: Optional[float] = Field(None, description="P-value corrected for the number of segments tested")
+    adjusted_significant: Optional[bool] = Field(None, description="Whether the result stays significant after the correction")
+
+class SegmentResult(BaseModel):
+    """Summaries and metrics of one segment"""
+    segment: str = Field(..., description="Segment label")
+    control: SegmentGroupSummary = Field(..., description="Summary statistics of the control group in the segment")
+    variation: SegmentGroupSummary = Field(..., description="Summary statistics of the variation group in the segment")
+    conversion_metrics: Optional[SegmentMetricResult] = Field(None, description="Conversion rate in the segment (needs its users)")
+    aov_metrics: Optional[SegmentMetricResult] = Field(None, description="Average Order Value in the segment")
+    revenue_metrics: Optional[SegmentMetricResult] = Field(None, description="Total revenue in the segment (tested with its users)")
+
+class SegmentedResults(BaseModel):
+    """Per-segment table of a segmented analysis"""
+    correction: str = Field(..., description="Multiple-comparison correction applied to the per-segment p-values")
+    segments: List[SegmentResult] = Field(..., description="One row per segment, sorted by label")
+
 class OutliersRemoved(BaseModel):
     """Information about outliers removed during analysis"""
     control: int = Field(0, description="Number of outliers removed from control group")
@@ -95,13 +398,19 @@ class DetailedAnalysisResult(BaseModel):
         None, 
         description="Total revenue analysis results"
     )
+    normality: Optional[Dict[str, NormalityResult]] = Field(
+        None,
+        description="Normality assessment of each group, deciding between the t-test and the Mann-Whitney test"
+    )
     message: str = Field(..., description="Overall summary message")
     outliers_removed: Optional[OutliersRemoved] = Field(None, description="Information about outliers removed during analysis")
+    seed: Optional[int] = Field(None, description="Seed of the random stream used, to reproduce the result")
     
     # Add data for charts
     raw_data: Optional[Dict[str, List[float]]] = Field(
         None, 
-        description="Raw data for each variation, used for visualizations"
+        description="Raw data for each variation (all values, a stratified sample or none, see raw_data_mode), "
+                    "used for visualizations"
     )
     
     # Advanced statistics for box plots
@@ -109,6 +418,11 @@ class DetailedAnalysisResult(BaseModel):
         None,
         description="Quartile values (q1, q3) for box plots visualizations"
     )
+    box_plot: Optional[Dict[str, Dict[str, float]]] = Field(
+        None,
+        description="Box plot statistics of each variation computed on all values: min_value, q1, median, q3, "
+                    "max_value, mean, whiskers (lower_whisker, upper_whisker) and outliers_count"
+    )
     
     # Histogram data
     histogram_data: Optional[List[Dict[str, Any]]] = Field(
@@ -120,4 +434,28 @@ class DetailedAnalysisResult(BaseModel):
     frequency_data: Optional[Dict[str, List[Dict[str, Any]]]] = Field(
         None,
         description="Frequency distribution data for scatter plots"
-    ) 
\ No newline at end of file
+    )
+    
+    # Fields that pre-aggregated statistics cannot fill
+    unavailable_fields: Optional[List[str]] = Field(
+        None,
+        description="Fields left empty because the statistics given cannot provide them (pre-aggregated analysis)"
+    )
+    
+    # Per-segment table
+    segment_results: Optional[SegmentedResults] = Field(
+        None,
+        description="Summaries and tests of each segment, when a segment column is given"
+    )
+
+class ArmAnalysisResult(DetailedAnalysisResult):
+    """Detailed analysis of one variation against the control"""
+    variation: str = Field(..., description="Column of the variation")
+
+class MultiArmAnalysisResult(BaseModel):
+    """Analysis of several variations against one control"""
+    control_column: str = Field(..., description="Column of the control group")
+    correction: str = Field(..., description="Multiple-comparison correction applied to the p-values")
+    arms: List[ArmAnalysisResult] = Field(..., description="Detailed analysis of each variation against the control")
+    message: str = Field(..., description="Overall summary message, based on the corrected results")
+    seed: Optional[int] = Field(None, description="Seed of the random stream used, to reproduce the result")